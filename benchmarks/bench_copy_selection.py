@@ -0,0 +1,95 @@
+"""
+Times copy_selection on groups of connected objects (every object is wired to the next one through ItemConnections,
+so each copy has GUID references to remap), against the previous json.dumps + str.replace-per-GUID implementation.
+
+Usage: python benchmarks/bench_copy_selection.py [--items N [N ...]] [--legacy-max N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pytower import suitebro  # noqa: E402
+from pytower.copy import copy_selection, fitem_guid  # noqa: E402
+from pytower.selection import Selection  # noqa: E402
+from pytower.suitebro import Suitebro  # noqa: E402
+from synthetic import make_save_json  # noqa: E402
+
+
+def legacy_copy_selection(selection: Selection) -> Selection:
+    replacement_table = {}
+    copies = []
+    new_groups = {}
+    save_max_groupid = suitebro.get_active_save().get_max_groupid()
+    for obj in selection:
+        old_guid = obj.item['guid'] if obj.item is not None else None
+        copied = obj.copy()
+
+        old_group_id = obj.group_id
+        if old_group_id >= 0:
+            if old_group_id not in new_groups:
+                max_new_groupid = max(new_groups.values()) if new_groups.values() else -1
+                new_groups[old_group_id] = max(save_max_groupid, max_new_groupid) + 1
+            copied.group_id = new_groups[old_group_id]
+
+        if old_guid is not None:
+            replacement_table[old_guid] = copied.item['guid']
+        copies.append(copied)
+
+    full_replacement_table = {}
+    for old, new in replacement_table.items():
+        full_replacement_table[old] = new
+        full_replacement_table[fitem_guid(old)] = fitem_guid(new)
+
+    def replace_guids(datadict):
+        encoding = json.dumps(datadict)
+        for target, replacement in full_replacement_table.items():
+            encoding = encoding.replace(target, replacement)
+        return json.loads(encoding)
+
+    for obj in copies:
+        obj.item = replace_guids(obj.item)
+        obj.properties = replace_guids(obj.properties)
+
+    return Selection(copies)
+
+
+def make_connected_save(num_items: int) -> Suitebro:
+    save = Suitebro('bench', '.', make_save_json(num_items, num_groups=max(1, num_items // 100)))
+    for obj, other in zip(save.objects, save.objects[1:]):
+        obj.connect_to('OnActivated', other, 'Toggle', delay=0.1)
+    suitebro._active_save = save
+    return save
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, nargs='+', default=[100, 1_000, 5_000, 20_000],
+                        help='Number of objects in each copied selection')
+    parser.add_argument('--legacy-max', type=int, default=5_000,
+                        help='Largest selection to time the previous (quadratic) implementation on')
+    args = parser.parse_args()
+
+    print(f'{"objects":>9} {"legacy s":>10} {"current s":>10} {"speedup":>8}')
+    for num_items in args.items:
+        save = make_connected_save(num_items)
+        selection = Selection(save.objects)
+
+        start = time.perf_counter()
+        copy_selection(selection)
+        current = time.perf_counter() - start
+
+        if num_items <= args.legacy_max:
+            start = time.perf_counter()
+            legacy_copy_selection(selection)
+            legacy = time.perf_counter() - start
+            print(f'{num_items:>9} {legacy:>10.3f} {current:>10.3f} {legacy / current:>7.1f}x')
+        else:
+            print(f'{num_items:>9} {"-":>10} {current:>10.3f} {"-":>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Microbenchmarks for the TowerObject getter/setter hot paths. Each setter is also timed against the toolz.update_in
+based write it replaced, which copies every dict along the path and so gets slower as the properties blob grows.
+
+Usage: python benchmarks/bench_object_accessors.py [--props N [N ...]] [--number N]
+"""
+import argparse
+import copy
+import os
+import sys
+import timeit
+from typing import Callable
+
+from toolz import update_in
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pytower import object as tower_object  # noqa: E402
+from pytower.object import PropertyAccessor, TowerObject  # noqa: E402
+from pytower.util import xyz  # noqa: E402
+
+
+def make_object(num_props: int) -> TowerObject:
+    """Makes an object with a RespawnLocation (so transforms get mirrored) and num_props filler properties"""
+    def vector(x, y, z):
+        return {'Struct': {'value': {'Vector': {'x': x, 'y': y, 'z': z}}}}
+
+    properties = {f'Filler{i}': {'Int': {'value': i}} for i in range(num_props)}
+    properties['RespawnLocation'] = {'Struct': {'value': {'Struct': {
+        'Translation': vector(0.0, 0.0, 0.0),
+        'Rotation': {'Struct': {'value': {'Quat': {'x': 0.0, 'y': 0.0, 'z': 0.0, 'w': 1.0}}}},
+        'Scale3D': vector(1.0, 1.0, 1.0),
+    }}}}
+    properties['WorldScale'] = vector(1.0, 1.0, 1.0)
+    properties['GroupID'] = {'Int': {'value': 1}}
+
+    item = {'name': 'PlayerSpawn', 'guid': '00000000-0000-0000-0000-000000000000', 'properties': properties,
+            'position': {'x': 0.0, 'y': 0.0, 'z': 0.0}, 'rotation': {'x': 0.0, 'y': 0.0, 'z': 0.0, 'w': 1.0},
+            'scale': {'x': 1.0, 'y': 1.0, 'z': 1.0}}
+    meta = {'name': 'PlayerSpawn_C_0', 'properties': copy.deepcopy(properties)}
+    return TowerObject(item=item, properties=meta, nocopy=True)
+
+
+def legacy_set_property(obj: TowerObject, spec: list[str], value):
+    obj.item = update_in(obj.item, spec, lambda _: value)
+    obj.properties = update_in(obj.properties, spec, lambda _: value)
+
+
+def legacy_set_position(obj: TowerObject, value):
+    vector_dict = value.to_dict()
+    obj.item = update_in(obj.item, ['position'], lambda _: vector_dict)
+    legacy_set_property(obj, tower_object._RESPAWN_TRANSLATION_SPEC, vector_dict)
+
+
+def cases(obj: TowerObject) -> dict[str, tuple[Callable[[], object], Callable[[], object] | None]]:
+    pos = xyz(1.0, 2.0, 3.0)
+    scale = xyz(2.0, 2.0, 2.0)
+
+    def set_position():
+        obj.position = pos
+
+    def set_scale():
+        obj.scale = scale
+
+    def set_group_id():
+        obj.group_id = 7
+
+    def set_custom_name():
+        obj.custom_name = 'benchmark'
+
+    def set_property_str():
+        obj.set_property('Filler0.Int.value', 5)
+
+    scale_accessor = PropertyAccessor('WorldScale')
+
+    return {
+        'get position': (lambda: obj.position, None),
+        'get rotation': (lambda: obj.rotation, None),
+        'get group_id': (lambda: obj.group_id, None),
+        'get_property': (lambda: obj.get_property('Filler0.Int.value'), None),
+        'get_property(vec)': (lambda: obj.get_property('WorldScale'), None),
+        'accessor.get(vec)': (lambda: scale_accessor.get(obj), None),
+        'accessor.set(vec)': (lambda: scale_accessor.set(obj, scale), None),
+        'set position': (set_position, lambda: legacy_set_position(obj, pos)),
+        'set scale': (set_scale, None),
+        'set group_id': (set_group_id, lambda: legacy_set_property(obj, tower_object._GROUP_ID_SPEC, 7)),
+        'set custom_name': (set_custom_name, lambda: legacy_set_property(obj, tower_object._CUSTOM_NAME_SPEC, 'b')),
+        'set_property(str)': (set_property_str,
+                              lambda: legacy_set_property(obj, ['properties', 'Filler0', 'Int', 'value'], 5)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--props', type=int, nargs='+', default=[0, 100, 1000],
+                        help='Number of filler properties on the benchmarked object')
+    parser.add_argument('--number', type=int, default=20_000, help='Calls per measurement')
+    args = parser.parse_args()
+
+    for num_props in args.props:
+        print(f'\n{num_props} filler properties (ns/call)')
+        print(f'{"operation":>18} {"current":>10} {"update_in":>10}')
+        for name, (current, legacy) in cases(make_object(num_props)).items():
+            current_ns = min(timeit.repeat(current, number=args.number, repeat=3)) / args.number * 1e9
+            legacy_ns = '-'
+            if legacy is not None:
+                legacy_ns = f'{min(timeit.repeat(legacy, number=args.number, repeat=3)) / args.number * 1e9:.0f}'
+            print(f'{name:>18} {current_ns:>10.0f} {legacy_ns:>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Times OctreeBVH builds and queries on uniformly random points, against brute-force NumPy scans and (when scipy is
+installed) scipy's cKDTree, plus ray casts against a random triangle soup.
+
+Usage: python benchmarks/bench_octree.py [--points N] [--triangles N] [--queries N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pytower.octree import OctreeBVH, ray_triangles  # noqa: E402
+
+
+def timed(fn, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--points', type=int, default=1_000_000, help='Number of indexed points')
+    parser.add_argument('--triangles', type=int, default=100_000, help='Number of triangles for the ray casts')
+    parser.add_argument('--queries', type=int, default=100, help='Queries per measurement')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-10_000, 10_000, (args.points, 3))
+    centers = rng.uniform(-10_000, 10_000, (args.queries, 3))
+
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        cKDTree = None
+
+    bvh = None
+    kdtree = None
+
+    def build_bvh():
+        nonlocal bvh
+        bvh = OctreeBVH.from_points(points)
+
+    def build_kdtree():
+        nonlocal kdtree
+        kdtree = cKDTree(points)
+
+    def per_query(fn) -> float:
+        return timed(lambda: [fn(c) for c in centers]) / args.queries
+
+    rows = [('build', timed(build_bvh), None, timed(build_kdtree) if cKDTree else None)]
+
+    half = 250.0
+    rows.append(('query_box', per_query(lambda c: bvh.query_box(c - half, c + half)),
+                 per_query(lambda c: np.flatnonzero(np.all((points >= c - half) & (points <= c + half), axis=1))),
+                 per_query(lambda c: kdtree.query_ball_point(c, half, p=np.inf)) if cKDTree else None))
+    radius = 500.0
+    rows.append(('query_sphere', per_query(lambda c: bvh.query_sphere(c, radius)),
+                 per_query(lambda c: np.flatnonzero(np.linalg.norm(points - c, axis=1) <= radius)),
+                 per_query(lambda c: kdtree.query_ball_point(c, radius)) if cKDTree else None))
+    rows.append(('nearest(k=8)', per_query(lambda c: bvh.nearest(c, 8)),
+                 per_query(lambda c: np.argpartition(np.linalg.norm(points - c, axis=1), 8)[:8]),
+                 per_query(lambda c: kdtree.query(c, 8)) if cKDTree else None))
+
+    def insert():
+        for p in rng.uniform(-10_000, 10_000, (10_000, 3)):
+            bvh.add_point(p)
+
+    rows.append(('add_point', timed(insert) / 10_000, None, None))
+
+    triangles = rng.uniform(-10_000, 10_000, (args.triangles, 1, 3)) + rng.normal(0, 50, (args.triangles, 3, 3))
+    origins = rng.uniform(-10_000, 10_000, (args.queries, 3))
+    directions = rng.normal(size=(args.queries, 3))
+    tri_bvh = OctreeBVH.from_triangles(triangles)
+    rows.append(('ray_cast', timed(lambda: [tri_bvh.ray_cast(o, d) for o, d in zip(origins, directions)]) / args.queries,
+                 timed(lambda: [ray_triangles(triangles, o, d).min() for o, d in zip(origins, directions)])
+                 / args.queries, None))
+
+    print(f'{args.points} points, {args.triangles} triangles (ms)')
+    print(f'{"operation":>14} {"octree":>10} {"brute":>10} {"cKDTree":>10}')
+    for name, octree_s, brute_s, kdtree_s in rows:
+        brute = f'{brute_s * 1e3:.3f}' if brute_s is not None else '-'
+        kd = f'{kdtree_s * 1e3:.3f}' if kdtree_s is not None else '-'
+        print(f'{name:>14} {octree_s * 1e3:>10.3f} {brute:>10} {kd:>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Times running a tool once per group serially and with a pool of worker processes (pytower run -g --jobs N), and checks
+both give the same save.
+
+Usage: python benchmarks/bench_parallel_groups.py [--items N] [--groups N] [--jobs N [N ...]] [--tool PATH]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pytower import suitebro  # noqa: E402
+from pytower.parallel import run_per_group  # noqa: E402
+from pytower.selection import Selection  # noqa: E402
+from pytower.suitebro import Suitebro  # noqa: E402
+from pytower.tool_lib import import_tool_module, load_tool, ParameterDict  # noqa: E402
+from pytower.util import clone_json, not_none, xyz  # noqa: E402
+from synthetic import make_save_json  # noqa: E402
+
+_TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools')
+
+
+def _load_save(save_json) -> tuple[Suitebro, list[Selection]]:
+    # The save shares its dicts with the input data, so each run needs its own copy
+    save = Suitebro('bench', '.', clone_json(save_json))
+    suitebro._active_save = save
+    selection = Selection(save.objects)
+    groups = list(selection.group_map().values()) + [Selection({obj}) for obj in selection.ungrouped()]
+    return save, groups
+
+
+def _snapshot(save: Suitebro) -> dict:
+    # to_dict() orders (and renames) objects by Selection hash, so compare object by object instead
+    if save._transforms is not None:
+        save._transforms.sync()
+    return {obj.guid: (obj.item, obj.properties) for obj in save.objects}
+
+
+def _close(a, b) -> bool:
+    # Workers may batch the transform math differently, so allow for last-digit float differences
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_close(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(_close(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=200_000, help='Number of objects in the save')
+    parser.add_argument('--groups', type=int, default=2_000, help='Number of groups')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[2, 4, 8], help='Worker process counts to time')
+    parser.add_argument('--tool', type=str, default=os.path.join(_TOOLS_DIR, 'rotate.py'),
+                        help='Tool to run (defaults to rotate)')
+    args = parser.parse_args()
+
+    tool_path = os.path.abspath(args.tool)
+    _, meta = not_none(load_tool(tool_path))
+    module = import_tool_module(tool_path)
+    params = ParameterDict({'rotation': xyz(0.0, 0.0, 45.0), 'local': False, 'offset': xyz(10.0, 0.0, 0.0),
+                           'scale': 1.5, 'origin': False})
+    save_json = make_save_json(args.items, num_groups=args.groups)
+    print(f'{meta.tool_name}: {args.items} objects in {args.groups} groups')
+
+    save, groups = _load_save(save_json)
+    start = time.perf_counter()
+    for group in groups:
+        module.main(save, group, params)
+    print(f'{"serial":>10} {time.perf_counter() - start:8.3f} s')
+    expected = _snapshot(save)
+
+    for jobs in args.jobs:
+        save, groups = _load_save(save_json)
+        start = time.perf_counter()
+        run_per_group(save, module.__file__, groups, params, jobs)
+        elapsed = time.perf_counter() - start
+        status = 'ok' if _close(_snapshot(save), expected) else 'MISMATCH'
+        print(f'{f"jobs={jobs}":>10} {elapsed:8.3f} s  {status}')
+
+
+if __name__ == '__main__':
+    main()
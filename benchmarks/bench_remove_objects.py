@@ -0,0 +1,59 @@
+"""
+Times removing objects from a save one at a time (remove_object) and in bulk (remove_objects), against list.remove on
+a plain list of the same objects.
+
+Usage: python benchmarks/bench_remove_objects.py [--items N] [--remove N [N ...]] [--legacy-max N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pytower.suitebro import Suitebro  # noqa: E402
+from synthetic import make_save_json  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=300_000, help='Number of objects in the save')
+    parser.add_argument('--remove', type=int, nargs='+', default=[100, 1_000, 10_000],
+                        help='Number of objects to remove')
+    parser.add_argument('--legacy-max', type=int, default=1_000,
+                        help='Largest removal to time list.remove on')
+    args = parser.parse_args()
+
+    save_json = make_save_json(args.items)
+    print(f'{args.items} objects')
+    print(f'{"removed":>9} {"list s":>10} {"remove_object s":>16} {"remove_objects s":>17}')
+    for count in args.remove:
+        rng = random.Random(count)
+
+        save = Suitebro('bench', '.', save_json)
+        victims = rng.sample(list(save.objects), count)
+        start = time.perf_counter()
+        for obj in victims:
+            save.remove_object(obj)
+        single = time.perf_counter() - start
+
+        save = Suitebro('bench', '.', save_json)
+        victims = rng.sample(list(save.objects), count)
+        start = time.perf_counter()
+        save.remove_objects(victims)
+        bulk = time.perf_counter() - start
+
+        legacy = '-'
+        if count <= args.legacy_max:
+            objects = list(save.objects) + victims
+            start = time.perf_counter()
+            for obj in victims:
+                objects.remove(obj)
+            legacy = f'{time.perf_counter() - start:.3f}'
+
+        print(f'{count:>9} {legacy:>10} {single:>16.3f} {bulk:>17.3f}')
+
+
+if __name__ == '__main__':
+    main()
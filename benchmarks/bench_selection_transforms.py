@@ -0,0 +1,123 @@
+"""
+Measures the per-object cost of translating/rotating/scaling a selection: the legacy per-object loops that the
+Translate/Rotate/Scale tools used to run, the batched Selection methods, and the batched methods on objects bound to
+the save's columnar transform store.
+
+Usage: python benchmarks/bench_selection_transforms.py [--sizes N [N ...]] [--legacy-max N]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pytower.object import TowerObject  # noqa: E402
+from pytower.selection import Selection  # noqa: E402
+from pytower.transforms import TransformStore  # noqa: E402
+from pytower.util import xyz  # noqa: E402
+
+OFFSET = xyz(10.0, -5.0, 2.5)
+ROTATION = xyz(0.0, 0.0, 45.0)
+
+
+def make_objects(num: int, seed: int = 0) -> list[TowerObject]:
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(-10000, 10000, (num, 3))
+    quats = R.random(num, random_state=seed).as_quat()
+    objs = []
+    for i in range(num):
+        px, py, pz = positions[i]
+        qx, qy, qz, qw = quats[i]
+        item = {'name': 'CanvasWedge', 'guid': f'{i:08x}-0000-0000-0000-000000000000', 'properties': {},
+                'position': {'x': px, 'y': py, 'z': pz}, 'rotation': {'x': qx, 'y': qy, 'z': qz, 'w': qw},
+                'scale': {'x': 1.0, 'y': 1.0, 'z': 1.0}}
+        objs.append(TowerObject(item=item, properties=None, nocopy=True))
+    return objs
+
+
+# region legacy per-object implementations, as the tools used to run them
+def legacy_translate(sel: Selection):
+    for obj in sel:
+        obj.position += OFFSET
+
+
+def legacy_translate_local(sel: Selection):
+    std_basis = [xyz(1, 0, 0), xyz(0, 1, 0), xyz(0, 0, 1)]
+    for obj in sel:
+        r = R.from_quat(np.asarray(obj.rotation))
+        xlocal, ylocal, zlocal = [r.apply(np.asarray(basis_vec)) for basis_vec in std_basis]
+        obj.position += xyz(OFFSET[0] * xlocal + OFFSET[1] * ylocal + OFFSET[2] * zlocal)
+
+
+def legacy_rotate(sel: Selection):
+    r = R.from_euler('xyz', np.asarray(ROTATION), degrees=True)
+    centroid = sum([obj.position for obj in sel]) / len(sel)
+    for obj in sel:
+        obj.rotation = xyz((r * R.from_quat(np.asarray(obj.rotation))).as_quat())
+        obj.position -= centroid
+        obj.position = xyz(r.apply(np.asarray(obj.position)))
+        obj.position += centroid
+
+
+def legacy_scale(sel: Selection):
+    centroid = sum([obj.position for obj in sel]) / len(sel)
+    for obj in sel:
+        obj.position -= centroid
+    for obj in sel:
+        obj.position *= 2.0
+        obj.scale *= 2.0
+    for obj in sel:
+        obj.position += centroid
+# endregion
+
+
+OPERATIONS: dict[str, tuple[Callable[[Selection], None], Callable[[Selection], None]]] = {
+    'translate': (legacy_translate, lambda sel: sel.translate(OFFSET)),
+    'translate local': (legacy_translate_local, lambda sel: sel.translate(OFFSET, local=True)),
+    'rotate': (legacy_rotate, lambda sel: sel.rotate(ROTATION)),
+    'scale': (legacy_scale, lambda sel: sel.scale(2.0)),
+}
+
+
+def time_op(num: int, op: Callable[[Selection], None], columnar: bool) -> tuple[float, float]:
+    """Returns the per-object cost in microseconds of the operation itself and of syncing the store afterwards"""
+    objs = make_objects(num)
+    store = TransformStore(objs) if columnar else None
+    sel = Selection(objs)
+
+    start = time.perf_counter()
+    op(sel)
+    op_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if store is not None:
+        store.sync()
+    sync_time = time.perf_counter() - start
+    return op_time / num * 1e6, sync_time / num * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='Number of objects to transform')
+    parser.add_argument('--legacy-max', type=int, default=100_000,
+                        help='Largest size to run the (slow) legacy per-object loops on')
+    args = parser.parse_args()
+
+    print('Per-object cost in microseconds ("sync" writes the columnar store back into the item dictionaries)')
+    print(f'{"operation":>16} {"objects":>9} {"legacy":>9} {"batched":>9} {"columnar":>9} {"sync":>9}')
+    for num in args.sizes:
+        for name, (legacy, batched) in OPERATIONS.items():
+            legacy_cost = f'{time_op(num, legacy, False)[0]:.2f}' if num <= args.legacy_max else '-'
+            batched_cost, _ = time_op(num, batched, False)
+            columnar_cost, sync_cost = time_op(num, batched, True)
+            print(f'{name:>16} {num:>9} {legacy_cost:>9} {batched_cost:>9.2f} {columnar_cost:>9.2f} {sync_cost:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Compares JSON backends (stdlib json, orjson, msgspec) in compact and pretty mode on synthetic saves, reporting
+encode/decode throughput, output size and peak RSS. Each configuration runs in its own process so the RSS numbers
+do not bleed into each other.
+
+Usage: python benchmarks/bench_serializer.py [--items N [N ...]]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pytower import serializer  # noqa: E402
+from synthetic import make_save_json  # noqa: E402
+
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == 'darwin' else rss / (1 << 10)
+
+
+def worker(backend_name: str, pretty: bool, path: str):
+    backend = serializer.get_backend(backend_name)
+    with open(path, 'rb') as fd:
+        raw = fd.read()
+
+    start = time.perf_counter()
+    data = backend.loads(raw)
+    decode_time = time.perf_counter() - start
+    del raw
+
+    start = time.perf_counter()
+    encoded = backend.dumps(data, pretty=pretty)
+    encode_time = time.perf_counter() - start
+
+    print(json.dumps({'decode': decode_time, 'encode': encode_time, 'size': len(encoded), 'rss': peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, nargs='+', default=[50_000, 200_000],
+                        help='Number of objects in each synthetic save')
+    parser.add_argument('--worker', nargs=3, metavar=('BACKEND', 'PRETTY', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        backend_name, pretty, path = args.worker
+        worker(backend_name, pretty == '1', path)
+        return
+
+    print(f'Available backends: {", ".join(serializer.BACKENDS)} (default: {serializer.BACKEND.name})')
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_items in args.items:
+            path = os.path.join(tmp, f'save_{num_items}.json')
+            with open(path, 'wb') as fd:
+                serializer.get_backend('json').dump(make_save_json(num_items), fd)
+            input_mb = os.path.getsize(path) / 1e6
+
+            print(f'\n{num_items} items ({input_mb:.1f} MB compact)')
+            print(f'{"backend":>10} {"mode":>8} {"decode MB/s":>12} {"encode MB/s":>12} {"size MB":>9} {"peak RSS MB":>12}')
+            for backend_name in serializer.BACKENDS:
+                for pretty in (False, True):
+                    proc = subprocess.run([sys.executable, __file__, '--worker', backend_name, '1' if pretty else '0',
+                                           path], capture_output=True, text=True, check=True)
+                    result = json.loads(proc.stdout)
+                    rss = f'{result["rss"]:.0f}' if result['rss'] is not None else 'n/a'
+                    print(f'{backend_name:>10} {"pretty" if pretty else "compact":>8} '
+                          f'{input_mb / result["decode"]:>12.1f} {result["size"] / 1e6 / result["encode"]:>12.1f} '
+                          f'{result["size"] / 1e6:>9.1f} {rss:>12}')
+
+
+if __name__ == '__main__':
+    main()
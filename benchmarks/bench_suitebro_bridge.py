@@ -0,0 +1,68 @@
+"""
+Compares the temp-file and pipe modes of the tower-unite-suitebro bridge on a synthetic save
+
+Usage: python benchmarks/bench_suitebro_bridge.py [--items N] [--dir PATH]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pytower.codec import write_save  # noqa: E402
+from pytower.suitebro import (run_suitebro_parser, read_suitebro_pipe, write_suitebro_pipe,  # noqa: E402
+                              supports_suitebro_pipes)
+from synthetic import make_save_json  # noqa: E402
+
+
+def temp_file_round_trip(path: str, out_path: str):
+    json_path = path + '.json'
+    run_suitebro_parser(path, False, json_path, overwrite=True)
+    with open(json_path, 'r', encoding='utf-8') as fd:
+        save_json = json.load(fd)
+
+    out_json_path = out_path + '.json'
+    with open(out_json_path, 'w', encoding='utf-8') as fd:
+        json.dump(save_json, fd, indent=2)
+    run_suitebro_parser(out_json_path, True, out_path, overwrite=True)
+
+
+def pipe_round_trip(path: str, out_path: str):
+    save_json = read_suitebro_pipe(path)
+    write_suitebro_pipe(save_json, out_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=100_000, help='Number of items in the synthetic save')
+    parser.add_argument('--dir', type=str, default=None,
+                        help='Directory to place the save in (e.g. a network mount); defaults to a temp dir')
+    args = parser.parse_args()
+
+    if not supports_suitebro_pipes():
+        print('Pipe mode is not supported on this platform')
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        path = os.path.join(tmp, 'CondoData')
+        with open(path, 'wb') as fd:
+            fd.write(write_save(make_save_json(args.items)))
+        print(f'Synthetic save: {args.items} items, {os.path.getsize(path) / 1e6:.1f} MB')
+
+        results = {}
+        for name, fn in [('temp-file', temp_file_round_trip), ('pipe', pipe_round_trip)]:
+            out_path = os.path.join(tmp, f'CondoData_{name}')
+            start = time.perf_counter()
+            fn(path, out_path)
+            results[name] = time.perf_counter() - start
+
+        for name, elapsed in results.items():
+            print(f'{name:>10}: {elapsed:.2f}s')
+        print(f'speedup: {results["temp-file"] / results["pipe"]:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Times packing and baking the textures of a mesh into texture atlases, comparing the batched bake with the previous
+per-pixel loop on a sample of the triangles, and checks both give the same pixels. Also reports how many atlases
+(i.e. uploads) the packing needs, against the previous fixed layout of 100 triangles per 250x250 atlas.
+
+The reference mesh is a textured UV sphere, unless a model file is given with --mesh.
+
+Usage: python benchmarks/bench_texture_bake.py [--mesh PATH] [--resolution N] [--sample N] [--atlas-size N]
+                                               [--wedges-per-cell N]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import open3d as o3d
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pytower.mesh import AtlasConfig, TextureBakeCollection, TowerMesh, _triangle_cell_grid  # noqa: E402
+
+
+class _NoUploadBackend:
+    name = 'None'
+
+
+class _Wedge:
+    def __init__(self):
+        self.tiling = None
+
+    def set_property(self, _path: str, value: dict[str, float]):
+        self.tiling = value
+
+
+def _reference_mesh(resolution: int) -> TowerMesh:
+    mesh = o3d.geometry.TriangleMesh.create_sphere(radius=1.0, resolution=resolution, create_uv_map=True)
+
+    # Checkerboard with a gradient, so interpolation errors would show up
+    ys, xs = np.mgrid[0:512, 0:1024]
+    texture = np.zeros((512, 1024, 3), dtype=np.uint8)
+    texture[..., 0] = (xs // 32 + ys // 32) % 2 * 255
+    texture[..., 1] = xs * 255 // 1023
+    texture[..., 2] = ys * 255 // 511
+    mesh.textures = [o3d.geometry.Image(texture)]
+    mesh.triangle_material_ids = o3d.utility.IntVector(np.zeros(len(mesh.triangles), dtype=np.int32))
+    return TowerMesh(mesh)
+
+
+def _get_color(mesh: TowerMesh, uv: np.ndarray, material_id: int) -> np.ndarray:
+    # Scalar texture lookup the bake used before
+    texture = mesh.textures[material_id]
+    if texture is None:
+        return np.zeros(3)
+
+    height, width, _ = texture.shape
+    w_value = uv[0] * width
+    h_value = uv[1] * height
+    w_low, w_high = math.floor(w_value), math.ceil(w_value)
+    h_low, h_high = math.floor(h_value), math.ceil(h_value)
+    w_r = w_value - w_low
+    h_r = h_value - h_low
+
+    high = w_r * texture[h_high % height, w_high % width, :] + (1 - w_r) * texture[h_high % height, w_low % width, :]
+    low = w_r * texture[h_low % height, w_high % width, :] + (1 - w_r) * texture[h_low % height, w_low % width, :]
+    return (h_r * high + (1 - h_r) * low)[:3]
+
+
+def _loop_bake(mesh: TowerMesh, tri_id: int, uvs: np.ndarray, flipped: bool, triangle_size: int) -> np.ndarray:
+    # Per-pixel bake of one triangle cell, as TextureBake.add_triangle did before
+    mat_id = mesh.get_material_id(tri_id)
+    tri_bake = np.zeros((triangle_size, triangle_size, 3))
+    for y in range(triangle_size):
+        h = 1 - y / triangle_size
+        for x in range(triangle_size):
+            w = 1 - x / triangle_size
+            if h > 1 - w + 1.1 / triangle_size:
+                continue
+
+            w_uv = (1 - w) * uvs[0] + w * uvs[1]
+            h_uv = (1 - h) * w_uv + h * uvs[2]
+            col = _get_color(mesh, h_uv, mat_id)
+            if flipped:
+                tri_bake[y, x] = col
+            else:
+                tri_bake[y, triangle_size - x - 1] = col
+    return tri_bake
+
+
+def _owned_pixels(size: int, flipped: bool, rotated: bool) -> np.ndarray:
+    # Pixels of a cell only this triangle writes, as the two triangles of a cell share their diagonal
+    ys, xs, _, _ = _triangle_cell_grid(size)
+    covered = np.zeros((size, size), dtype=bool)
+    covered[ys, xs if flipped else size - xs - 1] = True
+    owned = covered & ~covered[::-1, ::-1]
+    return owned[::-1, ::-1] if rotated else owned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mesh', type=str, default=None, help='Model file to bake instead of the reference sphere')
+    parser.add_argument('--resolution', type=int, default=100, help='Resolution of the reference sphere')
+    parser.add_argument('--sample', type=int, default=200, help='Triangles to time the per-pixel loop on')
+    parser.add_argument('--atlas-size', type=int, default=4096, help='Largest atlas width and height')
+    parser.add_argument('--wedges-per-cell', type=int, default=1, help='Triangles packed per atlas cell')
+    args = parser.parse_args()
+
+    mesh = TowerMesh(o3d.io.read_triangle_mesh(args.mesh)) if args.mesh else _reference_mesh(args.resolution)
+    num_tris = len(mesh.tri_ids)
+    print(f'{num_tris} triangles, at most {args.atlas_size}x{args.atlas_size} per atlas, '
+          f'{args.wedges_per_cell} per cell')
+
+    # Size cells from the lengths of the two sides meeting at each triangle's first vertex
+    triangles = mesh.get_triangles()
+    legs = np.linalg.norm(triangles[:, 1:] - triangles[:, :1], axis=2)
+    uvs = mesh.triangle_uvs.reshape(-1, 3, 2)
+    flipped = np.arange(num_tris) % 2 == 1
+    wedges = [_Wedge() for _ in range(num_tris)]
+
+    bakes = TextureBakeCollection(_NoUploadBackend(), AtlasConfig(args.atlas_size, args.wedges_per_cell))
+    start = time.perf_counter()
+    bakes.add_wedges(mesh, np.arange(num_tris), uvs, wedges, flipped, legs)
+    bakes.pack()
+    batched = time.perf_counter() - start
+    print(f'{"batched":>10} {batched:8.3f} s  ({len(bakes.bakes)} atlases, previously {math.ceil(num_tris / 100)})')
+
+    atlases = {id(wedge): bake for bake in bakes.bakes for wedge in bake.objects}
+    sample = min(args.sample, num_tris)
+    mismatches = 0
+    start = time.perf_counter()
+    for tri_id in range(sample):
+        bake = atlases[id(wedges[tri_id])]
+        tiling = wedges[tri_id].tiling
+        size = round(abs(tiling['z']) * bake.width)
+        rotated = tiling['z'] < 0
+        x = round(tiling['x'] * bake.width) - (size if rotated else 0)
+        y = round(tiling['y'] * bake.height) - (size if rotated else 0)
+
+        cell = _loop_bake(mesh, tri_id, uvs[tri_id], bool(flipped[tri_id]), size).astype(np.uint8)
+        if rotated:
+            cell = cell[::-1, ::-1]
+        owned = _owned_pixels(size, bool(flipped[tri_id]), rotated)
+        mismatches += not np.array_equal(bake.image[y:y + size, x:x + size][owned], cell[owned])
+    loop = (time.perf_counter() - start) * num_tris / sample
+    status = 'ok' if mismatches == 0 else f'{mismatches} MISMATCHED'
+    print(f'{"loop":>10} {loop:8.3f} s  (extrapolated from {sample} triangles, {status})')
+    print(f'{"speedup":>10} {loop / batched:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Times building and refreshing the tools index over a directory of generated tool scripts: a cold build, a warm
+refresh with nothing changed, a warm refresh after editing one script, and the previous approach of a stat call per
+tool plus a full index rewrite on every run.
+
+Usage: python benchmarks/bench_tools_index.py [--tools N] [--repeat N]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pytower.tool_lib import ToolMetadata, ToolsIndex  # noqa: E402
+
+_TOOL_TEMPLATE = '''from pytower.tool_lib import ToolParameterInfo
+from pytower.util import xyz
+
+TOOL_NAME = 'Tool{idx}'
+VERSION = '1.0'
+AUTHOR = 'Benchmark'
+URL = 'https://example.com/tool{idx}.py'
+INFO = """Generated tool number {idx}"""
+PARAMETERS = {{'offset': ToolParameterInfo(dtype=xyz, description='Offset', default=xyz(0.0, 0.0, {idx}.0)),
+              'count': ToolParameterInfo(dtype=int, description='Count', default={idx})}}
+
+
+def main(save, selection, params):
+    pass
+'''
+
+
+def _write_tools(directory: str, num_tools: int):
+    for idx in range(num_tools):
+        with open(os.path.join(directory, f'tool{idx:04}.py'), 'w') as fd:
+            fd.write(_TOOL_TEMPLATE.format(idx=idx))
+
+
+def _refresh(index_path: str, directory: str) -> bool:
+    index = ToolsIndex.read(index_path, tools_path=directory)
+    index.refresh()
+    wrote = index.dirty
+    if wrote:
+        index.write(index_path)
+    return wrote
+
+
+def _legacy_refresh(index_path: str, directory: str):
+    # What every run did before: stat each indexed tool, list the directory again and always rewrite the index
+    with open(index_path, 'r') as fd:
+        tools = json.load(fd)['tools']
+    for tool_path, entry in tools.items():
+        if os.path.isfile(tool_path) and os.path.getmtime(tool_path) == entry['last_modified']:
+            ToolMetadata.from_dict(entry)
+    scripts = [os.path.normcase(os.path.join(directory, f)) for f in sorted(os.listdir(directory)) if f.endswith('.py')]
+    assert all(script in tools for script in scripts)
+    with open(index_path, 'w') as fd:
+        json.dump({'version': 2, 'directories': [], 'tools': tools}, fd, indent=2)
+
+
+def _time(label: str, fn, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    suffix = '' if result is None else f'  (index written: {result})'
+    print(f'{label:>24} {best * 1000:9.2f} ms{suffix}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tools', type=int, default=500, help='Number of tool scripts')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, the best is reported')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.normcase(os.path.join(tmp, 'tools'))
+        os.mkdir(directory)
+        _write_tools(directory, args.tools)
+        index_path = os.path.join(tmp, 'tools-index.json')
+        print(f'{args.tools} tool scripts')
+
+        def cold():
+            index = ToolsIndex(tools_path=directory)
+            index.refresh(trust_new=True)
+            index.write(index_path)
+
+        _time('cold build', cold, 1)
+        _time('warm, unchanged', lambda: _refresh(index_path, directory), args.repeat)
+
+        edited = os.path.join(directory, 'tool0000.py')
+
+        def warm_edited():
+            with open(edited, 'a') as fd:
+                fd.write('\n')
+            return _refresh(index_path, directory)
+
+        _time('warm, one edited', warm_edited, args.repeat)
+        _time('previous approach', lambda: _legacy_refresh(index_path, directory), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
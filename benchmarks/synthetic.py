@@ -0,0 +1,65 @@
+import copy
+import random
+from typing import Any
+
+_NULL_GUID = '00000000-0000-0000-0000-000000000000'
+
+# Property block of a CanvasWedge, the item most generated saves are made of
+WEDGE_PROPERTIES = {
+    'SurfaceMaterial': {'Object': {'value': '/Game/Materials/Lobby/Condo/SimpleColor_Inst.SimpleColor_Inst'}},
+    'SurfaceColorable': {'Struct': {'value': {'Struct': {'Color': {'Struct': {
+        'value': {'LinearColor': {'r': 1.0, 'g': 1.0, 'b': 1.0, 'a': 1.0}}, 'struct_type': 'LinearColor',
+        'struct_id': _NULL_GUID}}}}, 'struct_type': {'Struct': 'Colorable'}, 'struct_id': _NULL_GUID}},
+    'Tiling': {'Struct': {'value': {'Vector': {'x': 0.4000000059604645, 'y': 0.4000000059604645,
+                                               'z': 0.10000000149011612}},
+                          'struct_type': 'Vector', 'struct_id': _NULL_GUID}},
+    'OwningSteamID': {'Struct': {'value': {'Struct': {}}, 'struct_type': {'Struct': 'SteamID'},
+                                 'struct_id': _NULL_GUID}},
+}
+
+
+def make_save_json(num_items: int, num_groups: int = 0, seed: int = 0) -> dict[str, Any]:
+    """
+    Builds synthetic save data with the given number of CanvasWedge items, scattered randomly
+
+    Args:
+        num_items: Number of items to generate
+        num_groups: Number of groups to distribute the items between (0 leaves every item ungrouped)
+        seed: Random seed
+
+    Returns:
+        Save data in the tower-unite-suitebro JSON layout
+    """
+    rng = random.Random(seed)
+    items = []
+    properties = []
+    group_counts: dict[int, int] = {}
+    for i in range(num_items):
+        props = copy.deepcopy(WEDGE_PROPERTIES)
+        if num_groups > 0:
+            group_id = i % num_groups + 1
+            group_counts[group_id] = group_counts.get(group_id, 0) + 1
+            props['GroupID'] = {'Int': {'value': group_id}}
+
+        items.append({
+            'name': 'CanvasWedge',
+            'guid': f'{rng.getrandbits(32):08x}-{i >> 16 & 0xFFFF:04x}-{i & 0xFFFF:04x}-'
+                    f'{rng.getrandbits(16):04x}-{rng.getrandbits(48):012x}',
+            'steam_item_id': 0,
+            'format_version': 1,
+            'unreal_version': 517,
+            'properties': props,
+            'actors': [],
+            'rotation': {'x': 0.0, 'y': 0.0, 'z': 0.0, 'w': 1.0},
+            'position': {'x': rng.uniform(-10000, 10000), 'y': rng.uniform(-10000, 10000),
+                         'z': rng.uniform(0, 5000)},
+            'scale': {'x': 1.0, 'y': 1.0, 'z': 1.0},
+        })
+        properties.append({'name': f'CanvasWedge_C_{i}', 'properties': copy.deepcopy(props)})
+
+    return {
+        'header': {'format_version': 1, 'unreal_version': 517},
+        'items': items,
+        'properties': properties,
+        'groups': [{'group_id': gid, 'item_count': count} for gid, count in sorted(group_counts.items())],
+    }
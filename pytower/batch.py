@@ -0,0 +1,217 @@
+import glob
+import os
+import time
+from concurrent.futures import as_completed, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Any
+
+from .logging import *
+from .pipeline import PipelineStage
+from . import suitebro
+from .suitebro import pretty_path, read_save_data, save_suitebro, Suitebro
+from .tool_lib import import_tool_module, ParameterDict, ToolMetadata
+from .tower import run_stage
+
+# Tool modules already imported by this (worker) process, by script path
+_tool_modules: dict[str, ModuleType] = {}
+
+
+@dataclass
+class BatchJob:
+    """A save to run the tool chain on, and where to write the result"""
+    input_path: str
+    output_path: str
+    stages: list[tuple[PipelineStage, str, ToolMetadata, ParameterDict]]  # Stage, tool script path, metadata, params
+    only_json: bool = False
+    native: bool | None = None
+    write: bool = True
+
+
+@dataclass
+class BatchResult:
+    """Outcome and timings (in seconds) of one BatchJob"""
+    input_path: str
+    output_path: str | None = None
+    num_objects: int = 0
+    load_time: float = 0.0
+    tool_times: list[float] = field(default_factory=list)
+    save_time: float = 0.0
+    error: str | None = None
+
+    @property
+    def total_time(self) -> float:
+        return self.load_time + sum(self.tool_times) + self.save_time
+
+
+def expand_inputs(patterns: list[str], only_json: bool = False, skip_suffix: str | None = None) -> list[str]:
+    """
+    Expands glob patterns into the list of saves to process
+
+    Args:
+        patterns: Paths or glob patterns (** matches any number of directories)
+        only_json: Whether the saves are .json conversions, in which case the .json extension is dropped to match the
+            rest of the program
+        skip_suffix: (Optional) Skip files whose name ends with this, e.g. the outputs of a previous batch
+
+    Returns:
+        Matching paths, in pattern order and without duplicates
+    """
+    paths: dict[str, None] = {}
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            warning(f'No saves match {pattern}')
+
+        for path in matches:
+            # Skip .json sidecars sitting next to the saves
+            if os.path.isdir(path) or (not only_json and path.endswith('.json')):
+                continue
+            if only_json and path.endswith('.json'):
+                path = path[:-5]
+            if skip_suffix and path.endswith(skip_suffix):
+                continue
+            paths[path] = None
+
+    return list(paths)
+
+
+def output_path_for(input_path: str, suffix: str = '_output', output_dir: str | None = None) -> str:
+    """
+    Args:
+        input_path: Path of the input save
+        suffix: Suffix appended to the input file name
+        output_dir: (Optional) Directory to write to, defaults to the directory of the input
+
+    Returns:
+        Path to write the processed save to
+    """
+    directory = os.path.dirname(input_path) if output_dir is None else output_dir
+    return os.path.join(directory, os.path.basename(input_path) + suffix)
+
+
+def _tool_module(tool_path: str) -> ModuleType:
+    module = _tool_modules.get(tool_path)
+    if module is None:
+        module = _tool_modules[tool_path] = import_tool_module(tool_path)
+    return module
+
+
+def _read_save(job: BatchJob) -> tuple[dict[str, Any], float]:
+    start = time.perf_counter()
+    abs_filepath = os.path.realpath(job.input_path)
+    save_json = read_save_data(abs_filepath, abs_filepath + '.json', only_json=job.only_json, native=job.native)
+    return save_json, time.perf_counter() - start
+
+
+def run_job(job: BatchJob, prefetched: Future | None = None) -> BatchResult:
+    """
+    Loads a save, runs the tool chain on it and writes it back
+
+    Args:
+        job: Save and tool chain to run
+        prefetched: (Optional) Future of the save data already being read in the background
+
+    Returns:
+        Timings of each step, or the error that stopped the job
+    """
+    result = BatchResult(job.input_path)
+    try:
+        save_json, result.load_time = prefetched.result() if prefetched is not None else _read_save(job)
+
+        start = time.perf_counter()
+        abs_filepath = os.path.realpath(job.input_path)
+        save = Suitebro(os.path.basename(abs_filepath), os.path.dirname(abs_filepath), save_json)
+        suitebro._active_save = save
+        result.num_objects = len(save.objects)
+        result.load_time += time.perf_counter() - start
+
+        for stage, tool_path, meta, params in job.stages:
+            # Same stage runner as `pytower run`. The selection is redone by every stage, since earlier tools in the
+            # chain may have added or removed objects
+            start = time.perf_counter()
+            run_stage(save, stage, _tool_module(tool_path), meta, params, quiet=True)
+            result.tool_times.append(time.perf_counter() - start)
+
+        if job.write:
+            start = time.perf_counter()
+            save_suitebro(save, job.output_path, only_json=job.only_json, native=job.native)
+            result.save_time = time.perf_counter() - start
+            result.output_path = job.output_path
+    except (Exception, SystemExit) as e:
+        # Loaders exit on fatal conversion errors; in a batch that should only fail this save
+        result.error = str(e) or type(e).__name__
+
+    return result
+
+
+def _report(result: BatchResult):
+    name = pretty_path(result.input_path)
+    if result.error is not None:
+        error(f'{name}: failed ({result.error})')
+        return
+
+    tools = ' + '.join(f'{t:.2f}' for t in result.tool_times)
+    info(f'{name}: {result.num_objects} objects, load {result.load_time:.2f}s, tools {tools}s, '
+         f'save {result.save_time:.2f}s, total {result.total_time:.2f}s')
+
+
+def run_batch(jobs: list[BatchJob], workers: int) -> list[BatchResult]:
+    """
+    Runs jobs in a pool of worker processes, reporting each one as it finishes
+
+    Each worker converts, processes and writes one save at a time, so while one worker waits on a
+    tower-unite-suitebro conversion or on disk, the others keep processing theirs. With a single worker, the jobs run
+    in this process instead, reading the next save in a background thread while the tools run on the current one
+
+    Args:
+        jobs: Saves to process
+        workers: Number of worker processes
+
+    Returns:
+        Results, in the order of jobs
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        results = []
+        with ThreadPoolExecutor(max_workers=1) as reader:
+            prefetched = reader.submit(_read_save, jobs[0]) if jobs else None
+            for idx, job in enumerate(jobs):
+                current = prefetched
+                prefetched = reader.submit(_read_save, jobs[idx + 1]) if idx + 1 < len(jobs) else None
+                results.append(run_job(job, current))
+                _report(results[-1])
+        return results
+
+    results_by_idx: dict[int, BatchResult] = {}
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        futures = {pool.submit(run_job, job): idx for idx, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            result = future.result()
+            results_by_idx[futures[future]] = result
+            _report(result)
+
+    return [results_by_idx[idx] for idx in range(len(jobs))]
+
+
+def summarize(results: list[BatchResult], wall_time: float) -> dict[str, Any]:
+    """
+    Args:
+        results: Results of a batch run
+        wall_time: Elapsed time of the whole batch, in seconds
+
+    Returns:
+        Aggregate statistics: file, object and failure counts, summed step times and throughput
+    """
+    done = [result for result in results if result.error is None]
+    busy_time = sum(result.total_time for result in done)
+    return {
+        'files': len(results),
+        'failed': len(results) - len(done),
+        'objects': sum(result.num_objects for result in done),
+        'load_time': sum(result.load_time for result in done),
+        'tool_time': sum(sum(result.tool_times) for result in done),
+        'save_time': sum(result.save_time for result in done),
+        'busy_time': busy_time,
+        'wall_time': wall_time,
+        'speedup': busy_time / wall_time if wall_time > 0 else 0.0,
+    }
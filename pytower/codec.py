@@ -0,0 +1,735 @@
+import struct
+from typing import Any
+
+SAVE_MAGIC = b'suitebro'
+ITEM_MAGIC = b'tinyrick'
+
+_U8 = struct.Struct('<B')
+_I8 = struct.Struct('<b')
+_I16 = struct.Struct('<h')
+_U16 = struct.Struct('<H')
+_I32 = struct.Struct('<i')
+_U32 = struct.Struct('<I')
+_I64 = struct.Struct('<q')
+_U64 = struct.Struct('<Q')
+_F32 = struct.Struct('<f')
+_F64 = struct.Struct('<d')
+_GUID = struct.Struct('<4I')
+_VEC2 = struct.Struct('<2f')
+_VEC3 = struct.Struct('<3f')
+_VEC4 = struct.Struct('<4f')
+_BOX = struct.Struct('<6f')
+_INT2 = struct.Struct('<2i')
+_INT3 = struct.Struct('<3i')
+_COLOR = struct.Struct('<4B')
+_TRANSFORM = struct.Struct('<10f')
+
+# Scalar properties whose tag carries no extra header, keyed by property type, mapping to the json name and the packer
+_SCALARS: dict[str, tuple[str, struct.Struct]] = {
+    'Int8Property': ('Int8', _I8),
+    'Int16Property': ('Int16', _I16),
+    'IntProperty': ('Int', _I32),
+    'Int64Property': ('Int64', _I64),
+    'UInt8Property': ('UInt8', _U8),
+    'UInt16Property': ('UInt16', _U16),
+    'UInt32Property': ('UInt32', _U32),
+    'UInt64Property': ('UInt64', _U64),
+    'FloatProperty': ('Float', _F32),
+    'DoubleProperty': ('Double', _F64),
+}
+
+# Properties whose value is a single FString
+_STRINGS: dict[str, str] = {
+    'StrProperty': 'Str',
+    'NameProperty': 'Name',
+    'ObjectProperty': 'Object',
+}
+
+_JSON_NAMES = {prop_type: json_name for prop_type, (json_name, _) in _SCALARS.items()}
+_JSON_NAMES.update(_STRINGS)
+_JSON_NAMES.update({'BoolProperty': 'Bool', 'EnumProperty': 'Enum'})
+
+_JSON_TO_TYPE = {json_name: prop_type for prop_type, (json_name, _) in _SCALARS.items()}
+_JSON_TO_TYPE.update({json_name: prop_type for prop_type, json_name in _STRINGS.items()})
+_JSON_TO_TYPE.update({'Bool': 'BoolProperty', 'Byte': 'ByteProperty', 'Enum': 'EnumProperty',
+                      'SoftObject': 'SoftObjectProperty', 'Struct': 'StructProperty', 'Array': 'ArrayProperty',
+                      'Set': 'SetProperty', 'Map': 'MapProperty'})
+
+# Struct types that tower-unite-suitebro serializes natively instead of as a tagged property list
+_NATIVE_STRUCTS = frozenset(['Guid', 'DateTime', 'Timespan', 'Vector2D', 'Vector', 'IntVector', 'Box', 'IntPoint',
+                             'Quat', 'Rotator', 'LinearColor', 'Color', 'SoftObjectPath', 'GameplayTagContainer',
+                             'WorkshopFile'])
+
+
+class UnsupportedFormatError(ValueError):
+    """Raised when the native codec encounters save data it cannot represent. Callers should fall back to the
+    tower-unite-suitebro converter when this happens."""
+    pass
+
+
+def _format_guid(a: int, b: int, c: int, d: int) -> str:
+    return f'{a:08x}-{b >> 16:04x}-{b & 0xFFFF:04x}-{c >> 16:04x}-{c & 0xFFFF:04x}{d:08x}'
+
+
+def _parse_guid(guid: str) -> tuple[int, int, int, int]:
+    h = guid.replace('-', '')
+    if len(h) != 32:
+        raise UnsupportedFormatError(f'Invalid GUID: {guid}')
+    return int(h[0:8], 16), int(h[8:16], 16), int(h[16:24], 16), int(h[24:32], 16)
+
+
+class _Reader:
+    def __init__(self, buf: bytes | bytearray | memoryview):
+        self.buf = bytes(buf)
+        self.pos = 0
+
+    def _unpack(self, packer: struct.Struct) -> tuple:
+        values = packer.unpack_from(self.buf, self.pos)
+        self.pos += packer.size
+        return values
+
+    def u8(self) -> int:
+        value = self.buf[self.pos]
+        self.pos += 1
+        return value
+
+    def u32(self) -> int:
+        value, = _U32.unpack_from(self.buf, self.pos)
+        self.pos += 4
+        return value
+
+    def u64(self) -> int:
+        value, = _U64.unpack_from(self.buf, self.pos)
+        self.pos += 8
+        return value
+
+    def scalar(self, packer: struct.Struct) -> Any:
+        value, = packer.unpack_from(self.buf, self.pos)
+        self.pos += packer.size
+        return value
+
+    def fstring(self) -> str:
+        length, = _I32.unpack_from(self.buf, self.pos)
+        self.pos += 4
+        if length == 0:
+            return ''
+
+        if length > 0:
+            end = self.pos + length
+            value = self.buf[self.pos:end - 1].decode('utf-8')
+        else:
+            end = self.pos - 2 * length
+            value = self.buf[self.pos:end - 2].decode('utf-16-le')
+
+        self.pos = end
+        return value
+
+    def guid(self) -> str:
+        a, b, c, d = _GUID.unpack_from(self.buf, self.pos)
+        self.pos += 16
+        return _format_guid(a, b, c, d)
+
+    def optional_guid(self) -> str | None:
+        if self.u8():
+            return self.guid()
+        return None
+
+    def expect(self, magic: bytes):
+        end = self.pos + len(magic)
+        if self.buf[self.pos:end] != magic:
+            raise UnsupportedFormatError(f'Expected {magic!r} at offset {self.pos:#x}')
+        self.pos = end
+
+
+class _Writer:
+    def __init__(self):
+        self.buf = bytearray()
+
+    def pack(self, packer: struct.Struct, *values: Any):
+        self.buf += packer.pack(*values)
+
+    def u8(self, value: int):
+        self.buf.append(value)
+
+    def u32(self, value: int):
+        self.buf += _U32.pack(value)
+
+    def fstring(self, value: str):
+        if not value:
+            self.buf += b'\x00\x00\x00\x00'
+        elif value.isascii():
+            self.buf += _I32.pack(len(value) + 1)
+            self.buf += value.encode('ascii')
+            self.buf.append(0)
+        else:
+            encoded = value.encode('utf-16-le')
+            self.buf += _I32.pack(-(len(encoded) // 2 + 1))
+            self.buf += encoded
+            self.buf += b'\x00\x00'
+
+    def guid(self, value: str):
+        self.buf += _GUID.pack(*_parse_guid(value))
+
+    def optional_guid(self, value: str | None):
+        if value is None:
+            self.buf.append(0)
+        else:
+            self.buf.append(1)
+            self.guid(value)
+
+    def reserve_u32(self) -> int:
+        offset = len(self.buf)
+        self.buf += b'\x00\x00\x00\x00'
+        return offset
+
+    def patch_size(self, offset: int):
+        """Writes the number of bytes written since the u32 placeholder at offset into that placeholder"""
+        _U32.pack_into(self.buf, offset, len(self.buf) - offset - 4)
+
+
+# region reading
+
+def _read_struct_value(r: _Reader, struct_type: str) -> dict[str, Any]:
+    match struct_type:
+        case 'Vector':
+            x, y, z = r._unpack(_VEC3)
+            return {'Vector': {'x': x, 'y': y, 'z': z}}
+        case 'Rotator':
+            x, y, z = r._unpack(_VEC3)
+            return {'Rotator': {'x': x, 'y': y, 'z': z}}
+        case 'Quat':
+            x, y, z, w = r._unpack(_VEC4)
+            return {'Quat': {'x': x, 'y': y, 'z': z, 'w': w}}
+        case 'LinearColor':
+            cr, cg, cb, ca = r._unpack(_VEC4)
+            return {'LinearColor': {'r': cr, 'g': cg, 'b': cb, 'a': ca}}
+        case 'Color':
+            cr, cg, cb, ca = r._unpack(_COLOR)
+            return {'Color': {'r': cr, 'g': cg, 'b': cb, 'a': ca}}
+        case 'Guid':
+            return {'Guid': r.guid()}
+        case 'DateTime':
+            return {'DateTime': r.scalar(_U64)}
+        case 'Timespan':
+            return {'Timespan': r.scalar(_I64)}
+        case 'Vector2D':
+            x, y = r._unpack(_VEC2)
+            return {'Vector2D': {'x': x, 'y': y}}
+        case 'IntVector':
+            x, y, z = r._unpack(_INT3)
+            return {'IntVector': {'x': x, 'y': y, 'z': z}}
+        case 'IntPoint':
+            x, y = r._unpack(_INT2)
+            return {'IntPoint': {'x': x, 'y': y}}
+        case 'Box':
+            ax, ay, az, bx, by, bz = r._unpack(_BOX)
+            return {'Box': {'a': {'x': ax, 'y': ay, 'z': az}, 'b': {'x': bx, 'y': by, 'z': bz}}}
+        case 'SoftObjectPath':
+            return {'SoftObjectPath': [r.fstring(), r.fstring()]}
+        case 'GameplayTagContainer':
+            count = r.u32()
+            return {'GameplayTagContainer': {'gameplay_tags': [{'name': r.fstring()} for _ in range(count)]}}
+        case 'WorkshopFile':
+            return {'WorkshopFile': r.u64()}
+        case _:
+            return {'Struct': _read_properties(r)}
+
+
+def _struct_type_json(struct_type: str) -> str | dict[str, str]:
+    return struct_type if struct_type in _NATIVE_STRUCTS else {'Struct': struct_type}
+
+
+def _read_base_array(r: _Reader, array_type: str, count: int) -> dict[str, Any]:
+    if array_type in _SCALARS:
+        json_name, packer = _SCALARS[array_type]
+        values = list(struct.unpack_from(f'<{count}{packer.format[-1]}', r.buf, r.pos))
+        r.pos += count * packer.size
+        return {json_name: values}
+    elif array_type in _STRINGS:
+        return {_STRINGS[array_type]: [r.fstring() for _ in range(count)]}
+
+    match array_type:
+        case 'BoolProperty':
+            values = [b != 0 for b in r.buf[r.pos:r.pos + count]]
+            r.pos += count
+            return {'Bool': values}
+        case 'ByteProperty':
+            values = list(r.buf[r.pos:r.pos + count])
+            r.pos += count
+            return {'Byte': {'Byte': values}}
+        case 'EnumProperty':
+            return {'Enum': [r.fstring() for _ in range(count)]}
+        case 'SoftObjectProperty':
+            return {'SoftObject': [[r.fstring(), r.fstring()] for _ in range(count)]}
+        case _:
+            raise UnsupportedFormatError(f'Unsupported array type {array_type}')
+
+
+def _read_map_value(r: _Reader, prop_type: str) -> dict[str, Any]:
+    if prop_type in _SCALARS:
+        json_name, packer = _SCALARS[prop_type]
+        return {json_name: r.scalar(packer)}
+    elif prop_type in _STRINGS:
+        return {_STRINGS[prop_type]: r.fstring()}
+    elif prop_type == 'BoolProperty':
+        return {'Bool': r.u8() != 0}
+    elif prop_type == 'EnumProperty':
+        return {'Enum': r.fstring()}
+
+    # Struct keys/values need type hints that are not present in the save itself
+    raise UnsupportedFormatError(f'Unsupported map/set element type {prop_type}')
+
+
+def _read_property(r: _Reader, prop_type: str) -> dict[str, Any]:
+    if prop_type in _SCALARS:
+        json_name, packer = _SCALARS[prop_type]
+        pid = r.optional_guid()
+        data = {'value': r.scalar(packer)}
+        return {json_name: data if pid is None else {'id': pid, **data}}
+    elif prop_type in _STRINGS:
+        pid = r.optional_guid()
+        data = {'value': r.fstring()}
+        return {_STRINGS[prop_type]: data if pid is None else {'id': pid, **data}}
+
+    match prop_type:
+        case 'BoolProperty':
+            value = r.u8() != 0
+            pid = r.optional_guid()
+            data = {'value': value}
+            return {'Bool': data if pid is None else {'id': pid, **data}}
+        case 'ByteProperty':
+            enum_type = r.fstring()
+            pid = r.optional_guid()
+            value = {'Byte': r.u8()} if enum_type == 'None' else {'Label': r.fstring()}
+            data = {'value': value, 'enum_type': enum_type}
+            return {'Byte': data if pid is None else {'id': pid, **data}}
+        case 'EnumProperty':
+            enum_type = r.fstring()
+            pid = r.optional_guid()
+            data = {'value': r.fstring(), 'enum_type': enum_type}
+            return {'Enum': data if pid is None else {'id': pid, **data}}
+        case 'SoftObjectProperty':
+            pid = r.optional_guid()
+            data = {'value': r.fstring(), 'value2': r.fstring()}
+            return {'SoftObject': data if pid is None else {'id': pid, **data}}
+        case 'StructProperty':
+            struct_type = r.fstring()
+            struct_id = r.guid()
+            pid = r.optional_guid()
+            data = {'value': _read_struct_value(r, struct_type), 'struct_type': _struct_type_json(struct_type),
+                    'struct_id': struct_id}
+            return {'Struct': data if pid is None else {'id': pid, **data}}
+        case 'ArrayProperty':
+            array_type = r.fstring()
+            pid = r.optional_guid()
+            count = r.u32()
+            if array_type == 'StructProperty':
+                inner_name = r.fstring()
+                inner_type = r.fstring()
+                r.u64()  # Size and array index of the inner tag, recomputed on write
+                struct_type = r.fstring()
+                struct_id = r.guid()
+                r.u8()
+                values = [_read_struct_value(r, struct_type) for _ in range(count)]
+                value = {'Struct': {'_type': inner_name, 'name': inner_type,
+                                    'struct_type': _struct_type_json(struct_type), 'id': struct_id,
+                                    'value': values}}
+            else:
+                value = {'Base': _read_base_array(r, array_type, count)}
+
+            data: dict[str, Any] = {'array_type': array_type}
+            if pid is not None:
+                data['id'] = pid
+            data['value'] = value
+            return {'Array': data}
+        case 'SetProperty':
+            set_type = r.fstring()
+            pid = r.optional_guid()
+            if r.u32() != 0:
+                raise UnsupportedFormatError('Unsupported set with removed entries')
+            count = r.u32()
+            elements = [_read_map_value(r, set_type) for _ in range(count)]
+            json_name = _JSON_NAMES[set_type]
+            data = {'set_type': set_type, 'value': {'Base': {json_name: [e[json_name] for e in elements]}}}
+            return {'Set': data if pid is None else {'id': pid, **data}}
+        case 'MapProperty':
+            key_type = r.fstring()
+            value_type = r.fstring()
+            pid = r.optional_guid()
+            if r.u32() != 0:
+                raise UnsupportedFormatError('Unsupported map with removed entries')
+            count = r.u32()
+            entries = [{'key': _read_map_value(r, key_type), 'value': _read_map_value(r, value_type)}
+                       for _ in range(count)]
+            data = {'key_type': key_type, 'value_type': value_type, 'value': entries}
+            return {'Map': data if pid is None else {'id': pid, **data}}
+        case _:
+            raise UnsupportedFormatError(f'Unsupported property type {prop_type}')
+
+
+def _read_properties(r: _Reader) -> dict[str, Any]:
+    props: dict[str, Any] = {}
+    while True:
+        name = r.fstring()
+        if name == 'None':
+            return props
+
+        prop_type = r.fstring()
+        r.u32()  # Payload size, recomputed on write
+        if r.u32() != 0:
+            raise UnsupportedFormatError(f'Unsupported static array property {name}')
+
+        props[name] = _read_property(r, prop_type)
+
+
+def _read_actor(r: _Reader) -> dict[str, Any]:
+    actor = {'name': r.fstring(), 'properties': _read_properties(r)}
+    r.u32()
+    return actor
+
+
+def _read_item(r: _Reader) -> dict[str, Any]:
+    item: dict[str, Any] = {'name': r.fstring(), 'guid': r.guid()}
+    has_state = r.u32()
+    item['steam_item_id'] = r.u64()
+
+    if has_state:
+        size = r.u32()
+        end = r.pos + size
+        r.expect(ITEM_MAGIC)
+        item['format_version'] = r.u32()
+        item['unreal_version'] = r.u32()
+        item['properties'] = _read_properties(r)
+        r.u32()
+        item['actors'] = [_read_actor(r) for _ in range(r.u32())]
+        if r.pos != end:
+            raise UnsupportedFormatError(f'Item {item["name"]} has unexpected trailing data')
+
+    qx, qy, qz, qw, px, py, pz, sx, sy, sz = r._unpack(_TRANSFORM)
+    item['rotation'] = {'x': qx, 'y': qy, 'z': qz, 'w': qw}
+    item['position'] = {'x': px, 'y': py, 'z': pz}
+    item['scale'] = {'x': sx, 'y': sy, 'z': sz}
+    return item
+
+
+def read_save(buf: bytes | bytearray | memoryview) -> dict[str, Any]:
+    """
+    Decodes a CondoData/.map file into the same dictionary produced by tower-unite-suitebro's to-json
+
+    Args:
+        buf: Raw bytes of the save file
+
+    Returns:
+        Parsed save data, ready to be passed into Suitebro
+
+    Raises:
+        UnsupportedFormatError: If the save contains data the native codec cannot decode
+    """
+    r = _Reader(buf)
+    try:
+        r.expect(SAVE_MAGIC)
+        format_version = r.u32()
+        unreal_version = r.u32()
+
+        items = [_read_item(r) for _ in range(r.u32())]
+
+        properties = []
+        for _ in range(r.u32()):
+            name = r.fstring()
+            r.u32()
+            properties.append({'name': name, 'properties': _read_properties(r)})
+            r.u32()
+
+        r.u32()
+        groups = []
+        for _ in range(r.u32()):
+            item_count = r.u32()
+            group_id = r.scalar(_I32)
+            groups.append({'group_id': group_id, 'item_count': item_count})
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise UnsupportedFormatError(f'Failed to decode save at offset {r.pos:#x}: {e}')
+
+    return {'header': {'format_version': format_version, 'unreal_version': unreal_version}, 'items': items,
+            'properties': properties, 'groups': groups}
+
+# endregion
+
+# region writing
+
+
+def _write_struct_value(w: _Writer, struct_type: str, value: dict[str, Any]):
+    kind, data = next(iter(value.items()))
+    match kind:
+        case 'Vector' | 'Rotator':
+            w.pack(_VEC3, data['x'], data['y'], data['z'])
+        case 'Quat':
+            w.pack(_VEC4, data['x'], data['y'], data['z'], data['w'])
+        case 'LinearColor':
+            w.pack(_VEC4, data['r'], data['g'], data['b'], data['a'])
+        case 'Color':
+            w.pack(_COLOR, data['r'], data['g'], data['b'], data['a'])
+        case 'Guid':
+            w.guid(data)
+        case 'DateTime':
+            w.pack(_U64, data)
+        case 'Timespan':
+            w.pack(_I64, data)
+        case 'Vector2D':
+            w.pack(_VEC2, data['x'], data['y'])
+        case 'IntVector':
+            w.pack(_INT3, data['x'], data['y'], data['z'])
+        case 'IntPoint':
+            w.pack(_INT2, data['x'], data['y'])
+        case 'Box':
+            a, b = data['a'], data['b']
+            w.pack(_BOX, a['x'], a['y'], a['z'], b['x'], b['y'], b['z'])
+        case 'SoftObjectPath':
+            w.fstring(data[0])
+            w.fstring(data[1])
+        case 'GameplayTagContainer':
+            tags = data['gameplay_tags']
+            w.u32(len(tags))
+            for tag in tags:
+                w.fstring(tag['name'])
+        case 'WorkshopFile':
+            w.pack(_U64, data)
+        case 'Struct':
+            _write_properties(w, data)
+        case _:
+            raise UnsupportedFormatError(f'Unsupported struct value {kind} for {struct_type}')
+
+
+def _struct_type_name(struct_type: str | dict[str, str]) -> str:
+    return struct_type if isinstance(struct_type, str) else struct_type['Struct']
+
+
+def _write_base_array(w: _Writer, array_type: str, value: dict[str, Any]):
+    kind, values = next(iter(value.items()))
+    if array_type in _SCALARS:
+        _, packer = _SCALARS[array_type]
+        w.u32(len(values))
+        w.buf += struct.pack(f'<{len(values)}{packer.format[-1]}', *values)
+        return
+    elif array_type in _STRINGS or array_type == 'EnumProperty':
+        w.u32(len(values))
+        for s in values:
+            w.fstring(s)
+        return
+
+    match array_type:
+        case 'BoolProperty':
+            w.u32(len(values))
+            w.buf += bytes(1 if b else 0 for b in values)
+        case 'ByteProperty':
+            if 'Byte' not in values:
+                raise UnsupportedFormatError('Unsupported labelled byte array')
+            data = values['Byte']
+            w.u32(len(data))
+            w.buf += bytes(data)
+        case 'SoftObjectProperty':
+            w.u32(len(values))
+            for a, b in values:
+                w.fstring(a)
+                w.fstring(b)
+        case _:
+            raise UnsupportedFormatError(f'Unsupported array type {array_type}')
+
+
+def _write_map_value(w: _Writer, prop_type: str, value: dict[str, Any]):
+    data = next(iter(value.values()))
+    if prop_type in _SCALARS:
+        w.pack(_SCALARS[prop_type][1], data)
+    elif prop_type in _STRINGS or prop_type == 'EnumProperty':
+        w.fstring(data)
+    elif prop_type == 'BoolProperty':
+        w.u8(1 if data else 0)
+    elif prop_type == 'StructProperty':
+        _write_struct_value(w, prop_type, data)
+    else:
+        raise UnsupportedFormatError(f'Unsupported map/set element type {prop_type}')
+
+
+def _write_property(w: _Writer, name: str, prop: dict[str, Any]):
+    kind, data = next(iter(prop.items()))
+    prop_type = _JSON_TO_TYPE.get(kind)
+    if prop_type is None:
+        raise UnsupportedFormatError(f'Unsupported property type {kind}')
+
+    w.fstring(name)
+    w.fstring(prop_type)
+    size_offset = w.reserve_u32()
+    w.buf += b'\x00\x00\x00\x00'
+    pid = data.get('id')
+
+    if prop_type in _SCALARS:
+        w.optional_guid(pid)
+        start = len(w.buf)
+        w.pack(_SCALARS[prop_type][1], data['value'])
+    elif prop_type in _STRINGS:
+        w.optional_guid(pid)
+        start = len(w.buf)
+        w.fstring(data['value'])
+    else:
+        match prop_type:
+            case 'BoolProperty':
+                w.u8(1 if data['value'] else 0)
+                w.optional_guid(pid)
+                start = len(w.buf)
+            case 'ByteProperty':
+                w.fstring(data['enum_type'])
+                w.optional_guid(pid)
+                start = len(w.buf)
+                value = data['value']
+                if 'Byte' in value:
+                    w.u8(value['Byte'])
+                else:
+                    w.fstring(value['Label'])
+            case 'EnumProperty':
+                w.fstring(data['enum_type'])
+                w.optional_guid(pid)
+                start = len(w.buf)
+                w.fstring(data['value'])
+            case 'SoftObjectProperty':
+                w.optional_guid(pid)
+                start = len(w.buf)
+                w.fstring(data['value'])
+                w.fstring(data['value2'])
+            case 'StructProperty':
+                struct_type = _struct_type_name(data['struct_type'])
+                w.fstring(struct_type)
+                w.guid(data['struct_id'])
+                w.optional_guid(pid)
+                start = len(w.buf)
+                _write_struct_value(w, struct_type, data['value'])
+            case 'ArrayProperty':
+                array_type = data['array_type']
+                w.fstring(array_type)
+                w.optional_guid(pid)
+                start = len(w.buf)
+                value = data['value']
+                if 'Struct' in value:
+                    inner = value['Struct']
+                    struct_type = _struct_type_name(inner['struct_type'])
+                    values = inner['value']
+                    w.u32(len(values))
+                    w.fstring(inner['_type'])
+                    w.fstring(inner['name'])
+                    inner_size_offset = w.reserve_u32()
+                    w.buf += b'\x00\x00\x00\x00'
+                    w.fstring(struct_type)
+                    w.guid(inner['id'])
+                    w.u8(0)
+                    inner_start = len(w.buf)
+                    for element in values:
+                        _write_struct_value(w, struct_type, element)
+                    _U32.pack_into(w.buf, inner_size_offset, len(w.buf) - inner_start)
+                else:
+                    _write_base_array(w, array_type, value['Base'])
+            case 'SetProperty':
+                set_type = data['set_type']
+                w.fstring(set_type)
+                w.optional_guid(pid)
+                start = len(w.buf)
+                values = next(iter(data['value']['Base'].values()))
+                w.u32(0)
+                w.u32(len(values))
+                for element in values:
+                    _write_map_value(w, set_type, {set_type: element})
+            case 'MapProperty':
+                key_type = data['key_type']
+                value_type = data['value_type']
+                w.fstring(key_type)
+                w.fstring(value_type)
+                w.optional_guid(pid)
+                start = len(w.buf)
+                entries = data['value']
+                w.u32(0)
+                w.u32(len(entries))
+                for entry in entries:
+                    _write_map_value(w, key_type, entry['key'])
+                    _write_map_value(w, value_type, entry['value'])
+            case _:
+                raise UnsupportedFormatError(f'Unsupported property type {prop_type}')
+
+    _U32.pack_into(w.buf, size_offset, len(w.buf) - start)
+
+
+def _write_properties(w: _Writer, props: dict[str, Any]):
+    for name, prop in props.items():
+        _write_property(w, name, prop)
+    w.fstring('None')
+
+
+def _write_item(w: _Writer, item: dict[str, Any]):
+    w.fstring(item['name'])
+    w.guid(item['guid'])
+    has_state = 'format_version' in item
+    w.u32(1 if has_state else 0)
+    w.pack(_U64, item['steam_item_id'])
+
+    if has_state:
+        size_offset = w.reserve_u32()
+        w.buf += ITEM_MAGIC
+        w.u32(item['format_version'])
+        w.u32(item['unreal_version'])
+        _write_properties(w, item['properties'])
+        w.u32(0)
+        actors = item['actors']
+        w.u32(len(actors))
+        for actor in actors:
+            w.fstring(actor['name'])
+            _write_properties(w, actor['properties'])
+            w.u32(0)
+        w.patch_size(size_offset)
+
+    rot, pos, scale = item['rotation'], item['position'], item['scale']
+    w.pack(_TRANSFORM, rot['x'], rot['y'], rot['z'], rot['w'], pos['x'], pos['y'], pos['z'],
+           scale['x'], scale['y'], scale['z'])
+
+
+def write_save(data: dict[str, Any]) -> bytes:
+    """
+    Encodes save data in the tower-unite-suitebro json layout back into a CondoData/.map file
+
+    Args:
+        data: Save data, such as the output of Suitebro.to_dict()
+
+    Returns:
+        Raw bytes of the save file
+
+    Raises:
+        UnsupportedFormatError: If the save data contains values the native codec cannot encode
+    """
+    w = _Writer()
+    try:
+        w.buf += SAVE_MAGIC
+        header = data['header']
+        w.u32(header['format_version'])
+        w.u32(header['unreal_version'])
+
+        items = data['items']
+        w.u32(len(items))
+        for item in items:
+            _write_item(w, item)
+
+        properties = data['properties']
+        w.u32(len(properties))
+        for prop in properties:
+            w.fstring(prop['name'])
+            size_offset = w.reserve_u32()
+            _write_properties(w, prop['properties'])
+            w.u32(0)
+            w.patch_size(size_offset)
+
+        groups = data['groups']
+        w.u32(1)
+        w.u32(len(groups))
+        for group in groups:
+            w.u32(group['item_count'])
+            w.pack(_I32, group['group_id'])
+    except (struct.error, KeyError, TypeError, AttributeError, StopIteration) as e:
+        raise UnsupportedFormatError(f'Failed to encode save: {e!r}')
+
+    return bytes(w.buf)
+
+# endregion
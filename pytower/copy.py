@@ -1,24 +1,279 @@
-import json
-from typing import Any, Mapping
+import os
+import re
+from typing import Any, Container, Iterable, Mapping
+
+import numpy as np
 
 from .object import TowerObject
-from .selection import Selection
-from .util import not_none
+from .selection import Selection, _gather, _scatter
+from .util import gc_paused, not_none
 from .suitebro import get_active_save
 
+# Dashed form (as stored in item['guid'] and connections) or fitem form (no dashes, uppercase)
+_GUID_PATTERN = re.compile(r'[\da-fA-F]{8}-[\da-fA-F]{4}-[\da-fA-F]{4}-[\da-fA-F]{4}-[\da-fA-F]{12}|[\da-fA-F]{32}')
+_MIN_GUID_LENGTH = 32
+
+
+def _replace_str(value: str, replacement_table: dict[str, str]) -> str:
+    replacement = replacement_table.get(value)
+    if replacement is not None:
+        return replacement
+
+    # GUIDs can also be embedded inside a longer string
+    return _GUID_PATTERN.sub(lambda match: replacement_table.get(match[0], match[0]), value)
+
+
+def _replace_list(data: list[Any], replacement_table: dict[str, str]) -> list[Any]:
+    return [_replace_tree(v, replacement_table) for v in data]
+
+
+def _replace_dict(data: dict[str, Any], replacement_table: dict[str, str]) -> dict[str, Any]:
+    # Hot loop: leaves are dispatched inline rather than through _replace_tree to save a call per value
+    result = {}
+    for k, v in data.items():
+        if len(k) >= _MIN_GUID_LENGTH:
+            k = _replace_str(k, replacement_table)
+
+        t = type(v)
+        if t is dict:
+            v = _replace_dict(v, replacement_table)
+        elif t is list:
+            v = _replace_list(v, replacement_table)
+        elif t is str and len(v) >= _MIN_GUID_LENGTH:
+            v = _replace_str(v, replacement_table)
+        result[k] = v
+    return result
+
+
+def _replace_tree(data: Any, replacement_table: dict[str, str]) -> Any:
+    if isinstance(data, dict):
+        return _replace_dict(data, replacement_table)
+
+    if isinstance(data, list):
+        return _replace_list(data, replacement_table)
+
+    if isinstance(data, str) and len(data) >= _MIN_GUID_LENGTH:
+        return _replace_str(data, replacement_table)
+
+    return data
+
+
+def _long_strings_list(data: list[Any], found: set[str]):
+    for v in data:
+        t = type(v)
+        if t is dict:
+            _long_strings_dict(v, found)
+        elif t is list:
+            _long_strings_list(v, found)
+        elif t is str and len(v) >= _MIN_GUID_LENGTH:
+            found.add(v)
+
+
+def _long_strings_dict(data: dict[str, Any], found: set[str]):
+    """Adds every string (value or key) in the tree that is long enough to contain a GUID to found"""
+    for k, v in data.items():
+        if len(k) >= _MIN_GUID_LENGTH:
+            found.add(k)
+
+        t = type(v)
+        if t is dict:
+            _long_strings_dict(v, found)
+        elif t is list:
+            _long_strings_list(v, found)
+        elif t is str and len(v) >= _MIN_GUID_LENGTH:
+            found.add(v)
+
+
+def _collect_guid_strings(datas: Iterable[Any], guids: Container[str]) -> set[str]:
+    """
+    Returns:
+        Every string (value or key) in the trees that contains one of guids, either exactly or embedded
+    """
+    candidates: set[str] = set()
+    for data in datas:
+        if isinstance(data, dict):
+            _long_strings_dict(data, candidates)
+        elif isinstance(data, list):
+            _long_strings_list(data, candidates)
+        elif isinstance(data, str) and len(data) >= _MIN_GUID_LENGTH:
+            candidates.add(data)
+
+    return {value for value in candidates
+            if value in guids or any(match[0] in guids for match in _GUID_PATTERN.finditer(value))}
+
+
+def _clone_list(data: list[Any], lookup: dict[str, str]) -> list[Any]:
+    return [_clone_tree(v, lookup) for v in data]
+
+
+def _clone_dict(data: dict[str, Any], lookup: dict[str, str]) -> dict[str, Any]:
+    # Hot loop: leaves are dispatched inline rather than through _clone_tree to save a call per value
+    result = {}
+    for k, v in data.items():
+        if k in lookup:
+            k = lookup[k]
+
+        t = type(v)
+        if t is dict:
+            v = _clone_dict(v, lookup)
+        elif t is list:
+            v = _clone_list(v, lookup)
+        elif t is str and v in lookup:
+            v = lookup[v]
+        result[k] = v
+    return result
+
+
+def _clone_tree(data: Any, lookup: dict[str, str]) -> Any:
+    """Copies a json tree, swapping any string that is a key of lookup (exact matches only)"""
+    if isinstance(data, dict):
+        return _clone_dict(data, lookup)
+
+    if isinstance(data, list):
+        return _clone_list(data, lookup)
+
+    if isinstance(data, str):
+        return lookup.get(data, data)
+
+    return data
+
 
 def replace_guids(datadict: Mapping[str, Any] | None, replacement_table: dict[str, str]):
-    encoding = json.dumps(datadict)
-    for target, replacement in replacement_table.items():
-        encoding = encoding.replace(target, replacement)
-    return json.loads(encoding)
+    """
+    Copies a json dictionary while replacing GUIDs, in a single walk over the tree
+
+    Args:
+        datadict: Dictionary to copy
+        replacement_table: Map of old GUID to new GUID. Include both the dashed and fitem_guid forms to replace both
+
+    Returns:
+        Copy of datadict with every GUID in a string value or key replaced, including GUIDs embedded in longer strings
+    """
+    return _replace_tree(datadict, replacement_table)
 
 
 def fitem_guid(guid: str) -> str:
     return guid.replace('-', '').upper()
 
 
-#
+def _new_guids(count: int) -> list[str]:
+    # Formats version-4 GUIDs straight from one block of random bytes rather than building a uuid.UUID per GUID
+    hex_data = os.urandom(16 * count).hex()
+    guids = [''] * count
+    for x in range(count):
+        h = hex_data[32 * x:32 * x + 32]
+        guids[x] = f'{h[:8]}-{h[8:12]}-4{h[13:16]}-{"89ab"[int(h[16], 16) & 3]}{h[17:20]}-{h[20:]}'
+    return guids
+
+
+def _instance(objs: list[TowerObject], count: int) -> list[list[TowerObject]]:
+    """
+    Builds count copies of objs in one pass, giving each copy its own GUIDs (with references between the copied
+    objects remapped) and its own group IDs
+
+    Args:
+        objs: Template objects
+        count: Number of copies
+
+    Returns:
+        List of count lists of copied objects, each in the same order as objs
+    """
+    for obj in objs:
+        if obj._store is not None:
+            obj._store.sync_object(obj)
+
+    old_guids = [obj.item['guid'] for obj in objs if obj.item is not None]
+    old_fitem_guids = [fitem_guid(guid) for guid in old_guids]
+    new_guids = _new_guids(count * len(old_guids))
+
+    # Each copy gets a fresh block of group IDs above everything currently in the save
+    old_group_ids = [obj.group_id for obj in objs]
+    group_index = {group_id: x for x, group_id in enumerate(sorted({g for g in old_group_ids if g >= 0}))}
+    first_group_id = not_none(get_active_save()).get_max_groupid() + 1
+
+    # For several copies, find the strings referencing the old GUIDs once so each copy is then a plain clone with
+    #  exact lookups. A single copy is cheaper to do in one pass with replace_guids
+    guid_strings: set[str] = set()
+    if count > 1:
+        guid_strings = _collect_guid_strings([obj.item for obj in objs] + [obj.properties for obj in objs],
+                                             set(old_guids + old_fitem_guids))
+
+    instances = []
+    with gc_paused():
+        for k in range(count):
+            replacement_table: dict[str, str] = {}
+            for x, (old_guid, old_fitem) in enumerate(zip(old_guids, old_fitem_guids)):
+                new_guid = new_guids[k * len(old_guids) + x]
+                replacement_table[old_guid] = new_guid
+                replacement_table[old_fitem] = fitem_guid(new_guid)
+            lookup = {value: _replace_str(value, replacement_table) for value in guid_strings}
+
+            base_group_id = first_group_id + k * len(group_index)
+            copies = [None] * len(objs)
+            for x, (obj, old_group_id) in enumerate(zip(objs, old_group_ids)):
+                if count > 1:
+                    copied = TowerObject(item=_clone_tree(obj.item, lookup),
+                                         properties=_clone_tree(obj.properties, lookup), nocopy=True)
+                else:
+                    copied = TowerObject(item=replace_guids(obj.item, replacement_table),
+                                         properties=replace_guids(obj.properties, replacement_table), nocopy=True)
+                if old_group_id >= 0:
+                    copied.group_id = base_group_id + group_index[old_group_id]
+                copies[x] = copied
+
+            instances.append(copies)
+
+    return instances
+
+
+def instance_selection(selection: Selection, offsets: np.ndarray, rotations: np.ndarray | None = None,
+                       local: bool = False) -> list[Selection]:
+    """
+    Builds one copy of the selection per row of offsets, all in a single pass. Each copy is optionally rotated about
+    the selection's centroid (as in Selection.rotate), then translated by its offset
+
+    Args:
+        selection: Input selection to copy
+        offsets: Nx3 array of translation offsets, one per copy
+        rotations: (Optional) Nx3 array of xyz Euler angles in degrees, one per copy
+        local: Whether to only rotate each object in place, leaving positions untouched
+
+    Returns:
+        List of N new Selections, one per copy. The copies still need to be added to the save
+    """
+    offsets = np.asarray(offsets, dtype=np.float64).reshape(-1, 3)
+    count = len(offsets)
+    objs = list(selection)
+    instances = _instance(objs, count)
+
+    item_idx = [x for x, obj in enumerate(objs) if obj.item is not None]
+    if count == 0 or not item_idx:
+        return [Selection(copies) for copies in instances]
+
+    template = [objs[x] for x in item_idx]
+    num_items = len(template)
+    positions = np.tile(_gather(template, 'position'), (count, 1))
+    if rotations is not None:
+        from scipy.spatial.transform import Rotation as R
+
+        rotations = np.asarray(rotations, dtype=np.float64).reshape(-1, 3)
+        r = R.from_euler('xyz', np.repeat(rotations, num_items, axis=0), degrees=True)
+        new_rotations = (r * R.from_quat(np.tile(_gather(template, 'rotation'), (count, 1)))).as_quat()
+        if not local:
+            centroid = positions[:num_items].mean(axis=0)
+            positions = r.apply(positions - centroid) + centroid
+    positions += np.repeat(offsets, num_items, axis=0)
+
+    for k, copies in enumerate(instances):
+        copied_items = [copies[x] for x in item_idx]
+        rows = slice(k * num_items, (k + 1) * num_items)
+        _scatter(copied_items, 'position', positions[rows])
+        if rotations is not None:
+            _scatter(copied_items, 'rotation', new_rotations[rows])
+
+    return [Selection(copies) for copies in instances]
+
+
 def copy_selection(selection: Selection) -> Selection:
     """
     Args:
@@ -27,41 +282,4 @@ def copy_selection(selection: Selection) -> Selection:
     Returns:
         New Selection containing the new copied objects
     """
-    # First pass: new guids and setup replacement table
-    replacement_table: dict[str, str] = {}
-    copies: list[TowerObject] = [None] * len(selection)  # type: ignore
-    new_groups: dict[int, int] = {}
-    save_max_groupid = get_active_save().get_max_groupid()
-    for x, obj in enumerate(selection):
-        old_guid = None
-        if obj.item is not None:
-            old_guid = obj.item['guid']
-
-        copied = obj.copy()
-
-        old_group_id = obj.group_id
-        if old_group_id >= 0:
-            if old_group_id not in new_groups:
-                max_new_groupid = max(new_groups.values()) if new_groups.values() else -1
-                new_groupid = max(save_max_groupid, max_new_groupid) + 1
-                new_groups[old_group_id] = new_groupid
-
-            copied.set_group_id(new_groups[old_group_id])
-
-        if old_guid is not None:
-            new_guid = not_none(copied.item)['guid']
-            replacement_table[old_guid] = new_guid
-
-        copies[x] = copied
-
-    full_replacement_table = {}
-    for old, new in replacement_table.items():
-        full_replacement_table[old] = new
-        full_replacement_table[fitem_guid(old)] = fitem_guid(new)
-
-    # Second pass: replace any references to old guids with new guids
-    for obj in copies:
-        obj.item = replace_guids(obj.item, full_replacement_table)
-        obj.properties = replace_guids(obj.properties, full_replacement_table)
-
-    return Selection(copies)
+    return Selection(_instance(list(selection), 1)[0])
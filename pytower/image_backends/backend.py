@@ -1,6 +1,6 @@
 import asyncio
 from abc import ABC, abstractmethod
-from typing import Iterable, cast
+from typing import Callable, Iterable, cast
 
 from ..logging import *
 
@@ -27,19 +27,28 @@ class ResourceBackend(ABC):
         """
         pass
 
-    def _upload_thread(self, path: str) -> str | None:
+    def _upload_thread(self, path: str, on_upload: Callable[[str, str], None] | None = None) -> str | None:
         try:
             url = self.upload_file(path)
-            if url:
-                info(f'Successfully uploaded {path} to {self.name}: {url}')
-
-            return url
         except Exception as e:
             error(f'Error while uploading file: {e}')
             return None
 
-    async def _upload_async(self, files: Iterable[str]) -> dict[str, str]:
-        results = await asyncio.gather(*[asyncio.to_thread(self._upload_thread, path) for path in files])
+        if url:
+            info(f'Successfully uploaded {path} to {self.name}: {url}')
+            if on_upload is not None:
+                # The upload itself succeeded, so failing to record it must not lose the url
+                try:
+                    on_upload(path, url)
+                except Exception as e:
+                    error(f'Error while recording upload of {path}: {e}')
+
+        return url
+
+    async def _upload_async(self, files: Iterable[str],
+                            on_upload: Callable[[str, str], None] | None = None) -> dict[str, str]:
+        files = list(files)  # Iterated twice
+        results = await asyncio.gather(*[asyncio.to_thread(self._upload_thread, path, on_upload) for path in files])
         # Zip each file with its result
         zipped = zip(files, results)
         # Filter out Nones
@@ -47,13 +56,16 @@ class ResourceBackend(ABC):
         # Convert to dict with dict comprehension
         return {k: v for k, v in zipped}
 
-    def upload_files(self, files: Iterable[str]) -> dict[str, str]:
+    def upload_files(self, files: Iterable[str], on_upload: Callable[[str, str], None] | None = None) \
+            -> dict[str, str]:
         """Upload multiple files. Default implementation can be overridden for performance and to avoid rate limiting
 
         Args:
             files: List of file paths
+            on_upload: (Optional) Called with the path and url of each file as soon as it is uploaded, from the thread
+                that uploaded it
 
         Returns:
             Dictionary where paths are keys and urls are values
         """
-        return asyncio.run(self._upload_async(files))
+        return asyncio.run(self._upload_async(files, on_upload))
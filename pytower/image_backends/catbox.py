@@ -1,5 +1,5 @@
 import os.path
-from typing import Iterable
+from typing import Callable, Iterable
 
 import requests
 from requests_toolbelt.multipart.encoder import MultipartEncoder
@@ -50,5 +50,6 @@ class CatboxBackend(ResourceBackend):
             error(f"Catbox upload failed with status code: {response.status_code}")
             return None
 
-    def upload_files(self, files: Iterable[str]) -> dict[str, str]:
-        return super().upload_files(files)
+    def upload_files(self, files: Iterable[str], on_upload: Callable[[str, str], None] | None = None) \
+            -> dict[str, str]:
+        return super().upload_files(files, on_upload)
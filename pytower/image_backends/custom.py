@@ -1,4 +1,4 @@
-from typing import Iterable
+from typing import Callable, Iterable
 
 from .backend import ResourceBackend
 
@@ -15,5 +15,6 @@ class CustomBackend(ResourceBackend):
     def upload_file(self, path: str) -> str | None:
         raise NotImplementedError('Missing upload_image implementation!')
 
-    def upload_files(self, files: Iterable[str]) -> dict[str, str]:
-        return super().upload_files(files)
+    def upload_files(self, files: Iterable[str], on_upload: Callable[[str, str], None] | None = None) \
+            -> dict[str, str]:
+        return super().upload_files(files, on_upload)
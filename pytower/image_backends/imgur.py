@@ -1,4 +1,4 @@
-from typing import Iterable
+from typing import Callable, Iterable
 
 import requests
 
@@ -38,5 +38,6 @@ class ImgurBackend(ResourceBackend):
             error(f"Error uploading image: {response.status_code} {response.reason}")
             return None
 
-    def upload_files(self, files: Iterable[str]) -> dict[str, str]:
-        return super().upload_files(files)
+    def upload_files(self, files: Iterable[str], on_upload: Callable[[str, str], None] | None = None) \
+            -> dict[str, str]:
+        return super().upload_files(files, on_upload)
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import numpy as np
+
+from .__config__ import root_directory
+from .image_backends.backend import ResourceBackend
+from .logging import *
+
+UPLOAD_CACHE_PATH = os.path.join(root_directory, 'upload-cache.json')
+
+
+def image_hash(image: np.ndarray) -> str:
+    """
+    Args:
+        image: Image as an array of pixels
+
+    Returns:
+        Hash of the image's shape, type and pixels
+    """
+    digest = hashlib.sha1(usedforsecurity=False)
+    digest.update(f'{image.shape}{image.dtype}'.encode('ascii'))
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+class UploadCache:
+    """
+    URLs of uploaded images by content hash and backend, kept in a .json file that is rewritten after every upload, so
+    that an interrupted run loses none of the uploads it finished
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path of the .json file, loaded if it exists
+        """
+        self.path = path
+        self._lock = Lock()
+        try:
+            with open(path, 'r') as fd:
+                self._urls: dict[str, dict[str, str]] = json.load(fd)
+        except (OSError, json.JSONDecodeError):
+            self._urls = {}
+
+    def get(self, backend: ResourceBackend, content_hash: str) -> str | None:
+        """
+        Args:
+            backend: Backend the image was uploaded to
+            content_hash: Hash of the image, from image_hash
+
+        Returns:
+            URL of the image, or None if it hasn't been uploaded to this backend
+        """
+        with self._lock:
+            return self._urls.get(backend.name, {}).get(content_hash)
+
+    def put(self, backend: ResourceBackend, content_hash: str, url: str):
+        """
+        Records an upload and writes the cache back to disk
+
+        Args:
+            backend: Backend the image was uploaded to
+            content_hash: Hash of the image, from image_hash
+            url: URL of the uploaded image
+        """
+        with self._lock:
+            self._urls.setdefault(backend.name, {})[content_hash] = url
+
+            # Write to a temporary file first, so a crash mid-write can't corrupt the cache
+            temp_path = f'{self.path}.tmp'
+            with open(temp_path, 'w') as fd:
+                json.dump(self._urls, fd, indent=2)
+            os.replace(temp_path, self.path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(urls) for urls in self._urls.values())
+
+
+def _encode_png(image: np.ndarray, path: str):
+    # Imported here, since only uploads need PIL
+    from PIL import Image
+
+    Image.fromarray(image).save(path)
+
+
+def upload_images(images: list[np.ndarray], backend: ResourceBackend, cache: UploadCache | None = None,
+                  manifest_path: str | None = None, workers: int | None = None) -> list[str | None]:
+    """
+    Uploads images as PNGs, encoding them in a pool of threads and uploading them concurrently
+
+    Images already in the cache or the manifest are not uploaded again. Every finished upload is recorded in both
+    right away, so running the same upload again after a crash resumes where it stopped. The manifest is deleted once
+    every image has been uploaded
+
+    Args:
+        images: Images to upload, as arrays of uint8 pixels
+        backend: Backend to upload to
+        cache: (Optional) Cache of uploads shared across runs
+        manifest_path: (Optional) Path of a manifest recording the uploads of just this set of images
+        workers: (Optional) Number of threads encoding images, defaults to one per CPU
+
+    Returns:
+        URL of each image, or None for the images that failed to upload
+    """
+    manifest = UploadCache(manifest_path) if manifest_path is not None else None
+    stores = [store for store in (manifest, cache) if store is not None]
+
+    hashes = [image_hash(image) for image in images]
+    urls: dict[str, str] = {}
+    for content_hash in hashes:
+        for store in stores:
+            url = store.get(backend, content_hash)
+            if url is not None:
+                urls[content_hash] = url
+                break
+
+    # Identical images only need to be uploaded once
+    missing = {content_hash: image for content_hash, image in zip(hashes, images) if content_hash not in urls}
+    if urls:
+        info(f'Reusing {len(hashes) - len(missing)}/{len(hashes)} already uploaded images')
+
+    if missing:
+        with tempfile.TemporaryDirectory(prefix='pytower_') as temp_dir:
+            # Unique file names, so uploads don't overwrite each other's files
+            paths = {os.path.join(temp_dir, f'{content_hash}.png'): content_hash for content_hash in missing}
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(_encode_png, missing.values(), paths))
+
+            def on_upload(path: str, url: str):
+                for store in stores:
+                    store.put(backend, paths[path], url)
+
+            for path, url in backend.upload_files(list(paths), on_upload=on_upload).items():
+                urls[paths[path]] = url
+
+    failed = sum(content_hash not in urls for content_hash in hashes)
+    if failed:
+        error(f'Failed to upload {failed}/{len(hashes)} images!'
+              + (f' Run again to resume from {manifest_path}' if manifest_path is not None else ''))
+    elif manifest_path is not None and os.path.isfile(manifest_path):
+        os.remove(manifest_path)
+
+    return [urls.get(content_hash) for content_hash in hashes]
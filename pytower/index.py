@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+from typing import Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .object import TowerObject
+
+
+def _name_key(name: str) -> str:
+    return name.strip().casefold()
+
+
+def _bucket_add(buckets: dict, key, obj: TowerObject, seq: int):
+    bucket = buckets.get(key)
+    if bucket is None:
+        buckets[key] = {obj: seq}
+    else:
+        bucket[obj] = seq
+
+
+def _bucket_remove(buckets: dict, key, obj: TowerObject) -> bool:
+    """Returns whether the bucket was emptied (and dropped)"""
+    bucket = buckets.get(key)
+    if bucket is None:
+        return False
+
+    bucket.pop(obj, None)
+    if bucket:
+        return False
+
+    del buckets[key]
+    return True
+
+
+class ObjectIndex:
+    """
+    Hash indexes over the objects of a save: casefolded name, casefolded custom name and group ID, plus the maximum
+    group ID
+
+    Objects are bound to the index much like a TransformStore: while bound, the TowerObject.group_id and
+    TowerObject.custom_name setters (and ungroup()) update the index in place, so lookups never scan the save. Each
+    object also keeps its position in the save's object list, so lookups can return the first match.
+
+    Attributes:
+        objects: Map of every indexed object to its insertion sequence number
+    """
+
+    def __init__(self, objects: Iterable[TowerObject] = ()):
+        """
+        Args:
+            objects: (Optional) Objects to index
+        """
+        self.objects: dict[TowerObject, int] = {}
+        self._next_seq = 0
+        self._by_name: dict[str, dict[TowerObject, int]] = {}
+        self._by_custom_name: dict[str, dict[TowerObject, int]] = {}
+        self._by_group: dict[int, dict[TowerObject, int]] = {}
+        self._max_group_id: int | None = -1
+
+        self.add(objects)
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def add(self, objects: Iterable[TowerObject]):
+        """
+        Binds objects to the index
+
+        Args:
+            objects: Objects to add. Objects already in this index are skipped
+        """
+        for obj in objects:
+            if obj._index is self:
+                continue
+            if obj._index is not None:
+                obj._index.remove(obj)
+
+            seq = self._next_seq
+            self._next_seq += 1
+            obj._index = self
+            self.objects[obj] = seq
+
+            group_id = obj.group_id
+            _bucket_add(self._by_name, _name_key(obj.name), obj, seq)
+            _bucket_add(self._by_custom_name, _name_key(obj.custom_name), obj, seq)
+            _bucket_add(self._by_group, group_id, obj, seq)
+            if self._max_group_id is not None and group_id > self._max_group_id:
+                self._max_group_id = group_id
+
+    def remove(self, obj: TowerObject):
+        """
+        Unbinds an object from the index
+
+        Args:
+            obj: Object to remove
+        """
+        if obj._index is not self:
+            return
+
+        del self.objects[obj]
+        obj._index = None
+        _bucket_remove(self._by_name, _name_key(obj.name), obj)
+        _bucket_remove(self._by_custom_name, _name_key(obj.custom_name), obj)
+        self._remove_group(obj, obj.group_id)
+
+    def _remove_group(self, obj: TowerObject, group_id: int):
+        if _bucket_remove(self._by_group, group_id, obj) and group_id == self._max_group_id:
+            # Recomputed over the remaining groups on the next max_group_id read
+            self._max_group_id = None
+
+    def move_group(self, obj: TowerObject, old_group_id: int, new_group_id: int):
+        """
+        Called by TowerObject when a bound object's group ID changes
+
+        Args:
+            obj: Object whose group ID changed
+            old_group_id: Previous group ID
+            new_group_id: New group ID
+        """
+        if old_group_id == new_group_id:
+            return
+
+        self._remove_group(obj, old_group_id)
+        _bucket_add(self._by_group, new_group_id, obj, self.objects[obj])
+        if self._max_group_id is not None and new_group_id > self._max_group_id:
+            self._max_group_id = new_group_id
+
+    def move_custom_name(self, obj: TowerObject, old_name: str, new_name: str):
+        """
+        Called by TowerObject when a bound object's custom name changes
+
+        Args:
+            obj: Object whose custom name changed
+            old_name: Previous custom name
+            new_name: New custom name
+        """
+        old_key, new_key = _name_key(old_name), _name_key(new_name)
+        if old_key == new_key:
+            return
+
+        _bucket_remove(self._by_custom_name, old_key, obj)
+        _bucket_add(self._by_custom_name, new_key, obj, self.objects[obj])
+
+    @property
+    def max_group_id(self) -> int:
+        """Maximum group ID of the indexed objects, or -1 if there are none"""
+        if self._max_group_id is None:
+            self._max_group_id = max(self._by_group, default=-1)
+        return self._max_group_id
+
+    def by_name(self, name: str) -> dict[TowerObject, int]:
+        """
+        Args:
+            name: Object name, compared case-insensitively and ignoring surrounding whitespace
+
+        Returns:
+            Objects (mapped to their sequence numbers) with that name. Do not modify
+        """
+        return self._by_name.get(_name_key(name), {})
+
+    def by_custom_name(self, name: str) -> dict[TowerObject, int]:
+        """
+        Args:
+            name: Custom name, compared case-insensitively and ignoring surrounding whitespace
+
+        Returns:
+            Objects (mapped to their sequence numbers) with that custom name. Do not modify
+        """
+        return self._by_custom_name.get(_name_key(name), {})
+
+    def by_group(self, group_id: int) -> dict[TowerObject, int]:
+        """
+        Args:
+            group_id: Group ID (-1 for ungrouped objects)
+
+        Returns:
+            Objects (mapped to their sequence numbers) in that group. Do not modify
+        """
+        return self._by_group.get(group_id, {})
+
+    def group_ids(self) -> list[int]:
+        """
+        Returns:
+            Every group ID in use (including -1 if there are ungrouped objects), in no particular order
+        """
+        return list(self._by_group)
+
+    def group_sizes(self) -> dict[int, int]:
+        """
+        Returns:
+            Number of indexed objects in each group (ungrouped objects excluded), in no particular order
+        """
+        return {group_id: len(objs) for group_id, objs in self._by_group.items() if group_id >= 0}
+
+    def find_first(self, name: str) -> TowerObject | None:
+        """
+        Args:
+            name: Name or custom name to match, case-insensitively
+
+        Returns:
+            The earliest indexed object whose name or custom name matches, or None
+        """
+        candidates = list(self.by_name(name).items()) + list(self.by_custom_name(name).items())
+        if not candidates:
+            return None
+        return min(candidates, key=lambda candidate: candidate[1])[0]
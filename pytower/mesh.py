@@ -1,23 +1,23 @@
+import functools
 import json
 import math
-from typing import Optional
+from dataclasses import dataclass
 
 import open3d as o3d
 import numpy as np
 from open3d.cpu.pybind.geometry import TriangleMesh
-from PIL import Image
 
 from scipy.spatial.transform import Rotation as R
 
 from .image_backends.backend import ResourceBackend
 from .image_backends.catbox import CatboxBackend
+from .image_upload import UPLOAD_CACHE_PATH, UploadCache, upload_images
 from .logging import *
-from .object import TowerObject
+from .object import ObjectTemplate, TowerObject
+from .octree import OctreeBVH
 from .selection import Selection
 from .suitebro import Suitebro
-from .tool_lib import ParameterDict
-from .tools import rotate
-from .util import xyz, XYZ, XYZW
+from .util import xyz, XYZW
 
 WEDGE_ITEM_DATA = json.loads('''
     {
@@ -166,41 +166,10 @@ WEDGE_PROPERTY_DATA = json.loads('''
     }
     ''')
 
-COLOR_PATH = 'properties.SurfaceColorable.Struct.value.Struct.Color.Struct.value.LinearColor'
-
-class OctreeNode:
-    """Axis-aligned octree node implementation"""
-
-    def __init__(self, centroid: XYZ, size: float, point: XYZ):
-        self.centroid = centroid
-        self.size = size
-        self.point = point
-        self.children = [None] * 8
-
-    def contains(self, point: XYZ) -> bool:
-        return point.clamp(self.centroid - self.size / 2, self.centroid + self.size / 2).distance(point) < XYZ.EPSILON
-
-    def traverse(self, point: XYZ) -> Optional['OctreeNode']:
-        if not self.contains(point):
-            return None
-
-        pos_dirs = point >= self.centroid
-        dirs = [1 if x else 0 for x in pos_dirs]
-        bitstring = dirs[2] << 2 | dirs[1] << 1 | dirs[0]
-        return self.children[bitstring]
+# Wedges share the nested template data copy-on-write, rather than deep-copying it for every triangle
+_WEDGE_TEMPLATE = ObjectTemplate(WEDGE_ITEM_DATA, WEDGE_PROPERTY_DATA)
 
-
-class OctreeBVH:
-    def __init__(self, centroid: XYZ, size: float):
-        self.root = None
-        self.centroid = centroid
-        self.size = size
-
-    def add_point(self, p: XYZ):
-        if self.root is None:
-            self.root = OctreeNode(self.centroid, self.size, p)
-
-        # TODO
+COLOR_PATH = 'properties.SurfaceColorable.Struct.value.Struct.Color.Struct.value.LinearColor'
 
 class TowerMesh:
     def __init__(self, mesh: TriangleMesh):
@@ -228,45 +197,76 @@ class TowerMesh:
 
         self.triangles = self.vertices[self.tri_ids] # shape (#F, 3)
 
-    def get_color(self, uv: np.ndarray, material_id: int) -> np.ndarray:
+    def sample_colors(self, uvs: np.ndarray, material_id: int) -> np.ndarray:
+        """
+        Bilinearly samples a material's texture at many UV coordinates at once
+
+        Args:
+            uvs: UV coordinates, shape (N, 2)
+            material_id: Material whose texture to sample
+
+        Returns:
+            RGB colors (0-255 range), shape (N, 3)
+        """
         texture = self.textures[material_id]
         if texture is None:
-            return np.zeros(3)
+            return np.zeros((len(uvs), 3))
 
-        height, width, _ = texture.shape
-        u, v = uv[0], uv[1]
+        height, width, channels = texture.shape
+        # Gathering rows of the flattened texture is about twice as fast as 2D fancy indexing
+        texels = texture.reshape(height * width, channels)
 
         # Bilinear interpolate
-        w_value = u * width
-        h_value = v * height
+        w_value = uvs[:, 0] * width
+        h_value = uvs[:, 1] * height
 
         # Assume GL_REPEAT mode with the modulus
-        w_pixel_low = math.floor(w_value)
-        w_pixel_high = math.ceil(w_value)
-        h_pixel_low = math.floor(h_value)
-        h_pixel_high = math.ceil(h_value)
+        w_pixel_low = np.floor(w_value)
+        w_pixel_high = np.ceil(w_value)
+        h_pixel_low = np.floor(h_value)
+        h_pixel_high = np.ceil(h_value)
 
-        w_r = w_value - w_pixel_low
-        h_r = h_value - h_pixel_low
+        w_r = (w_value - w_pixel_low)[:, None]
+        h_r = (h_value - h_pixel_low)[:, None]
 
-        high_u_interp = (w_r * texture[h_pixel_high % height, w_pixel_high % width, :]
-                         + (1 - w_r) * texture[h_pixel_high % height, w_pixel_low % width, :])
-        low_u_interp = (w_r * texture[h_pixel_low % height, w_pixel_high % width, :]
-                        + (1 - w_r) * texture[h_pixel_low % height, w_pixel_low % width, :])
-        return (h_r * high_u_interp + (1 - h_r) * low_u_interp)[:3]
+        w_low = w_pixel_low.astype(np.int64) % width
+        w_high = w_pixel_high.astype(np.int64) % width
+        h_low = (h_pixel_low.astype(np.int64) % height) * width
+        h_high = (h_pixel_high.astype(np.int64) % height) * width
 
-    def get_triangle_color(self, tri_id: int):
-        uvs = self.triangle_uvs[3*tri_id:3*(tri_id+1)] # shape (3, 2)
-        avg_color = np.zeros((3,))
-        for uv_pair in uvs:
-            color = self.get_color(uv_pair, self.get_material_id(tri_id))
-            # if color is not None and (np.any(color > 255) or np.any(color < 0)):
-            #     print(color)
+        def texel(h_offset: np.ndarray, w_pixel: np.ndarray) -> np.ndarray:
+            return np.take(texels, h_offset + w_pixel, axis=0)[:, :3]
+
+        high_u_interp = w_r * texel(h_high, w_high) + (1 - w_r) * texel(h_high, w_low)
+        low_u_interp = w_r * texel(h_low, w_high) + (1 - w_r) * texel(h_low, w_low)
+        return h_r * high_u_interp + (1 - h_r) * low_u_interp
+
+    def get_color(self, uv: np.ndarray, material_id: int) -> np.ndarray:
+        return self.sample_colors(np.asarray(uv, dtype=np.float64)[None, :2], material_id)[0]
+
+    def get_triangle_colors(self, tri_ids: np.ndarray) -> np.ndarray:
+        """
+        Average texture color at the corners of many faces
+
+        Args:
+            tri_ids: Indices of the faces, shape (N,)
+
+        Returns:
+            RGB colors (0-1 range), shape (N, 3)
+        """
+        tri_ids = np.asarray(tri_ids, dtype=np.int64)
+        uvs = self.triangle_uvs.reshape(-1, 3, 2)[tri_ids]  # shape (N, 3, 2)
+        mat_ids = self.triangle_material_ids[tri_ids]
+
+        colors = np.zeros((len(tri_ids), 3, 3))
+        for mat_id in np.unique(mat_ids):
+            same_mat = mat_ids == mat_id
+            colors[same_mat] = self.sample_colors(uvs[same_mat].reshape(-1, 2), int(mat_id)).reshape(-1, 3, 3)
 
-            if color is not None:
-                avg_color += color / 3
+        return (colors / 3).sum(axis=1) / 255
 
-        return avg_color / 255
+    def get_triangle_color(self, tri_id: int):
+        return self.get_triangle_colors(np.array([tri_id]))[0]
 
     def get_triangles(self) -> np.ndarray:
         # Results in 3x3 matrices
@@ -285,144 +285,457 @@ class TriangleTextureInfo:
         self.texture_scale = texture_scale
 
 
-class TextureBake:
-    TEMP_FILENAME = 'temp_pytower.png'
-    def __init__(self, num_triangles_size: int, triangle_size: int, backend: ResourceBackend):
-        self.num_triangles_size = num_triangles_size
-        self.triangle_size = triangle_size
-        self.width = self.height = triangle_size * num_triangles_size
-        self.backend = backend
+# Largest texture atlas width and height, in pixels
+MAX_ATLAS_SIZE = 4096
 
-        self.image = np.zeros((self.height, self.width, 3))
-        self.num_triangles = 0
-        self.max_triangles = self.num_triangles_size * self.num_triangles_size
 
-        self.objects = []
+@dataclass
+class AtlasConfig:
+    """
+    How wedge textures are packed into texture atlases
 
-    def _get_cur_xy(self):
-        r = self.num_triangles // self.num_triangles_size
-        c = self.num_triangles % self.num_triangles_size
-        return c, r
+    Each wedge gets a square cell sized from its world area, so every wedge has about the same texel density. With two
+    wedges per cell, the second wedge of a cell uses a negative tiling scale, which should show the cell rotated by 180
+    degrees, so the two right triangles fill the cell together. That relies on how Tower Unite applies a negative
+    tiling scale, which is not confirmed in game yet, so one wedge per cell is the default
+    """
+    atlas_size: int = MAX_ATLAS_SIZE  # Largest atlas width and height, in pixels
+    wedges_per_cell: int = 1  # 1, or 2 to share cells between complementary wedges
+    texel_density: float | None = None  # Texels per world unit, or None to pick it from the wedges' areas
+    cell_size: int = 25  # Cell size of a wedge of median area, when picking the texel density
+    min_cell_size: int = 4
+    max_cell_size: int = 256
+
+    def __post_init__(self):
+        if not 1 <= self.atlas_size <= MAX_ATLAS_SIZE:
+            raise ValueError(f'Atlas size must be between 1 and {MAX_ATLAS_SIZE}, not {self.atlas_size}')
+        if self.wedges_per_cell not in (1, 2):
+            raise ValueError(f'Wedges per cell must be 1 or 2, not {self.wedges_per_cell}')
+        if self.texel_density is not None and self.texel_density <= 0:
+            raise ValueError(f'Texel density must be positive, not {self.texel_density}')
+        if not 1 <= self.min_cell_size <= self.max_cell_size:
+            raise ValueError(f'Invalid cell size range {self.min_cell_size}-{self.max_cell_size}')
+
+    def cell_sizes(self, legs: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            legs: Lengths of the two legs of each wedge, in world units, shape (W, 2)
+
+        Returns:
+            Cell size in pixels of each wedge, shape (W,)
+        """
+        # A right triangle with legs a and b covers half an a x b rectangle, so its cell is sqrt(a * b) units a side
+        extents = np.sqrt(np.prod(np.asarray(legs, dtype=np.float64), axis=1))
+        density = self.texel_density
+        if density is None:
+            positive = extents[extents > 0]
+            density = self.cell_size / np.median(positive) if len(positive) else 0.0
+
+        max_size = min(self.max_cell_size, self.atlas_size)
+        return np.clip(np.rint(extents * density), min(self.min_cell_size, max_size), max_size).astype(np.int64)
+
+
+# Atlases smaller than the largest size are a multiple of this wide
+_ATLAS_SIDE_STEP = 64
+
+
+def _shelf_pack(sizes: np.ndarray, side: int) -> tuple[list[int], list[int]]:
+    # Places square cells, largest first, left to right in rows. Returns the positions of the cells that fit
+    xs, ys = [], []
+    x = y = row_height = 0
+    for size in sizes.tolist():
+        if x + size > side:
+            x, y, row_height = 0, y + row_height, 0
+        if y + size > side:
+            break
+
+        xs.append(x)
+        ys.append(y)
+        x += size
+        row_height = max(row_height, size)
+
+    return xs, ys
+
+def pack_cells(sizes: np.ndarray, max_side: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[int]]:
+    """
+    Packs square cells into square atlases. Every atlas but the last is max_side wide, and the last one is shrunk to
+    about the smallest multiple of _ATLAS_SIDE_STEP holding the remaining cells
 
-    def add_triangle(self, mesh: TowerMesh, tri_id: int, uvs: np.ndarray, wedge: TowerObject, flipped: bool) \
-            -> TriangleTextureInfo | None:
-        if self.num_triangles >= self.max_triangles:
-            return None
+    Args:
+        sizes: Width and height of each cell in pixels, at most max_side, shape (C,)
+        max_side: Largest atlas width and height, in pixels
 
-        mat_id = mesh.get_material_id(tri_id)
+    Returns:
+        Atlas index, x and y pixel position of each cell, all shape (C,), and the width and height of each atlas
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    atlas_ids = np.zeros(len(sizes), dtype=np.int64)
+    cell_xs = np.zeros(len(sizes), dtype=np.int64)
+    cell_ys = np.zeros(len(sizes), dtype=np.int64)
+    sides = []
+
+    remaining = np.argsort(-sizes, kind='stable')
+    while len(remaining):
+        remaining_sizes = sizes[remaining]
+
+        # Only sides with room for all the remaining cells are worth trying, growing by about an eighth each time
+        side = -(-max(int(remaining_sizes[0]), math.isqrt(int(np.sum(remaining_sizes ** 2)))) // _ATLAS_SIDE_STEP)
+        side_options = []
+        while side * _ATLAS_SIDE_STEP < max_side:
+            side_options.append(side * _ATLAS_SIDE_STEP)
+            side = max(side + 1, -(-side * 9 // 8))
+        for side in side_options + [max_side]:
+            xs, ys = _shelf_pack(remaining_sizes, side)
+            if len(xs) == len(remaining):
+                break
+
+        placed = remaining[:len(xs)]
+        atlas_ids[placed] = len(sides)
+        cell_xs[placed] = xs
+        cell_ys[placed] = ys
+        sides.append(side)
+        remaining = remaining[len(xs):]
+
+    return atlas_ids, cell_xs, cell_ys, sides
+
+
+@functools.cache
+def _triangle_cell_grid(triangle_size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pixels of a texture cell covered by a right triangle, and where each one samples the triangle's UVs
 
-        tri_bake = np.zeros((self.triangle_size, self.triangle_size, 3))
-        for y in range(self.triangle_size):
-            h =  1 - y / self.triangle_size
-            for x in range(self.triangle_size):
-                w = 1 - x / self.triangle_size
-                if h > 1 - w + 1.1 / self.triangle_size:
-                    continue
+    Args:
+        triangle_size: Width and height of the cell, in pixels
 
-                w_uv = (1 - w) * uvs[0]+ w * uvs[1]
-                h_uv = (1 - h) * w_uv + h * uvs[2]
-                col = mesh.get_color(h_uv, mat_id)
-                if flipped:
-                    tri_bake[y,x] = col
-                else:
-                    tri_bake[y, self.triangle_size - x - 1] = col
+    Returns:
+        Pixel rows, pixel columns, and the w and h interpolation weights of each covered pixel, all shape (P,)
+    """
+    ys, xs = np.mgrid[0:triangle_size, 0:triangle_size]
+    h = 1 - ys / triangle_size
+    w = 1 - xs / triangle_size
+    covered = h <= 1 - w + 1.1 / triangle_size
+    return ys[covered], xs[covered], w[covered], h[covered]
 
-        tri_x, tri_y = self._get_cur_xy()
-        self.image[(tri_y * self.triangle_size):((tri_y+1) * self.triangle_size),
-        (tri_x * self.triangle_size):((tri_x+1) * self.triangle_size)] = tri_bake
 
-        self.num_triangles += 1
-        self.objects.append(wedge)
+# Most pixels sampled at once while baking, to bound the memory used by large atlases
+_BAKE_CHUNK_PIXELS = 1 << 20
 
-        return TriangleTextureInfo(offset_x = tri_x / self.num_triangles_size, offset_y = tri_y / self.num_triangles_size,
-                                   texture_scale = 1 / self.num_triangles_size)
 
-    def upload(self):
-        temp = TextureBake.TEMP_FILENAME
+class TextureBake:
+    def __init__(self, size: int, backend: ResourceBackend):
+        self.width = self.height = size
+        self.backend = backend
 
-        Image.fromarray(self.image.astype(np.uint8)).save(temp)
-        url = self.backend.upload_file(temp)
-        os.remove(temp)
+        self.image = np.zeros((self.height, self.width, 3), dtype=np.uint8)
 
+        self.objects = []
+
+        # Triangles with a cell assigned but not baked yet: (mesh, material id, uvs, flipped, rotated, x, y, cell size)
+        self._pending: list[tuple[TowerMesh, int, np.ndarray, bool, bool, int, int, int]] = []
+
+    def _bake_cells(self, pending: list[tuple[TowerMesh, int, np.ndarray, bool, bool, int, int, int]], size: int):
+        cell_ys, cell_xs, cell_w, cell_h = _triangle_cell_grid(size)
+
+        # Interpolate the UVs of every covered pixel of every triangle at once, shape (T, P, 2)
+        uvs = np.array([uvs for _, _, uvs, _, _, _, _, _ in pending], dtype=np.float64)
+        w = cell_w[None, :, None]
+        h = cell_h[None, :, None]
+        w_uv = (1 - w) * uvs[:, None, 0] + w * uvs[:, None, 1]
+        h_uv = (1 - h) * w_uv + h * uvs[:, None, 2]
+
+        # Sample each texture once, for all the triangles using it
+        colors = np.zeros(h_uv.shape[:2] + (3,))
+        by_material: dict[tuple[int, int], list[int]] = {}
+        for idx, (mesh, mat_id, _, _, _, _, _, _) in enumerate(pending):
+            by_material.setdefault((id(mesh), mat_id), []).append(idx)
+        for idxs in by_material.values():
+            mesh, mat_id = pending[idxs[0]][:2]
+            colors[idxs] = mesh.sample_colors(h_uv[idxs].reshape(-1, 2), mat_id).reshape(len(idxs), -1, 3)
+
+        # Unflipped triangles are mirrored horizontally within their cell, and rotated ones are turned 180 degrees
+        flipped = np.array([flipped for _, _, _, flipped, _, _, _, _ in pending])
+        rotated = np.array([rotated for _, _, _, _, rotated, _, _, _ in pending])
+        xs = np.where(flipped[:, None], cell_xs, size - cell_xs - 1)
+        xs = np.where(rotated[:, None], size - xs - 1, xs)
+        ys = np.where(rotated[:, None], size - cell_ys - 1, cell_ys)
+        rows = np.array([tri_y for _, _, _, _, _, _, tri_y, _ in pending])[:, None] + ys
+        cols = np.array([tri_x for _, _, _, _, _, tri_x, _, _ in pending])[:, None] + xs
+        self.image[rows, cols] = colors
+
+    def bake_pending(self):
+        """Samples the textures of every triangle added since the last bake and writes them into the image"""
+        by_size: dict[int, list[tuple[TowerMesh, int, np.ndarray, bool, bool, int, int, int]]] = {}
+        for entry in self._pending:
+            by_size.setdefault(entry[-1], []).append(entry)
+
+        for size, pending in by_size.items():
+            chunk = max(1, _BAKE_CHUNK_PIXELS // len(_triangle_cell_grid(size)[0]))
+            for start in range(0, len(pending), chunk):
+                self._bake_cells(pending[start:start + chunk], size)
+
+        self._pending = []
+
+    def add_triangle(self, mesh: TowerMesh, tri_id: int, uvs: np.ndarray, wedge: TowerObject, flipped: bool,
+                     x: int, y: int, size: int, rotated: bool = False) -> TriangleTextureInfo:
+        # Bake the texture along with the rest of the sheet
+        self._pending.append((mesh, mesh.get_material_id(tri_id), uvs, flipped, rotated, x, y, size))
+        self.objects.append(wedge)
+
+        # A negative scale samples the cell backwards from its far corner, i.e. rotated by 180 degrees
+        if rotated:
+            return TriangleTextureInfo(offset_x=(x + size) / self.width, offset_y=(y + size) / self.height,
+                                       texture_scale=-size / self.width)
+        return TriangleTextureInfo(offset_x=x / self.width, offset_y=y / self.height, texture_scale=size / self.width)
+
+    def set_url(self, url: str | None):
         if url is None:
             error('TextureBake upload failed!')
 
         for obj in self.objects:
             obj.url = url
 
+    def upload(self, cache: UploadCache | None = None):
+        self.bake_pending()
+        url, = upload_images([self.image], self.backend, cache)
+        self.set_url(url)
+
 
 class TextureBakeCollection:
-    def __init__(self, num_triangles_size: int, triangle_size: int, backend: ResourceBackend):
-        self.num_triangles_size = num_triangles_size
-        self.triangle_size = triangle_size
-        self.width = self.height = triangle_size * num_triangles_size
+    def __init__(self, backend: ResourceBackend, config: AtlasConfig | None = None):
         self.backend = backend
+        self.config = config if config is not None else AtlasConfig()
+
+        self.bakes: list[TextureBake] = []
+
+        # Wedges waiting to be packed: (mesh, triangle ids, uvs, wedges, flipped, leg lengths)
+        self._queued: list[tuple[TowerMesh, np.ndarray, np.ndarray, list[TowerObject], np.ndarray, np.ndarray]] = []
+
+    def add_wedges(self, mesh: TowerMesh, tri_ids: np.ndarray, uvs: np.ndarray, wedges: list[TowerObject],
+                   flipped: np.ndarray, legs: np.ndarray):
+        """
+        Queues wedges to be textured. They are packed into atlases all together, once every wedge has been added
+
+        Args:
+            mesh: Mesh the wedges were converted from
+            tri_ids: Triangle of the mesh each wedge is part of, shape (W,)
+            uvs: UV coordinates of each wedge's vertices, shape (W, 3, 2)
+            wedges: The wedges
+            flipped: Whether each wedge's texture is flipped, shape (W,)
+            legs: Lengths of the two legs of each wedge, in world units, shape (W, 2)
+        """
+        self._queued.append((mesh, np.asarray(tri_ids), np.asarray(uvs, dtype=np.float64), list(wedges),
+                             np.asarray(flipped, dtype=bool), np.asarray(legs, dtype=np.float64)))
+
+    def _pair_cells(self, sizes: np.ndarray, flipped: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # First and second (or -1) wedge of each cell. Only wedges flipped the same way fill a cell together, and
+        # wedges of similar size are paired to waste the least space
+        if self.config.wedges_per_cell == 1:
+            return np.arange(len(sizes)), np.full(len(sizes), -1)
+
+        firsts, seconds = [], []
+        for flip in (False, True):
+            idxs = np.flatnonzero(flipped == flip)
+            idxs = idxs[np.argsort(sizes[idxs], kind='stable')]
+            second = np.full((len(idxs) + 1) // 2, -1)
+            second[:len(idxs) // 2] = idxs[1::2]
+            firsts.append(idxs[::2])
+            seconds.append(second)
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+    def pack(self):
+        """Packs every queued wedge into new atlases, bakes them, and sets the wedges' texture tiling"""
+        if not self._queued:
+            return
+
+        meshes = [mesh for mesh, _, _, _, _, _ in self._queued]
+        mesh_ids = np.concatenate([np.full(len(tri_ids), idx) for idx, (_, tri_ids, _, _, _, _) in
+                                   enumerate(self._queued)])
+        tri_ids = np.concatenate([tri_ids for _, tri_ids, _, _, _, _ in self._queued])
+        uvs = np.concatenate([uvs for _, _, uvs, _, _, _ in self._queued])
+        wedges = [wedge for _, _, _, queued, _, _ in self._queued for wedge in queued]
+        flipped = np.concatenate([flipped for _, _, _, _, flipped, _ in self._queued])
+        legs = np.concatenate([legs for _, _, _, _, _, legs in self._queued])
+        self._queued = []
+
+        sizes = self.config.cell_sizes(legs)
+        firsts, seconds = self._pair_cells(sizes, flipped)
+        cell_sizes = np.maximum(sizes[firsts], np.where(seconds >= 0, sizes[seconds], 0))
+        atlas_ids, cell_xs, cell_ys, sides = pack_cells(cell_sizes, self.config.atlas_size)
+
+        bakes = [TextureBake(side, self.backend) for side in sides]
+        for cell in np.argsort(atlas_ids, kind='stable').tolist():
+            bake = bakes[atlas_ids[cell]]
+            # The two wedges' bleed overlaps on the diagonal, so bake the first wedge last to keep its edge pixels
+            for member, rotated in ((seconds[cell], True), (firsts[cell], False)):
+                if member < 0:
+                    continue
 
-        self.bakes = [TextureBake(num_triangles_size, triangle_size, backend)]
-
-    def add_triangle(self, mesh: TowerMesh, tri_id: int, uvs: np.ndarray, wedge: TowerObject, flipped: bool) \
-            -> TriangleTextureInfo:
-        result = self.bakes[-1].add_triangle(mesh, tri_id, uvs, wedge, flipped)
-        if result is None:
-            self.bakes.append(TextureBake(self.num_triangles_size, self.triangle_size, self.backend))
-            return self.add_triangle(mesh, tri_id, uvs, wedge, flipped)
-
-        return result
-
-    def upload(self):
+                tex_info = bake.add_triangle(meshes[mesh_ids[member]], int(tri_ids[member]), uvs[member],
+                                             wedges[member], bool(flipped[member]), int(cell_xs[cell]),
+                                             int(cell_ys[cell]), int(cell_sizes[cell]), rotated)
+                tiling_value = {'x': tex_info.offset_x, 'y': tex_info.offset_y, 'z': tex_info.texture_scale}
+                wedges[member].set_property('properties.Tiling.Struct.value.Vector', tiling_value)
+
+        for bake in bakes:
+            bake.bake_pending()
+        self.bakes += bakes
+
+        used = int(np.sum(cell_sizes ** 2))
+        info(f'Packed {len(wedges)} wedges into {len(bakes)} texture atlases '
+             f'({used / sum(side * side for side in sides):.0%} of the atlas area in use)')
+
+    def upload(self, cache: UploadCache | None = None, manifest_path: str | None = None):
+        """
+        Uploads every texture atlas at once, skipping atlases that were already uploaded
+
+        Args:
+            cache: (Optional) Cache of uploads shared across runs
+            manifest_path: (Optional) Path to record the uploads of this collection in, so an interrupted upload can
+                be resumed
+        """
+        self.pack()
         for b in self.bakes:
-            b.upload()
+            b.bake_pending()
+
+        urls = upload_images([b.image for b in self.bakes], self.backend, cache, manifest_path)
+        for b, url in zip(self.bakes, urls):
+            b.set_url(url)
 
-NUM_TRIANGLES_SIZE = 10
-TRIANGLE_SIZE = 25
+# Canvas wedges are 50x50 units at scale 1, and lie flat (no thickness) at this scale along their local y axis
+_WEDGE_SIZE = 50
+_WEDGE_THICKNESS = 0.01
 
 def load_mesh(path) -> TowerMesh:
     return TowerMesh(o3d.io.read_triangle_mesh(path))
 
-def divide_triangle(face: np.ndarray, uvs: np.ndarray) -> (np.ndarray | None, np.ndarray | None):
+def divide_triangles(faces: np.ndarray, uvs: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Given a triangular face as input, divide it into two right triangles using the altitude
+    Divides triangular faces into two right triangles each using the altitude, all at once
+
+    The altitude used is the first one, starting from each face's first vertex, whose foot lands on the opposite side.
+    Degenerate (zero area) faces can't be divided
 
     Args:
-        face: List of triangle face's vertices
+        faces: Triangle faces' vertices, shape (F, 3, 3)
+        uvs: UV coordinates of the faces' vertices, shape (F, 3, 2)
 
     Returns:
-        Triangle subdivided into two right triangles (i.e., canvas wedges)
+        Mask of the faces that could be divided, shape (F,), and for those faces the vertices and UV coordinates of
+        the two right triangles, shapes (D, 2, 3, 3) and (D, 2, 3, 2). Each right triangle is ordered as the foot of
+        the altitude, then the other vertex of the side, then the vertex the altitude starts from
     """
-    for idx in range(3):
-        v0 = face[idx]
-        v1 = face[(idx + 1) % 3]
-        v2 = face[(idx + 2) % 3]
+    faces = np.asarray(faces, dtype=np.float64)
+    uvs = np.asarray(uvs, dtype=np.float64)
+
+    # Candidate altitudes from each vertex v0 onto the opposite side v1 -> v2, shape (F, 3, 3)
+    v0 = faces
+    v1 = np.roll(faces, -1, axis=1)
+    v2 = np.roll(faces, -2, axis=1)
+    opp_line = v2 - v1
+
+    # The foot of the altitude is the projection of v0 onto the opposite side
+    with np.errstate(divide='ignore', invalid='ignore'):
+        foot_coeffs = np.einsum('fki,fki->fk', v0 - v1, opp_line) / np.einsum('fki,fki->fk', opp_line, opp_line)
+    normals = np.cross(faces[:, 1] - faces[:, 0], faces[:, 2] - faces[:, 0])
+    non_degenerate = np.linalg.norm(normals, axis=1) > 0
+    candidates = (foot_coeffs >= 0) & (foot_coeffs <= 1) & non_degenerate[:, None]
+
+    divided = candidates.any(axis=1)
+    face_ids = np.flatnonzero(divided)
+    idx = np.argmax(candidates[divided], axis=1)
+    foot_coeff = foot_coeffs[face_ids, idx][:, None]
+    v0, v1, v2 = faces[face_ids, idx], faces[face_ids, (idx + 1) % 3], faces[face_ids, (idx + 2) % 3]
+    uv0, uv1, uv2 = uvs[face_ids, idx], uvs[face_ids, (idx + 1) % 3], uvs[face_ids, (idx + 2) % 3]
+
+    v3 = foot_coeff * (v2 - v1) + v1
+    uv3 = foot_coeff * uv2 + (1 - foot_coeff) * uv1
+    tris = np.stack([np.stack([v3, v1, v0], axis=1), np.stack([v3, v2, v0], axis=1)], axis=1)
+    tris_uvs = np.stack([np.stack([uv3, uv1, uv0], axis=1), np.stack([uv3, uv2, uv0], axis=1)], axis=1)
+    return divided, tris, tris_uvs
 
-        uv0 = uvs[idx]
-        uv1 = uvs[(idx + 1) % 3]
-        uv2 = uvs[(idx + 2) % 3]
+def divide_triangle(face: np.ndarray, uvs: np.ndarray) -> (np.ndarray | None, np.ndarray | None):
+    """
+    Given a triangular face as input, divide it into two right triangles using the altitude
 
-        opp_line = v2 - v1
-        perp = xyz(np.cross(opp_line, np.cross(v1 - v0, v2 - v0))).normalize()
+    Args:
+        face: List of triangle face's vertices
+        uvs: UV coordinates of the vertices
 
-        lin_op = np.transpose(np.array([opp_line, perp]))
-        b = v0 - v1
+    Returns:
+        Triangle subdivided into two right triangles (i.e., canvas wedges), and their UV coordinates
+    """
+    divided, tris, tris_uvs = divide_triangles(np.asarray(face)[None], np.asarray(uvs)[None])
+    if not divided[0]:
+        return None, None
+    return tris[0], tris_uvs[0]
 
-        try:
-            soln = np.dot(np.linalg.pinv(lin_op), np.array([[b[0]], [b[1]], [b[2]]]))
-        except np.linalg.LinAlgError:
-            continue
+def wedge_transforms(tris: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Computes the canvas wedge transforms matching right triangles, all at once
 
-        foot_coeff = soln[0][0]
-        if foot_coeff < 0 or foot_coeff > 1:
-            continue
+    Args:
+        tris: Right triangles as returned by divide_triangles, shape (W, 3, 3), with the right angle at the first vertex
 
-        v3 = foot_coeff * opp_line + v1
-        uv3 = foot_coeff * uv2 + (1 - foot_coeff) * uv1
-        return np.array([[v3, v1, v0], [v3, v2, v0]]), np.array([[uv3, uv1, uv0], [uv3, uv2, uv0]])
+    Returns:
+        Positions (W, 3), rotation quaternions (W, 4) and scales (W, 3) of the wedges
+    """
+    # First fix the coordinate system handedness
+    tris = np.asarray(tris, dtype=np.float64)[:, :, [1, 0, 2]]
+    right_angle, side_b, side_c = tris[:, 0], tris[:, 1], tris[:, 2]
+
+    # Scale from side lengths
+    ab_len = np.linalg.norm(side_b - right_angle, axis=1)
+    ac_len = np.linalg.norm(right_angle - side_c, axis=1)
+    scales = np.column_stack([ab_len / _WEDGE_SIZE, np.full(len(tris), _WEDGE_THICKNESS), ac_len / _WEDGE_SIZE])
+
+    # Rotation from the triangle's axes, as columns of the rotation matrix
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ab_dir = (side_b - right_angle) / ab_len[:, None]
+        ac_dir = (side_c - right_angle) / ac_len[:, None]
+        perp = np.cross(ab_dir, ac_dir)
+        perp /= np.linalg.norm(perp, axis=1)[:, None]
+    rot_matrices = np.stack([ab_dir, -perp, ac_dir], axis=2)
+
+    # Degenerate wedges (zero-length sides) are left unrotated
+    bad_rotation = ~np.isfinite(rot_matrices).all(axis=(1, 2))
+    rot_matrices[bad_rotation] = np.eye(3)
+    rot = R.from_matrix(rot_matrices)
+    rotations = rot.as_quat()
+    rotations[bad_rotation] = [0.0, 0.0, 0.0, 1.0]
+
+    # Translate so the wedge's centroid lands on the triangle's centroid
+    wedge_centroids = np.column_stack([-25 * scales[:, 0], np.zeros(len(tris)), 50 * scales[:, 2]]) / 3
+    wedge_centroids = np.where(bad_rotation[:, None], wedge_centroids, rot.apply(wedge_centroids))
+    positions = tris.sum(axis=1) / 3 - wedge_centroids
+
+    return positions, rotations, scales
+
+def _make_wedges(positions: np.ndarray, rotations: np.ndarray, scales: np.ndarray,
+                 colors: np.ndarray | None = None) -> list[TowerObject]:
+    # Materialize the canvas wedges from their transforms, once all the geometry is done
+    wedges = []
+    for idx in range(len(positions)):
+        wedge = _WEDGE_TEMPLATE.instantiate()
+        wedge.scale = xyz(scales[idx])
+        wedge.rotation = XYZW(rotations[idx])
+        wedge.position = xyz(positions[idx])
+        if colors is not None:
+            r, g, b = colors[idx].tolist()
+            wedge.set_property(COLOR_PATH, {'r': r, 'g': g, 'b': b, 'a': 1.0})
+        wedges.append(wedge)
+    return wedges
 
-    return None, None
+def _bake_wedges(wedges: list[TowerObject], mesh: TowerMesh, tri_ids: np.ndarray, tris_uvs: np.ndarray,
+                 scales: np.ndarray, bakes: TextureBakeCollection):
+    # Each face has two wedges, the second one flipped
+    flipped = np.arange(len(wedges)) % 2 == 1
+    bakes.add_wedges(mesh, np.repeat(tri_ids, 2), tris_uvs, wedges, flipped, scales[:, [0, 2]] * _WEDGE_SIZE)
 
 def convert_triangle(face: np.ndarray, tri_id: int, mesh: TowerMesh,
                      bakes: TextureBakeCollection, rgb: np.ndarray | None = None) -> list[TowerObject]:
     """
-    Given a triangular face, convert the face into one or two canvas wedges
+    Given a triangular face, convert the face into one or two canvas wedges. Their textures are packed and baked
+    when bakes is uploaded
 
     Args:
         face: List of triangle face's vertices
@@ -430,75 +743,52 @@ def convert_triangle(face: np.ndarray, tri_id: int, mesh: TowerMesh,
     Returns:
         List of TowerObject corresponding to the new canvas wedges
     """
-    uvs = mesh.get_uvs(tri_id)
-    tris, tris_uvs = divide_triangle(face, uvs)
-    if tris is None:
+    divided, tris, tris_uvs = divide_triangles(np.asarray(face)[None], mesh.get_uvs(tri_id)[None])
+    if not divided[0]:
         return []
 
-    flipped = False
-    wedges = []
-    for tri, tri_uvs in zip(tris, tris_uvs):
-        # First fix the coordinate system handedness
-        for vert in tri:
-            vert[0], vert[1] = vert[1], vert[0]
-
-        #TODO apply for UVs as well?
-
-        # Wedge object for triangle
-        wedge = TowerObject(item=WEDGE_ITEM_DATA, properties=WEDGE_PROPERTY_DATA)
-
-        # Scale from side lengths
-        scale = wedge.scale
-        scale[0] = xyz(tri[1]).distance(tri[0]) / 50
-        scale[1] = 0.01
-        scale[2] = xyz(tri[0]).distance(tri[2]) / 50
-        wedge.scale = scale
-
-        # Apply rotation
-        ab_dir = xyz(tri[1] - tri[0]).normalize()
-        ac_dir = xyz(tri[2] - tri[0]).normalize()
-        perp = xyz(np.cross(ab_dir, ac_dir)).normalize()
-        rot_matrix = np.matrix.transpose(np.array([ab_dir, -perp, ac_dir]))
-        rot = R.from_matrix(rot_matrix)
-        wedge.rotation = XYZW(rot.as_quat())
-
-        # Double-check rotation is non-zero or NAN
-        bad_rotation = False
-        if wedge.rotation.norm() < XYZ.EPSILON or np.isnan(wedge.rotation.norm()):
-            bad_rotation = True
-
-        if bad_rotation:
-            wedge.rotation = XYZW(0.0, 0.0, 0.0, 1.0)
-
-        # Translate to centroid
-        wedge_pos = np.array([[-25 * scale[0], 0, 0], [25 * scale[0], 0, 0], [-25 * scale[0], 0, 50 * scale[2]]],
-                             dtype=np.float64)
-
-        if not bad_rotation:
-            wedge_pos = rot.apply(wedge_pos)
-        wedge_centroid = np.sum(wedge_pos, axis=0) / 3
-        wedge.position -= wedge_centroid
-
-        tri_centroid = np.sum(tri, axis=0) / 3
-        wedge.position += tri_centroid
-
-        # Textures
-        tex_info = bakes.add_triangle(mesh, tri_id, tri_uvs, wedge, flipped)
-        tiling_value = {'x': tex_info.offset_x, 'y': tex_info.offset_y, 'z': tex_info.texture_scale}
-        wedge.set_property('properties.Tiling.Struct.value.Vector', tiling_value)
+    positions, rotations, scales = wedge_transforms(tris[0])
+    colors = None if rgb is None else np.repeat(np.asarray(rgb, dtype=np.float64)[None, :3], 2, axis=0)
+    wedges = _make_wedges(positions, rotations, scales, colors)
+    _bake_wedges(wedges, mesh, np.array([tri_id]), tris_uvs[0], scales, bakes)
+    return wedges
 
-        wedges.append(wedge)
 
-        flipped = not flipped
+def find_coincident_triangles(triangles: np.ndarray, tolerance: float = 1e-6) -> np.ndarray:
+    """
+    Finds faces that duplicate an earlier face, such as the back faces of doubled-up geometry, which would otherwise
+    convert to overlapping (z-fighting) wedges
+
+    Args:
+        triangles: Nx3x3 triangle vertices
+        tolerance: Maximum per-coordinate difference between matching vertices
 
-    if rgb is not None:
-        for wedge in wedges:
-            wedge.set_property(COLOR_PATH, {'r': rgb[0], 'g': rgb[1], 'b': rgb[2], 'a': 1.0})
+    Returns:
+        Boolean mask of the triangles with the same vertices (in any order) as a lower-indexed triangle
+    """
+    triangles = np.asarray(triangles, dtype=np.float64)
+    coincident = np.zeros(len(triangles), dtype=bool)
+    if len(triangles) < 2:
+        return coincident
 
-    return wedges
+    # Sort each triangle's vertices lexicographically so vertex order doesn't matter
+    order = np.lexsort((triangles[:, :, 2], triangles[:, :, 1], triangles[:, :, 0]))
+    canonical = np.take_along_axis(triangles, order[:, :, None], axis=1)
+
+    # Duplicates share a centroid, so pair up faces through a batched radius query on the centroids
+    centroids = triangles.mean(axis=1)
+    bvh = OctreeBVH.from_points(centroids)
+    tri_ids, other_ids = bvh.query_spheres(centroids, tolerance * math.sqrt(3))
+    earlier = other_ids < tri_ids
+    tri_ids, other_ids = tri_ids[earlier], other_ids[earlier]
+    same = np.all(np.abs(canonical[tri_ids] - canonical[other_ids]) <= tolerance, axis=(1, 2))
+    coincident[tri_ids[same]] = True
 
+    return coincident
 
-def convert_mesh(save: Suitebro, mesh: TowerMesh, offset=xyz(0, 0, 0)) -> Selection:
+
+def convert_mesh(save: Suitebro, mesh: TowerMesh, offset=xyz(0, 0, 0), backend: ResourceBackend | None = None,
+                 manifest_path: str | None = None, atlas: AtlasConfig | None = None) -> Selection:
     """
     Given a mesh as a list of faces, convert the mesh to TowerObjects (i.e., canvas wedges)
 
@@ -506,23 +796,43 @@ def convert_mesh(save: Suitebro, mesh: TowerMesh, offset=xyz(0, 0, 0)) -> Select
         save: Save to add the new TowerObjects to
         mesh: Mesh as a list of faces
         offset: (Optional) Positional offset to apply
+        backend: (Optional) Backend to upload the texture atlases to, defaults to Catbox
+        manifest_path: (Optional) Path to record the atlas uploads in, so rerunning an interrupted conversion only
+            uploads the missing atlases
+        atlas: (Optional) How to pack the wedges' textures into atlases, defaults to AtlasConfig()
 
     Returns:
         Selection of the converted mesh
     """
-    wedges = []
-    bakes = TextureBakeCollection(NUM_TRIANGLES_SIZE, TRIANGLE_SIZE, CatboxBackend())
-    for tri_id, face in enumerate(mesh.get_triangles()):
-        wedges += convert_triangle(face * 60, tri_id, mesh, bakes, rgb=mesh.get_triangle_color(tri_id))
-
-    # Fix mesh rotation
-    rotate.main(save, Selection(wedges), ParameterDict({'rotation': xyz(0, -90, 0), 'local': False}))
-
-    for wedge in wedges:
-        wedge.position += offset
-
-    # Upload texture bakes
-    bakes.upload()
+    if backend is None:
+        backend = CatboxBackend()
+
+    bakes = TextureBakeCollection(backend, atlas)
+    triangles = mesh.get_triangles()
+    coincident = find_coincident_triangles(triangles)
+    if coincident.any():
+        info(f'Skipping {int(coincident.sum())} coincident faces')
+
+    # Split every face into right triangles and compute all the wedge transforms as arrays
+    tri_ids = np.flatnonzero(~coincident)
+    divided, tris, tris_uvs = divide_triangles(triangles[tri_ids] * 60, mesh.triangle_uvs.reshape(-1, 3, 2)[tri_ids])
+    tri_ids = tri_ids[divided]
+    positions, rotations, scales = wedge_transforms(tris.reshape(-1, 3, 3))
+
+    # Fix mesh rotation, around the centroid of the wedges
+    if len(positions):
+        mesh_rot = R.from_euler('xyz', [0, -90, 0], degrees=True)
+        rotations = (mesh_rot * R.from_quat(rotations)).as_quat()
+        centroid = positions.mean(axis=0)
+        positions = mesh_rot.apply(positions - centroid) + centroid + np.asarray(offset, dtype=np.float64)
+
+    # Only now create the wedges themselves
+    colors = np.repeat(mesh.get_triangle_colors(tri_ids), 2, axis=0)
+    wedges = _make_wedges(positions, rotations, scales, colors)
+    _bake_wedges(wedges, mesh, tri_ids, tris_uvs.reshape(-1, 3, 2), scales, bakes)
+
+    # Upload texture bakes, reusing atlases uploaded by earlier conversions
+    bakes.upload(UploadCache(UPLOAD_CACHE_PATH), manifest_path)
 
     save.add_objects(wedges)
 
@@ -1,17 +1,22 @@
 from __future__ import annotations
 import copy
+import functools
 import re
 import uuid
-from typing import Any, cast, TypeAlias
+from typing import Any, cast, Iterable, Sequence, TypeAlias, TYPE_CHECKING
 
 from deprecated.sphinx import deprecated
 import numpy as np
 
 from .connections import ItemConnectionObject
 from .connections.connections import ItemConnectionData
-from .util import XYZ, XYZW, not_none, xyz
+from .util import XYZ, XYZW, clone_json, not_none, xyz
 
-from toolz import get_in, update_in
+from toolz import get_in
+
+if TYPE_CHECKING:
+    from .index import ObjectIndex
+    from .transforms import TransformStore
 
 ITEMCONNECTIONS_DEFAULT: dict[str, Any] = {
     "Array": {
@@ -54,7 +59,54 @@ def spec_keys(spec: str) -> Spec:
     return spec.split('.')
 
 
-def _exists(data, spec: Spec):
+def _get_path(data: dict[str, Any], spec: Sequence[str]) -> Any:
+    for key in spec:
+        data = data[key]
+    return data
+
+
+def _set_path(data: dict[str, Any], spec: Sequence[str], value: Any):
+    """
+    Sets the value at the end of spec in place, creating any missing intermediate dicts. Unlike toolz.update_in this
+    does not copy the dicts along the path, so the cost does not grow with the size of the object's properties
+
+    Args:
+        data: Dictionary to modify
+        spec: Path of keys to take through the dictionary
+        value: Value to set
+    """
+    for key in spec[:-1]:
+        child = data.get(key)
+        if child is None:
+            child = data[key] = {}
+        data = child
+    data[spec[-1]] = value
+
+
+def _set_path_cow(data: dict[str, Any], spec: Sequence[str], value: Any, owned: set[int]):
+    """
+    Like _set_path, but for trees that share sub-dicts with an ObjectTemplate: any dict along the path that is not in
+    owned is shallow-copied (and then owned) before being modified
+
+    Args:
+        data: Dictionary to modify, which must itself be owned
+        spec: Path of keys to take through the dictionary
+        value: Value to set
+        owned: ids of the dicts owned by the tree
+    """
+    for key in spec[:-1]:
+        child = data.get(key)
+        if child is None:
+            child = data[key] = {}
+            owned.add(id(child))
+        elif id(child) not in owned:
+            child = data[key] = dict(child)
+            owned.add(id(child))
+        data = child
+    data[spec[-1]] = value
+
+
+def _exists(data, spec: Sequence[str]):
     if data is None:
         return False
 
@@ -78,6 +130,7 @@ _RESPAWN_SPEC = spec_keys('properties.RespawnLocation')
 _RESPAWN_TRANSLATION_SPEC = spec_keys(f'properties.RespawnLocation.{_sv}.{_s("Translation")}.{_sv}.Vector')
 _RESPAWN_ROTATION_SPEC = spec_keys(f'properties.RespawnLocation.{_sv}.{_s("Rotation")}.{_sv}.Quat')
 _RESPAWN_SCALE3D_SPEC = spec_keys(f'properties.RespawnLocation.{_sv}.{_s("Scale3D")}.{_sv}.Vector')
+_WORLD_SCALE_PARENT_SPEC = spec_keys('properties.WorldScale')
 _WORLD_SCALE_SPEC = spec_keys(f'properties.WorldScale.{_sv}.Vector')
 _ITEM_CONNECTIONS_PARENT_SPEC = spec_keys(f'properties.ItemConnections')
 _ITEM_CONNECTIONS_SPEC = spec_keys(f'properties.ItemConnections.{_av}.{_sv}')
@@ -90,24 +143,253 @@ _URL_SPEC = spec_keys(f'properties.URL.{_stv}')
 _UUID_PATTERN = re.compile('^' + '-'.join([fr'[\da-f]{{{d}}}' for d in [8, 4, 4, 4, 12]]) + '$')
 
 
-def _preprocess_path(path: Spec | str) -> Spec:
+@functools.lru_cache(maxsize=1024)
+def _compile_path(path: str) -> tuple[str, ...]:
+    spec = tuple(spec_keys(path))
+    return spec if spec[0] == 'properties' else ('properties',) + spec
+
+
+def _preprocess_path(path: Spec | str) -> Sequence[str]:
     if isinstance(path, str):
-        path = spec_keys(path)
+        return _compile_path(path)
 
     if path[0] != 'properties':
         path = ['properties'] + path
 
     return path
 
+def _world_scale_default() -> dict[str, Any]:
+    return {'Struct': {'struct_type': 'Vector', 'struct_id': '00000000-0000-0000-0000-000000000000'}}
+
+
 def _preprocess_value(value: Any) -> Any:
     if isinstance(value, XYZ):
         value = value.to_dict()
 
     return value
 
+
+# Shapes a typed property value can resolve to, see _resolve_shape
+_VALUE_KIND = 'value'
+_VECTOR_KIND = 'vector'
+_DICT_KIND = 'dict'
+
+_MISSING = object()
+
+
+def _resolve_shape(entry: Any) -> tuple[tuple[str, ...], str]:
+    """
+    Works out where the typed value lives inside a property entry, for example ('Int', 'value') for
+    {'Int': {'value': 3}} or ('Struct', 'value', 'Vector') for a vector struct
+
+    Args:
+        entry: Property entry to inspect
+
+    Returns:
+        Tuple of the key path from the entry to the value, and the kind of value found there
+    """
+    suffix = []
+    while isinstance(entry, dict) and (len(entry) == 1 or 'value' in entry):
+        key = 'value' if 'value' in entry else next(iter(entry))
+        suffix.append(key)
+        entry = entry[key]
+
+    if not isinstance(entry, dict):
+        return tuple(suffix), _VALUE_KIND
+    if 'x' in entry and 'y' in entry and 'z' in entry:
+        return tuple(suffix), _VECTOR_KIND
+    return tuple(suffix), _DICT_KIND
+
+
+def _matches_kind(value: Any, kind: str) -> bool:
+    if kind == _VALUE_KIND:
+        return not isinstance(value, dict)
+    if kind == _VECTOR_KIND:
+        return isinstance(value, dict) and 'x' in value and 'y' in value and 'z' in value
+    return isinstance(value, dict) and len(value) != 1 and 'value' not in value
+
+
+def _vector_from_dict(data: dict[str, Any]) -> XYZ:
+    vector = [data['x'], data['y'], data['z']]
+    if 'w' in data:
+        vector.append(data['w'])
+    return xyz(vector)
+
+
+class PropertyAccessor:
+    """
+    Reads and writes a single property path on many TowerObjects
+
+    The path is compiled once, and where the typed value sits inside the property entry (Int.value,
+    Struct.value.Vector, Name.value, ...) is resolved on the first hit and reused for later objects, only being
+    resolved again when an object's entry has a different shape.
+    """
+
+    def __init__(self, path: Sequence[str] | str):
+        """
+        Args:
+            path: Either a list of string keys or a period-separated string representing the path to the property.
+                For example, "ItemCustomName", "properties.ItemCustomName" or "properties.ItemCustomName.Name.value"
+        """
+        self.spec: tuple[str, ...] = tuple(_preprocess_path(path if isinstance(path, str) else list(path)))
+        self._suffix: tuple[str, ...] | None = None
+        self._kind = _VALUE_KIND
+
+    def _lookup(self, obj: TowerObject) -> Any:
+        data = obj.properties if obj.properties is not None else obj.item
+        if data is None:
+            return _MISSING
+
+        try:
+            entry = _get_path(data, self.spec)
+        except (KeyError, TypeError, IndexError):
+            return _MISSING
+
+        if self._suffix is not None:
+            try:
+                value = _get_path(entry, self._suffix)
+                if _matches_kind(value, self._kind):
+                    return value
+            except (KeyError, TypeError, IndexError):
+                pass
+
+        self._suffix, self._kind = _resolve_shape(entry)
+        return _get_path(entry, self._suffix)
+
+    def get(self, obj: TowerObject, default: Any = None) -> Any:
+        """
+        Args:
+            obj: Object to read the property from
+            default: Value to return when the object does not have the property
+
+        Returns:
+            The property value, as an XYZ/XYZW for vectors and quaternions, or the raw dict when the value could not
+            be resolved any further
+        """
+        value = self._lookup(obj)
+        if value is _MISSING:
+            return default
+
+        return _vector_from_dict(value) if self._kind == _VECTOR_KIND else value
+
+    def set(self, obj: TowerObject, value: Any):
+        """
+        Sets the property value in both the item and properties sections, at the same location get() reads from.
+        When neither this object nor any previous one had the property, the value is set at the path itself
+
+        Args:
+            obj: Object to modify
+            value: Value to set
+        """
+        self._lookup(obj)
+        spec = list(self.spec + (self._suffix or ()))
+        if obj.item is not None:
+            obj.set_property(spec, value)
+        else:
+            obj.set_meta_property(spec, value)
+
+    def get_many(self, objects: Iterable[TowerObject], default: Any = None) -> np.ndarray:
+        """
+        Reads the property from every object, in iteration order
+
+        Args:
+            objects: Objects to read the property from, e.g. a Selection
+            default: Value to use for objects that do not have the property
+
+        Returns:
+            An Nx3 (Nx4 for quaternions) float array for vector properties, a 1D numeric array for number/bool
+            properties, and otherwise a 1D object array
+        """
+        values = []
+        all_vectors = True
+        for obj in objects:
+            value = self._lookup(obj)
+            all_vectors = all_vectors and value is not _MISSING and self._kind == _VECTOR_KIND
+            values.append(value if value is not _MISSING else default)
+
+        if values and all_vectors:
+            rows = [(v['x'], v['y'], v['z'], v['w']) if 'w' in v else (v['x'], v['y'], v['z']) for v in values]
+            try:
+                return np.array(rows, dtype=np.float64)
+            except ValueError:
+                # Mix of vectors and quaternions
+                values = [_vector_from_dict(v) for v in values]
+        else:
+            values = [_vector_from_dict(v) if _matches_kind(v, _VECTOR_KIND) else v for v in values]
+
+        if values and all(isinstance(v, (bool, int, float)) for v in values):
+            return np.array(values)
+
+        result = np.empty(len(values), dtype=object)
+        for idx, value in enumerate(values):
+            result[idx] = value
+        return result
+
+
+class ObjectTemplate:
+    """
+    Item and properties data to stamp out many similar TowerObjects from, copy-on-write
+
+    Each instance only gets its own copy of the top two levels of the item and properties dictionaries (the dicts
+    themselves and their "properties" dicts). Everything below is shared with the template until it is modified
+    through TowerObject's setters, which copy the shared dicts along the modified path first. Replacing a whole
+    property entry directly (obj.properties['properties'][name] = ...) is also safe, but deeper in-place modification
+    of a shared entry would affect every instance.
+    """
+
+    def __init__(self, item: dict[str, Any] | None, properties: dict[str, Any] | None):
+        """
+        Args:
+            item: The item section to stamp out. It is copied, so later changes to it do not affect the template
+            properties: The properties section to stamp out, also copied
+        """
+        self.item = clone_json(item)
+        self.properties = clone_json(properties)
+
+    @staticmethod
+    def _own_top(data: dict[str, Any] | None, owned: set[int]) -> dict[str, Any] | None:
+        if data is None:
+            return None
+
+        data = dict(data)
+        owned.add(id(data))
+        if isinstance(data.get('properties'), dict):
+            data['properties'] = dict(data['properties'])
+            owned.add(id(data['properties']))
+        return data
+
+    def instantiate(self) -> TowerObject:
+        """
+        Returns:
+            New TowerObject sharing its nested data with the template, with a newly generated GUID
+        """
+        owned: set[int] = set()
+        obj = TowerObject(item=self._own_top(self.item, owned), properties=self._own_top(self.properties, owned),
+                          nocopy=True)
+        obj._owned = owned
+        if obj.item is not None:
+            obj.guid = str(uuid.uuid4()).lower()
+        return obj
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_accessor(path: tuple[str, ...] | str) -> PropertyAccessor:
+    return PropertyAccessor(path)
+
+
 class TowerObject:
     """Represents an object appearing in the Suitebro file. This includes all the sections of the object."""
 
+    # Columnar transform store this object is bound to, see Suitebro.transforms
+    _store: TransformStore | None = None
+    _store_index: int = -1
+
+    # Name/group index of the save this object is in, see Suitebro.index
+    _index: ObjectIndex | None = None
+
+    # ids of the dicts this object owns when its item/properties share sub-dicts with an ObjectTemplate, else None
+    _owned: set[int] | None = None
+
     def __init__(self, item: dict[str, Any] | None = None, properties: dict[str, Any] | None = None,
                  nocopy: bool = False):
         """
@@ -127,13 +409,19 @@ class TowerObject:
             return
 
         # Deep copy dicts
-        self.item = copy.deepcopy(item)
-        self.properties = copy.deepcopy(properties)
+        self.item = clone_json(item)
+        self.properties = clone_json(properties)
 
         # Generate new UUID4
         if self.item is not None:
             self.guid = str(uuid.uuid4()).lower()
 
+    def _set_path(self, data: dict[str, Any], spec: Sequence[str], value: Any):
+        if self._owned is None:
+            _set_path(data, spec, value)
+        else:
+            _set_path_cow(data, spec, value, self._owned)
+
     def get_property(self, path: Spec | str) -> Any | None:
         """
         Gets property value
@@ -146,46 +434,7 @@ class TowerObject:
         Returns:
             Value at path or None
         """
-        if isinstance(path, str):
-            path = spec_keys(path)
-
-        if path[0] != 'properties':
-            path = ['properties'] + path
-
-        if self.properties is not None:
-            prelim_result = get_in(path, self.properties, default=None)
-        else:
-            prelim_result = get_in(path, self.item, default=None)
-
-        if not isinstance(prelim_result, dict):
-            return prelim_result
-
-        # Walk the dict to try to figure out what this is
-        # Case 1: we were given a field without the Type.value suffix
-        while len(prelim_result) == 1 or 'value' in prelim_result:
-            if 'value' in prelim_result:
-                prelim_result = prelim_result['value']
-            else:
-                prelim_result = prelim_result.pop(prelim_result.keys()[0])
-
-        if not isinstance(prelim_result, dict):
-            return prelim_result
-
-        # Case 2: value is Vector or Label or TODO Struct or array
-        if len(prelim_result) == 1 and 'Vector' in prelim_result:
-            prelim_result = prelim_result['Vector']
-        elif len(prelim_result) == 1 and 'Label' in prelim_result:
-            return prelim_result['Label']
-
-        # Check if we're in a Vector
-        if isinstance(prelim_result, dict) and 'x' in prelim_result and 'y' in prelim_result and 'z' in prelim_result:
-            vector_data = [prelim_result['x'], prelim_result['y'], prelim_result['z']]
-            if 'w' in prelim_result:
-                vector_data.append(prelim_result['w'])
-            return xyz(vector_data)
-
-        # At this point we give up and just return a dict
-        return prelim_result
+        return _cached_accessor(path if isinstance(path, str) else tuple(path)).get(self)
 
     def set_property(self, path: Spec | str, value: Any):
         """
@@ -203,9 +452,22 @@ class TowerObject:
         spec = _preprocess_path(path)
         value = _preprocess_value(value)
 
-        self.item = update_in(self.item, spec, lambda _: value)
+        # Writes that can change the group ID or custom name have to move this object in the save's index too
+        index = self._index
+        key = tuple(spec[:2])
+        moves_group = index is not None and key == tuple(_GROUP_ID_SPEC[:2])
+        moves_name = index is not None and key == tuple(_CUSTOM_NAME_SPEC[:2])
+        old_group_id = self.group_id if moves_group else -1
+        old_name = self.custom_name if moves_name else ''
+
+        self._set_path(self.item, spec, value)
         if self.properties is not None:
-            self.set_meta_property(spec, value)
+            self._set_path(self.properties, spec, value)
+
+        if moves_group:
+            index.move_group(self, old_group_id, self.group_id)
+        if moves_name:
+            index.move_custom_name(self, old_name, self.custom_name)
 
     def set_meta_property(self, path: Spec | str, value: Any):
         """
@@ -223,7 +485,7 @@ class TowerObject:
         spec = _preprocess_path(path)
         value = _preprocess_value(value)
 
-        self.properties = update_in(self.properties, spec, lambda _: value)
+        self._set_path(self.properties, spec, value)
 
     def is_canvas(self) -> bool:
         """
@@ -278,7 +540,10 @@ class TowerObject:
     @property
     def group_id(self) -> int:
         """TowerObject's Group ID"""
-        return get_in(_GROUP_ID_SPEC, self.item, default=-1)
+        try:
+            return _get_path(self.item, _GROUP_ID_SPEC)
+        except (KeyError, TypeError):
+            return -1
 
     @group_id.setter
     def group_id(self, value: int):
@@ -286,6 +551,9 @@ class TowerObject:
 
     def ungroup(self):
         """Clears the group info attached to this object, effectively un-grouping it"""
+        if self._index is not None:
+            self._index.move_group(self, self.group_id, -1)
+
         if _exists(self.item, _GROUP_ID_SPEC):
             del self.item['properties']['GroupID']
 
@@ -299,6 +567,9 @@ class TowerObject:
         Returns:
             Copy of this TowerObject instance
         """
+        if self._store is not None:
+            self._store.sync_object(self)
+
         copied = TowerObject(item=self.item, properties=self.properties)
         return copied
 
@@ -316,7 +587,7 @@ class TowerObject:
         self.item['guid'] = value
 
     def _get_xyz(self, spec: Spec, meta: bool = False):
-        vec_data = get_in(spec, self.item if not meta else self.properties, no_default=True)
+        vec_data = _get_path(self.item if not meta else self.properties, spec)
         vector = [vec_data['x'], vec_data['y'], vec_data['z']]
         if 'w' in vec_data:
             vector.append(vec_data['w'])
@@ -325,10 +596,10 @@ class TowerObject:
 
     def _set_xyz(self, spec: Spec, value: XYZ, meta: bool = False):
         vector_dict = value.to_dict()
-        self.item = update_in(self.item, spec, lambda _: vector_dict)
+        self._set_path(self.item, spec, vector_dict)
 
         if meta and self.properties is not None:
-            self.properties = update_in(self.properties, spec, lambda _: vector_dict)
+            self._set_path(self.properties, spec, vector_dict)
 
     @property
     def metadata_scale(self) -> float:
@@ -339,10 +610,18 @@ class TowerObject:
     @property
     def position(self) -> XYZ | None:
         """World position"""
+        if self._store is not None:
+            return self._store.get_position(self._store_index)
         return self._get_xyz(_POS_SPEC) if self.item is not None else None
 
     @position.setter
     def position(self, value: XYZ):
+        if self._store is not None:
+            self._store.set_position(self._store_index, value)
+        else:
+            self._write_position(value)
+
+    def _write_position(self, value: XYZ):
         self._set_xyz(_POS_SPEC, value)
 
         if _exists(self.item, _RESPAWN_SPEC):
@@ -354,10 +633,18 @@ class TowerObject:
     @property
     def rotation(self) -> XYZW | None:
         """Rotation quaternion"""
+        if self._store is not None:
+            return self._store.get_rotation(self._store_index)
         return self._get_xyz(_ROT_SPEC) if self.item is not None else None
 
     @rotation.setter
     def rotation(self, value: XYZW):
+        if self._store is not None:
+            self._store.set_rotation(self._store_index, value)
+        else:
+            self._write_rotation(value)
+
+    def _write_rotation(self, value: XYZW):
         self._set_xyz(_ROT_SPEC, value)
 
         if _exists(self.item, _RESPAWN_SPEC):
@@ -369,21 +656,24 @@ class TowerObject:
     @property
     def scale(self) -> XYZ | None:
         """Local scale"""
+        if self._store is not None:
+            return self._store.get_scale(self._store_index)
         return self._get_xyz(_SCALE_SPEC) if self.item is not None else None
 
     @scale.setter
     def scale(self, value: XYZ):
+        if self._store is not None:
+            self._store.set_scale(self._store_index, value)
+        else:
+            self._write_scale(value)
+
+    def _write_scale(self, value: XYZ):
         self._set_xyz(_SCALE_SPEC, value)
 
-        if not _exists(self.item, spec_keys('properties.WorldScale')) and self.item is not None:
-            self.item = update_in(self.item, spec_keys('properties.WorldScale.Struct.struct_type'), lambda _: 'Vector')
-            self.item = update_in(self.item, spec_keys('properties.WorldScale.Struct.struct_id'),
-                                  lambda _: '00000000-0000-0000-0000-000000000000')
-        if not _exists(self.properties, spec_keys('properties.WorldScale')) and self.properties is not None:
-            self.properties = update_in(self.properties, spec_keys('properties.WorldScale.Struct.struct_type'),
-                                        lambda _: 'Vector')
-            self.properties = update_in(self.properties, spec_keys('properties.WorldScale.Struct.struct_id'),
-                                        lambda _: '00000000-0000-0000-0000-000000000000')
+        if not _exists(self.item, _WORLD_SCALE_PARENT_SPEC) and self.item is not None:
+            self._set_path(self.item, _WORLD_SCALE_PARENT_SPEC, _world_scale_default())
+        if not _exists(self.properties, _WORLD_SCALE_PARENT_SPEC) and self.properties is not None:
+            self._set_path(self.properties, _WORLD_SCALE_PARENT_SPEC, _world_scale_default())
 
         self._set_xyz(_WORLD_SCALE_SPEC, value / self.metadata_scale, meta=True)
 
@@ -414,12 +704,10 @@ class TowerObject:
 
     def _check_connetions(self):
         if not _exists(self.item, _ITEM_CONNECTIONS_SPEC):
-            self.item = update_in(self.item, _ITEM_CONNECTIONS_PARENT_SPEC,
-                                  lambda _: copy.deepcopy(ITEMCONNECTIONS_DEFAULT))
-        
+            self._set_path(self.item, _ITEM_CONNECTIONS_PARENT_SPEC, clone_json(ITEMCONNECTIONS_DEFAULT))
+
         if self.properties is not None and not _exists(self.properties, _ITEM_CONNECTIONS_SPEC):
-            self.properties = update_in(self.properties, _ITEM_CONNECTIONS_PARENT_SPEC,
-                                  lambda _: copy.deepcopy(ITEMCONNECTIONS_DEFAULT))
+            self._set_path(self.properties, _ITEM_CONNECTIONS_PARENT_SPEC, clone_json(ITEMCONNECTIONS_DEFAULT))
 
     def add_connection(self, con: ItemConnectionObject):
         """
@@ -431,7 +719,8 @@ class TowerObject:
         assert self.item is not None
         self._check_connetions()
 
-        connections = get_in(_ITEM_CONNECTIONS_SPEC, self.item, no_default=True)
+        # Copy rather than append in place, since the list may be shared with an ObjectTemplate
+        connections = list(get_in(_ITEM_CONNECTIONS_SPEC, self.item, no_default=True))
         connections.append(con.to_dict())
         self.set_property(_ITEM_CONNECTIONS_SPEC, connections)
 
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from collections.abc import MutableSequence
+from typing import Callable, Iterable, Iterator, overload, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .object import TowerObject
+
+
+class ObjectList(MutableSequence['TowerObject']):
+    """
+    Ordered collection of TowerObjects with O(1) membership tests, appends and removals
+
+    Behaves like a list of objects (iteration order, len, indexing, slicing, append/extend/remove/+=), but is backed by
+    an insertion-ordered dict keyed by object identity, so removing an object from a large save no longer scans the
+    whole list. Positional access and insertion in the middle materialize a list, which is cached until the next
+    change. An object can only appear once.
+
+    Every change is reported to the owner through on_change, so that whatever indexes the objects (like the Suitebro's
+    ObjectIndex and TransformStore) stays in sync, whichever list method made the change.
+    """
+
+    def __init__(self, objects: Iterable[TowerObject] = (),
+                 on_change: Callable[[list[TowerObject], list[TowerObject], bool], None] | None = None):
+        """
+        Args:
+            objects: (Optional) Initial objects, in order. Duplicates are dropped
+            on_change: (Optional) Called after every change with the objects added, the objects removed, and whether
+                the objects kept were reordered or objects were added anywhere but the end. Not called for the initial
+                objects
+        """
+        self._objects: dict[TowerObject, None] = dict.fromkeys(objects)
+        self._list: list[TowerObject] | None = None
+        self._on_change = on_change
+
+    def _as_list(self) -> list[TowerObject]:
+        if self._list is None:
+            self._list = list(self._objects)
+        return self._list
+
+    def _changed(self, added: list[TowerObject], removed: list[TowerObject], reordered: bool = False):
+        self._list = None
+        if self._on_change is not None and (added or removed or reordered):
+            self._on_change(added, removed, reordered)
+
+    def _replace(self, objects: Iterable[TowerObject]):
+        old = self._objects
+        self._objects = new = dict.fromkeys(objects)
+
+        removed = [obj for obj in old if obj not in new]
+        added = [obj for obj in new if obj not in old]
+
+        # Still in order if the kept objects are in their old order, followed by the added ones
+        kept = [obj for obj in old if obj in new]
+        reordered = list(new) != kept + added
+        self._changed(added, removed, reordered)
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def __iter__(self) -> Iterator[TowerObject]:
+        return iter(self._objects)
+
+    def __reversed__(self) -> Iterator[TowerObject]:
+        return reversed(self._objects)
+
+    def __contains__(self, obj: object) -> bool:
+        return obj in self._objects
+
+    @overload
+    def __getitem__(self, idx: int) -> TowerObject: ...
+
+    @overload
+    def __getitem__(self, idx: slice) -> list[TowerObject]: ...
+
+    def __getitem__(self, idx):
+        return self._as_list()[idx]
+
+    def __setitem__(self, idx, value):
+        objects = self._as_list().copy()
+        objects[idx] = value
+        self._replace(objects)
+
+    def __delitem__(self, idx):
+        if isinstance(idx, int):
+            self.remove(self._as_list()[idx])
+            return
+
+        objects = self._as_list().copy()
+        del objects[idx]
+        self._replace(objects)
+
+    def insert(self, idx: int, obj: TowerObject):
+        if idx >= len(self._objects):
+            self.append(obj)
+            return
+
+        objects = [x for x in self._as_list() if x is not obj]
+        objects.insert(idx, obj)
+        self._replace(objects)
+
+    def append(self, obj: TowerObject):
+        if obj in self._objects:
+            return
+
+        self._objects[obj] = None
+        self._changed([obj], [])
+
+    def extend(self, objects: Iterable[TowerObject]):
+        added = [obj for obj in dict.fromkeys(objects) if obj not in self._objects]
+        self._objects.update(dict.fromkeys(added))
+        self._changed(added, [])
+
+    def __iadd__(self, objects: Iterable[TowerObject]) -> ObjectList:
+        self.extend(objects)
+        return self
+
+    def __add__(self, objects: Iterable[TowerObject]) -> list[TowerObject]:
+        return list(self._objects) + list(objects)
+
+    def remove(self, obj: TowerObject):
+        """
+        Raises:
+            ValueError: If obj is not in the collection
+        """
+        try:
+            del self._objects[obj]
+        except KeyError:
+            raise ValueError(f'{obj} is not in the object list') from None
+        self._changed([], [obj])
+
+    def discard(self, obj: TowerObject) -> bool:
+        """
+        Removes obj if present
+
+        Returns:
+            Whether obj was removed
+        """
+        if self._objects.pop(obj, self) is self:
+            return False
+        self._changed([], [obj])
+        return True
+
+    def remove_all(self, objects: Iterable[TowerObject]) -> list[TowerObject]:
+        """
+        Removes every object in objects that is present
+
+        Returns:
+            The objects that were removed
+        """
+        removed = [obj for obj in objects if self._objects.pop(obj, self) is not self]
+        self._changed([], removed)
+        return removed
+
+    def index(self, obj: TowerObject, start: int = 0, stop: int | None = None) -> int:
+        if obj not in self._objects:
+            raise ValueError(f'{obj} is not in the object list')
+        return self._as_list().index(obj, start, len(self._objects) if stop is None else stop)
+
+    def count(self, obj: TowerObject) -> int:
+        return 1 if obj in self._objects else 0
+
+    def clear(self):
+        removed = list(self._objects)
+        self._objects.clear()
+        self._changed([], removed)
+
+    def reverse(self):
+        self._replace(reversed(self._as_list()))
+
+    def sort(self, *, key=None, reverse: bool = False):
+        self._replace(sorted(self._objects, key=key, reverse=reverse))
+
+    def copy(self) -> list[TowerObject]:
+        return list(self._objects)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ObjectList):
+            return list(self._objects) == list(other._objects)
+        if isinstance(other, list):
+            return list(self._objects) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self._objects))
@@ -0,0 +1,564 @@
+from __future__ import annotations
+
+import heapq
+import math
+
+import numpy as np
+
+from .util import XYZ
+
+# Morton codes interleave 21 bits per axis into a uint64, so the octree is at most 21 levels deep
+_MAX_DEPTH = 21
+_GRID_SIZE = 1 << _MAX_DEPTH
+
+# Pending (inserted but not yet indexed) items are scanned by every query, so rebuild once there are this many or
+#  more than a quarter of the indexed items
+_MIN_PENDING_REBUILD = 1024
+
+
+def _part1by2(x: np.ndarray) -> np.ndarray:
+    x = x & np.uint64(0x1fffff)
+    x = (x | x << np.uint64(32)) & np.uint64(0x1f00000000ffff)
+    x = (x | x << np.uint64(16)) & np.uint64(0x1f0000ff0000ff)
+    x = (x | x << np.uint64(8)) & np.uint64(0x100f00f00f00f00f)
+    x = (x | x << np.uint64(4)) & np.uint64(0x10c30c30c30c30c3)
+    x = (x | x << np.uint64(2)) & np.uint64(0x1249249249249249)
+    return x
+
+
+def morton_codes(points: np.ndarray, origin: np.ndarray, size: float) -> np.ndarray:
+    """
+    Args:
+        points: Nx3 points
+        origin: Minimum corner of the cube the codes are relative to
+        size: Side length of the cube
+
+    Returns:
+        Morton (z-order) code of each point, with points outside the cube clamped onto it. At every level the octant
+        index is x_bit | y_bit << 1 | z_bit << 2
+    """
+    cells = np.floor((points - origin) * (_GRID_SIZE / size))
+    cells = np.clip(cells, 0, _GRID_SIZE - 1).astype(np.uint64)
+    return _part1by2(cells[:, 0]) | _part1by2(cells[:, 1]) << np.uint64(1) | _part1by2(cells[:, 2]) << np.uint64(2)
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenation of np.arange(start, end) for each pair, without a Python loop"""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.intp)
+
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return np.arange(total, dtype=np.intp) + offsets
+
+
+def _box_overlap(mins: np.ndarray, maxs: np.ndarray, box_min: np.ndarray, box_max: np.ndarray) -> np.ndarray:
+    return np.all((mins <= box_max) & (maxs >= box_min), axis=-1)
+
+
+def _box_dist2(mins: np.ndarray, maxs: np.ndarray, point: np.ndarray) -> np.ndarray:
+    """Squared distance from point to each AABB (0 inside)"""
+    delta = np.maximum(np.maximum(mins - point, point - maxs), 0.0)
+    return np.einsum('ij,ij->i', delta, delta)
+
+
+def _ray_box(mins: np.ndarray, maxs: np.ndarray, origin: np.ndarray, inv_dir: np.ndarray,
+             max_distance: float) -> tuple[np.ndarray, np.ndarray]:
+    """Slab test. Returns a hit mask and the entry distance for each AABB"""
+    with np.errstate(invalid='ignore'):
+        t1 = (mins - origin) * inv_dir
+        t2 = (maxs - origin) * inv_dir
+    # fmin/fmax skip the NaNs from 0 * inf, i.e. rays parallel to a slab starting on its boundary
+    t_near = np.fmax.reduce(np.fmin(t1, t2), axis=-1)
+    t_far = np.fmin.reduce(np.fmax(t1, t2), axis=-1)
+    t_near = np.maximum(t_near, 0.0)
+    return (t_near <= t_far) & (t_near <= max_distance), t_near
+
+
+def ray_triangles(triangles: np.ndarray, origin: np.ndarray, direction: np.ndarray) -> np.ndarray:
+    """
+    Vectorized Moller-Trumbore ray/triangle intersection
+
+    Args:
+        triangles: Nx3x3 triangle vertices
+        origin: Ray origin
+        direction: Ray direction
+
+    Returns:
+        Distance along the ray (in units of direction) to each triangle, or inf where the ray misses
+    """
+    v0 = triangles[:, 0]
+    edge1 = triangles[:, 1] - v0
+    edge2 = triangles[:, 2] - v0
+    p = np.cross(direction, edge2)
+    det = np.einsum('ij,ij->i', edge1, p)
+    valid = np.abs(det) > 1e-12
+    inv_det = np.divide(1.0, det, out=np.zeros_like(det), where=valid)
+
+    s = origin - v0
+    u = np.einsum('ij,ij->i', s, p) * inv_det
+    q = np.cross(s, edge1)
+    v = (q @ direction) * inv_det
+    t = np.einsum('ij,ij->i', edge2, q) * inv_det
+
+    hit = valid & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0)
+    return np.where(hit, t, np.inf)
+
+
+class OctreeBVH:
+    """
+    Linear octree over axis-aligned bounding boxes (points being zero-size boxes), doubling as a BVH
+
+    Items are ordered along a Morton curve by their centroid and the octree is built level by level over that order,
+    so bulk builds stay in NumPy. Each node also stores the tight bounds of the items below it, which is what queries
+    test against, so boxes that stick out of their octant (e.g. mesh triangles) are still found.
+
+    Items inserted after a build are kept in a pending list that queries scan directly, and are merged in by a rebuild
+    once the list grows past a fraction of the tree. Items are identified by ids handed out in insertion order,
+    starting at 0 for the first bulk-built item.
+    """
+
+    def __init__(self, centroid: XYZ | None = None, size: float | None = None, leaf_size: int = 16):
+        """
+        Args:
+            centroid: (Optional) Center of the initial root cube. The root is grown to fit the items on each build
+            size: (Optional) Side length of the initial root cube
+            leaf_size: Maximum number of items per leaf (unless the maximum depth is reached)
+        """
+        self.leaf_size = leaf_size
+        self._hint: tuple[np.ndarray, float] | None = None
+        if centroid is not None and size is not None:
+            self._hint = (np.asarray(centroid, dtype=np.float64) - size / 2, float(size))
+
+        # All items by id
+        self._item_mins = np.empty((0, 3), dtype=np.float64)
+        self._item_maxs = np.empty((0, 3), dtype=np.float64)
+        self._triangles: np.ndarray | None = None
+        self._num_items = 0
+
+        # Indexed items, in Morton order
+        self._ids = np.empty(0, dtype=np.intp)
+        self._mins = self._item_mins
+        self._maxs = self._item_maxs
+
+        # Nodes (node 0 is the root)
+        self._node_start = np.zeros(1, dtype=np.intp)
+        self._node_end = np.zeros(1, dtype=np.intp)
+        self._node_first_child = np.zeros(1, dtype=np.intp)
+        self._node_num_children = np.zeros(1, dtype=np.intp)
+        self._node_leaf = np.ones(1, dtype=bool)
+        self._node_min = np.full((1, 3), np.inf)
+        self._node_max = np.full((1, 3), -np.inf)
+
+    # region construction
+    @classmethod
+    def from_points(cls, points: np.ndarray, leaf_size: int = 16) -> OctreeBVH:
+        """
+        Args:
+            points: Nx3 points, which get ids 0..N-1
+            leaf_size: Maximum number of items per leaf
+
+        Returns:
+            New OctreeBVH over the points
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        return cls.from_aabbs(points, points, leaf_size)
+
+    @classmethod
+    def from_aabbs(cls, mins: np.ndarray, maxs: np.ndarray, leaf_size: int = 16) -> OctreeBVH:
+        """
+        Args:
+            mins: Nx3 minimum corners, for items with ids 0..N-1
+            maxs: Nx3 maximum corners
+            leaf_size: Maximum number of items per leaf
+
+        Returns:
+            New OctreeBVH over the boxes
+        """
+        bvh = cls(leaf_size=leaf_size)
+        bvh._item_mins = np.array(mins, dtype=np.float64).reshape(-1, 3)
+        bvh._item_maxs = bvh._item_mins if maxs is mins else np.array(maxs, dtype=np.float64).reshape(-1, 3)
+        bvh._num_items = len(bvh._item_mins)
+        bvh.rebuild()
+        return bvh
+
+    @classmethod
+    def from_triangles(cls, triangles: np.ndarray, leaf_size: int = 8) -> OctreeBVH:
+        """
+        Args:
+            triangles: Nx3x3 triangle vertices, for items with ids 0..N-1
+            leaf_size: Maximum number of items per leaf
+
+        Returns:
+            New OctreeBVH over the triangles' bounding boxes, which ray_cast() intersects against the triangles
+        """
+        triangles = np.array(triangles, dtype=np.float64).reshape(-1, 3, 3)
+        bvh = cls.from_aabbs(triangles.min(axis=1), triangles.max(axis=1), leaf_size)
+        bvh._triangles = triangles
+        return bvh
+
+    def rebuild(self):
+        """Re-indexes every item, including pending ones"""
+        n = self._num_items
+        mins = self._item_mins[:n]
+        maxs = self._item_maxs[:n]
+        self._ids = np.arange(n, dtype=np.intp)
+        self._mins = mins
+        self._maxs = maxs
+        if n == 0:
+            return
+
+        # Points are stored as zero-size boxes sharing one array, so only sort that once
+        points = mins is maxs or np.array_equal(mins, maxs)
+
+        # Root cube: fit the item centroids (and the initial hint)
+        centroids = mins if points else (mins + maxs) / 2
+        lo = centroids.min(axis=0)
+        hi = centroids.max(axis=0)
+        if self._hint is not None:
+            lo = np.minimum(lo, self._hint[0])
+            hi = np.maximum(hi, self._hint[0] + self._hint[1])
+        size = max(float(np.max(hi - lo)), XYZ.EPSILON) * (1 + 1e-9)
+
+        codes = morton_codes(centroids, lo, size)
+        order = np.argsort(codes)
+        codes = codes[order]
+        self._ids = order
+        self._mins = mins[order]
+        self._maxs = self._mins if points else maxs[order]
+
+        # Split level by level, all nodes of a level at once. The children of a node get consecutive ids
+        starts = [np.zeros(1, dtype=np.intp)]
+        ends = [np.full(1, n, dtype=np.intp)]
+        splits = []  # (split node ids, their first child ids, their child counts) per level
+
+        level_start, level_end, level_prefix = starts[0], ends[0], np.zeros(1, dtype=np.uint64)
+        level_ids = np.zeros(1, dtype=np.intp)
+        num_nodes = 1
+        for level in range(_MAX_DEPTH):
+            split = level_end - level_start > self.leaf_size
+            if not split.any():
+                break
+
+            s, e, prefix = level_start[split], level_end[split], level_prefix[split]
+            shift = np.uint64(3 * (_MAX_DEPTH - level - 1))
+            child_prefix = (prefix[:, None] << np.uint64(3)) + np.arange(8, dtype=np.uint64)
+            bounds = np.empty((len(s), 9), dtype=np.intp)
+            bounds[:, 0] = s
+            bounds[:, 8] = e
+            bounds[:, 1:8] = np.searchsorted(codes, child_prefix[:, 1:] << shift)
+
+            child_s = bounds[:, :8].ravel()
+            child_e = bounds[:, 1:].ravel()
+            nonempty = child_e > child_s
+            counts = nonempty.reshape(-1, 8).sum(axis=1)
+            splits.append((level_ids[split], num_nodes + np.cumsum(counts) - counts, counts))
+
+            level_start, level_end = child_s[nonempty], child_e[nonempty]
+            level_prefix = child_prefix.ravel()[nonempty]
+            level_ids = np.arange(num_nodes, num_nodes + len(level_start), dtype=np.intp)
+            num_nodes += len(level_start)
+            starts.append(level_start)
+            ends.append(level_end)
+
+        self._node_start = np.concatenate(starts)
+        self._node_end = np.concatenate(ends)
+        self._node_first_child = np.zeros(num_nodes, dtype=np.intp)
+        self._node_num_children = np.zeros(num_nodes, dtype=np.intp)
+        for parent_ids, first_child, counts in splits:
+            self._node_first_child[parent_ids] = first_child
+            self._node_num_children[parent_ids] = counts
+        self._node_leaf = self._node_num_children == 0
+
+        # Tight bounds: leaves from their item ranges (leaves partition the items), then internal nodes bottom-up
+        #  from their (consecutive) children
+        self._node_min = np.empty((num_nodes, 3), dtype=np.float64)
+        self._node_max = np.empty((num_nodes, 3), dtype=np.float64)
+        leaves = np.flatnonzero(self._node_leaf)
+        leaves = leaves[np.argsort(self._node_start[leaves])]
+        leaf_starts = self._node_start[leaves]
+        self._node_min[leaves] = np.minimum.reduceat(self._mins, leaf_starts, axis=0)
+        self._node_max[leaves] = np.maximum.reduceat(self._maxs, leaf_starts, axis=0)
+        for parent_ids, first_child, counts in reversed(splits):
+            children = slice(first_child[0], first_child[-1] + counts[-1])
+            offsets = first_child - first_child[0]
+            self._node_min[parent_ids] = np.minimum.reduceat(self._node_min[children], offsets, axis=0)
+            self._node_max[parent_ids] = np.maximum.reduceat(self._node_max[children], offsets, axis=0)
+
+    def _children(self, nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the children of nodes, and for each child the index into nodes of its parent"""
+        counts = self._node_num_children[nodes]
+        first = self._node_first_child[nodes]
+        return _ranges(first, first + counts), np.repeat(np.arange(len(nodes), dtype=np.intp), counts)
+
+    def _append(self, mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+        n = self._num_items
+        count = len(mins)
+        if n + count > len(self._item_mins) or self._item_mins is self._item_maxs:
+            capacity = max(n + count, 2 * len(self._item_mins), 64)
+            for attr in ('_item_mins', '_item_maxs'):
+                old = getattr(self, attr)
+                new = np.empty((capacity, 3), dtype=np.float64)
+                new[:n] = old[:n]
+                setattr(self, attr, new)
+
+        self._item_mins[n:n + count] = mins
+        self._item_maxs[n:n + count] = maxs
+        self._num_items += count
+
+        if self._num_items - self._indexed > max(_MIN_PENDING_REBUILD, self._indexed // 4):
+            self.rebuild()
+        return np.arange(n, n + count, dtype=np.intp)
+
+    def add_point(self, point: XYZ) -> int:
+        """
+        Args:
+            point: Point to insert
+
+        Returns:
+            id of the new item
+        """
+        if self._triangles is not None:
+            raise ValueError('Cannot add points to a triangle OctreeBVH, use add_triangle')
+        point = np.asarray(point, dtype=np.float64).reshape(1, 3)
+        return int(self._append(point, point)[0])
+
+    def add_aabb(self, min_pos: XYZ, max_pos: XYZ) -> int:
+        """
+        Args:
+            min_pos: Minimum corner of the box to insert
+            max_pos: Maximum corner of the box to insert
+
+        Returns:
+            id of the new item
+        """
+        if self._triangles is not None:
+            raise ValueError('Cannot add boxes to a triangle OctreeBVH, use add_triangle')
+        return int(self._append(np.asarray(min_pos, dtype=np.float64).reshape(1, 3),
+                                np.asarray(max_pos, dtype=np.float64).reshape(1, 3))[0])
+
+    def add_triangle(self, triangle: np.ndarray) -> int:
+        """
+        Args:
+            triangle: 3x3 triangle vertices to insert
+
+        Returns:
+            id of the new item
+        """
+        triangle = np.asarray(triangle, dtype=np.float64).reshape(1, 3, 3)
+        if self._triangles is None:
+            if self._num_items > 0:
+                raise ValueError('Cannot add triangles to a point/box OctreeBVH')
+            self._triangles = np.empty((0, 3, 3), dtype=np.float64)
+
+        self._triangles = np.concatenate([self._triangles, triangle])
+        return int(self._append(triangle.min(axis=1), triangle.max(axis=1))[0])
+
+    # endregion
+
+    def __len__(self) -> int:
+        return self._num_items
+
+    @property
+    def _indexed(self) -> int:
+        return len(self._ids)
+
+    def _pending(self) -> np.ndarray:
+        return np.arange(self._indexed, self._num_items, dtype=np.intp)
+
+    def _traverse(self, node_test, item_test) -> np.ndarray:
+        """
+        Level-synchronous traversal. node_test(mins, maxs) returns (overlap, contained) masks for nodes, and
+        item_test(mins, maxs) an overlap mask for items. Returns the matching ids, pending items included
+        """
+        found = []
+        frontier = np.zeros(1, dtype=np.intp)
+        while frontier.size and self._indexed:
+            overlap, contained = node_test(self._node_min[frontier], self._node_max[frontier])
+            leaf = self._node_leaf[frontier]
+
+            whole = frontier[overlap & contained]
+            found.append(self._ids[_ranges(self._node_start[whole], self._node_end[whole])])
+
+            partial_leaves = frontier[overlap & ~contained & leaf]
+            idx = _ranges(self._node_start[partial_leaves], self._node_end[partial_leaves])
+            found.append(self._ids[idx[item_test(self._mins[idx], self._maxs[idx])]])
+
+            frontier, _ = self._children(frontier[overlap & ~contained & ~leaf])
+
+        pending = self._pending()
+        found.append(pending[item_test(self._item_mins[pending], self._item_maxs[pending])])
+        return np.concatenate(found)
+
+    def query_box(self, min_pos: XYZ, max_pos: XYZ) -> np.ndarray:
+        """
+        Args:
+            min_pos: Minimum corner of the query box
+            max_pos: Maximum corner of the query box
+
+        Returns:
+            ids of the items whose bounds intersect the box (boundary inclusive), in no particular order
+        """
+        box_min = np.asarray(min_pos, dtype=np.float64)
+        box_max = np.asarray(max_pos, dtype=np.float64)
+
+        def node_test(mins, maxs):
+            return (_box_overlap(mins, maxs, box_min, box_max),
+                    np.all((mins >= box_min) & (maxs <= box_max), axis=1))
+
+        return self._traverse(node_test, lambda mins, maxs: _box_overlap(mins, maxs, box_min, box_max))
+
+    def query_sphere(self, center: XYZ, radius: float) -> np.ndarray:
+        """
+        Args:
+            center: Center of the query sphere
+            radius: Radius of the query sphere
+
+        Returns:
+            ids of the items whose bounds intersect the sphere (boundary inclusive), in no particular order
+        """
+        center = np.asarray(center, dtype=np.float64)
+        r2 = radius * radius
+
+        def node_test(mins, maxs):
+            far = np.maximum(np.abs(mins - center), np.abs(maxs - center))
+            return _box_dist2(mins, maxs, center) <= r2, np.einsum('ij,ij->i', far, far) <= r2
+
+        return self._traverse(node_test, lambda mins, maxs: _box_dist2(mins, maxs, center) <= r2)
+
+    def query_spheres(self, centers: np.ndarray, radius: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Batched query_sphere, traversing the tree once for all the spheres. Pending items are merged in first
+
+        Args:
+            centers: Nx3 sphere centers
+            radius: Radius shared by every sphere
+
+        Returns:
+            Tuple of two equal-length arrays (sphere index, item id), one entry per item intersecting a sphere
+        """
+        if self._num_items > self._indexed:
+            self.rebuild()
+
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        r2 = radius * radius
+        found_queries = []
+        found_ids = []
+
+        queries = np.arange(len(centers), dtype=np.intp)
+        nodes = np.zeros(len(centers), dtype=np.intp)
+        while queries.size and self._indexed:
+            points = centers[queries]
+            delta = np.maximum(np.maximum(self._node_min[nodes] - points, points - self._node_max[nodes]), 0.0)
+            overlap = np.einsum('ij,ij->i', delta, delta) <= r2
+            queries, nodes = queries[overlap], nodes[overlap]
+            leaf = self._node_leaf[nodes]
+
+            starts, ends = self._node_start[nodes[leaf]], self._node_end[nodes[leaf]]
+            idx = _ranges(starts, ends)
+            idx_queries = np.repeat(queries[leaf], ends - starts)
+            points = centers[idx_queries]
+            delta = np.maximum(np.maximum(self._mins[idx] - points, points - self._maxs[idx]), 0.0)
+            hit = np.einsum('ij,ij->i', delta, delta) <= r2
+            found_queries.append(idx_queries[hit])
+            found_ids.append(self._ids[idx[hit]])
+
+            nodes, parents = self._children(nodes[~leaf])
+            queries = queries[~leaf][parents]
+
+        if not found_ids:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        return np.concatenate(found_queries), np.concatenate(found_ids)
+
+    def nearest(self, point: XYZ, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Best-first k-nearest-neighbour search
+
+        Args:
+            point: Query point
+            k: Number of neighbours
+
+        Returns:
+            Tuple of the ids of the (up to) k items closest to point, closest first, and their distances. The
+            distance to a box is 0 inside it
+        """
+        point = np.asarray(point, dtype=np.float64)
+        heap: list[tuple[float, int, int]] = []  # (squared distance, is_node, node index or item id)
+
+        pending = self._pending()
+        for dist2, item_id in zip(_box_dist2(self._item_mins[pending], self._item_maxs[pending], point), pending):
+            heap.append((float(dist2), 0, int(item_id)))
+        if self._indexed:
+            heap.append((float(_box_dist2(self._node_min[:1], self._node_max[:1], point)[0]), 1, 0))
+        heapq.heapify(heap)
+
+        ids: list[int] = []
+        dists: list[float] = []
+        while heap and len(ids) < k:
+            dist2, is_node, index = heapq.heappop(heap)
+            if not is_node:
+                ids.append(index)
+                dists.append(math.sqrt(dist2))
+                continue
+
+            if not self._node_leaf[index]:
+                first = int(self._node_first_child[index])
+                children = slice(first, first + self._node_num_children[index])
+                child_dist2 = _box_dist2(self._node_min[children], self._node_max[children], point)
+                for child, child_d2 in enumerate(child_dist2.tolist(), first):
+                    heapq.heappush(heap, (child_d2, 1, child))
+            else:
+                s, e = self._node_start[index], self._node_end[index]
+                item_dist2 = _box_dist2(self._mins[s:e], self._maxs[s:e], point)
+                for item_d2, item_id in zip(item_dist2.tolist(), self._ids[s:e].tolist()):
+                    heapq.heappush(heap, (item_d2, 0, item_id))
+
+        return np.array(ids, dtype=np.intp), np.array(dists, dtype=np.float64)
+
+    def ray_cast(self, origin: XYZ, direction: XYZ, max_distance: float = np.inf) -> tuple[int, float] | None:
+        """
+        Casts a ray against the items: the triangles for a tree built from triangles, otherwise the item bounds
+
+        Args:
+            origin: Ray origin
+            direction: Ray direction (need not be normalized)
+            max_distance: Maximum distance along the ray, in units of direction
+
+        Returns:
+            Tuple of the id of the first item hit and the distance along the ray to it, or None if nothing is hit
+        """
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        with np.errstate(divide='ignore'):
+            inv_dir = 1.0 / direction
+
+        best_id, best_t = -1, float(max_distance)
+
+        def hit_items(ids: np.ndarray, mins: np.ndarray, maxs: np.ndarray):
+            nonlocal best_id, best_t
+            hit, t = _ray_box(mins, maxs, origin, inv_dir, best_t)
+            ids, t = ids[hit], t[hit]
+            if self._triangles is not None and ids.size:
+                t = ray_triangles(self._triangles[ids], origin, direction)
+            if t.size:
+                x = int(np.argmin(t))
+                if np.isfinite(t[x]) and t[x] <= best_t:
+                    best_id, best_t = int(ids[x]), float(t[x])
+
+        pending = self._pending()
+        hit_items(pending, self._item_mins[pending], self._item_maxs[pending])
+
+        frontier = np.zeros(1, dtype=np.intp) if self._indexed else np.empty(0, dtype=np.intp)
+        while frontier.size:
+            hit, _ = _ray_box(self._node_min[frontier], self._node_max[frontier], origin, inv_dir, best_t)
+            frontier = frontier[hit]
+            leaf = self._node_leaf[frontier]
+
+            leaves = frontier[leaf]
+            idx = _ranges(self._node_start[leaves], self._node_end[leaves])
+            hit_items(self._ids[idx], self._mins[idx], self._maxs[idx])
+
+            frontier, _ = self._children(frontier[~leaf])
+
+        return (best_id, best_t) if best_id >= 0 else None
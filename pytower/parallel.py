@@ -0,0 +1,134 @@
+from concurrent.futures import ProcessPoolExecutor
+from types import ModuleType
+from typing import Any, Sequence
+
+from . import serializer, suitebro
+from .object import TowerObject
+from .selection import Selection
+from .suitebro import Suitebro
+from .tool_lib import import_tool_module
+from .util import gc_paused, not_none
+
+# Chunks handed to each worker per task. More chunks balance uneven groups better, fewer cut IPC overhead
+_CHUNKS_PER_JOB = 4
+
+# Set in each worker process by _init_worker
+_worker_tool: ModuleType | None = None
+_worker_params: Any = None
+
+
+def _init_worker(tool_path: str, params: Any):
+    global _worker_tool, _worker_params
+
+    _worker_tool = import_tool_module(tool_path)
+    _worker_params = params
+
+
+def _run_groups(payload: bytes) -> bytes:
+    """
+    Worker task: runs the tool on each group of the payload
+
+    Args:
+        payload: Serialized list of groups, each a list of [item, properties] pairs
+
+    Returns:
+        Serialized list of [group index, object index, item, properties] for every object the tool changed
+    """
+    tool = not_none(_worker_tool)
+    changed = []
+    # The payload and objects are plain acyclic json trees, so collecting while they are built only wastes time
+    with gc_paused():
+        # Second, untouched copy to tell which objects the tool changed
+        originals = serializer.loads(payload)
+        for group_idx, group in enumerate(serializer.loads(payload)):
+            objs = [TowerObject(item=item, properties=properties, nocopy=True) for item, properties in group]
+
+            # Stand-in save holding just this group, for tools that look at the save or the active save
+            save = Suitebro('worker', '.', {'items': [], 'properties': []})
+            save.add_objects(objs)
+            suitebro._active_save = save
+
+            tool.main(save, Selection(objs), _worker_params)
+
+            if save._transforms is not None:
+                save._transforms.sync()
+            for obj_idx, (obj, (item, properties)) in enumerate(zip(objs, originals[group_idx])):
+                if obj.item != item or obj.properties != properties:
+                    changed.append([group_idx, obj_idx, obj.item, obj.properties])
+
+    return serializer.dumps(changed)
+
+
+def _chunk_groups(groups: Sequence[list[TowerObject]], num_chunks: int) -> list[list[list[TowerObject]]]:
+    # Split into contiguous chunks of roughly equal object count
+    target = max(1, sum(len(group) for group in groups) // num_chunks)
+    chunks: list[list[list[TowerObject]]] = []
+    chunk: list[list[TowerObject]] = []
+    size = 0
+    for group in groups:
+        chunk.append(group)
+        size += len(group)
+        if size >= target:
+            chunks.append(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _merge(save: Suitebro, obj: TowerObject, item: dict[str, Any] | None, properties: dict[str, Any] | None):
+    index = save._index if obj._index is save._index else None
+    if index is not None:
+        old_group_id = obj.group_id
+        old_custom_name = obj.custom_name
+
+    obj.item = item
+    obj.properties = properties
+    obj._owned = None
+
+    if index is not None:
+        index.move_group(obj, old_group_id, obj.group_id)
+        index.move_custom_name(obj, old_custom_name, obj.custom_name)
+
+
+def run_per_group(save: Suitebro, tool_path: str, groups: Sequence[Selection], params: Any, jobs: int) -> int:
+    """
+    Runs a tool once per group in a pool of worker processes, merging the objects each run changed back into the save
+
+    Only tools that declare PARALLEL_SAFE = True should be run this way: each worker only sees (copies of) the objects
+    of the groups it was handed, so changes to anything else, including objects added to or removed from the save,
+    are lost
+
+    Args:
+        save: Save the groups belong to
+        tool_path: Path to the tool script
+        groups: Selections to run the tool on, one run each
+        params: Tool parameters
+        jobs: Number of worker processes
+
+    Returns:
+        Number of objects changed
+    """
+    if save._transforms is not None:
+        save._transforms.sync()
+
+    ordered = [list(group) for group in groups if group]
+    chunks = _chunk_groups(ordered, jobs * _CHUNKS_PER_JOB)
+    with gc_paused():
+        payloads = [serializer.dumps([[[obj.item, obj.properties] for obj in group] for group in chunk])
+                    for chunk in chunks]
+
+    changed: list[TowerObject] = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(tool_path, params)) as pool:
+        for chunk, result in zip(chunks, pool.map(_run_groups, payloads)):
+            with gc_paused():
+                result = serializer.loads(result)
+            for group_idx, obj_idx, item, properties in result:
+                obj = chunk[group_idx][obj_idx]
+                _merge(save, obj, item, properties)
+                changed.append(obj)
+
+    if save._transforms is not None:
+        save._transforms.reload(changed)
+    return len(changed)
@@ -0,0 +1,127 @@
+import os
+from dataclasses import dataclass, field
+from typing import Any
+
+import yaml
+
+
+# Separates the stages of a pipeline on the command line: pytower run translate -@ ... then rotate -@ ...
+STAGE_SEPARATOR = 'then'
+
+
+@dataclass
+class PipelineStage:
+    """One tool run of a pipeline, with its own selection and parameters"""
+    tool: str
+    selection: str = 'items'
+    parameters: list[str] = field(default_factory=list)
+    per_group: bool = False
+    invert: bool = False
+    invert_full: bool = False
+    num_runs: int = 1
+    jobs: int = 1
+
+    @staticmethod
+    def from_args(args: dict[str, Any]) -> 'PipelineStage':
+        """
+        Args:
+            args: Parsed stage arguments, as returned by parse_args
+
+        Returns:
+            The stage described by the arguments
+        """
+        return PipelineStage(args['tool'], args['selection'], args['parameters'], args['per_group'], args['invert'],
+                             args['invert-full'], args['num_runs'], args['jobs'])
+
+
+def split_stage_args(argv: list[str]) -> tuple[list[str], list[list[str]]]:
+    """
+    Splits the arguments of a multi-stage `pytower run` at each STAGE_SEPARATOR
+
+    Args:
+        argv: Command line arguments, without the program name
+
+    Returns:
+        Arguments up to the first separator, and the arguments of each following stage
+    """
+    if not argv or argv[0] != 'run' or STAGE_SEPARATOR not in argv:
+        return argv, []
+
+    segments: list[list[str]] = [[]]
+    for arg in argv:
+        if arg == STAGE_SEPARATOR:
+            segments.append([])
+        else:
+            segments[-1].append(arg)
+
+    return segments[0], segments[1:]
+
+
+def _recipe_parameter(name: str, value: Any) -> str:
+    # Parameters are cast with the dtype the tool declares, so turn YAML values back into command line strings
+    if isinstance(value, bool):
+        value = 'true' if value else ''  # bool('') is the only falsy string
+    elif isinstance(value, (list, tuple)):
+        value = ','.join(str(x) for x in value)
+    return f'{name}={value}'
+
+
+def _recipe_stage(data: dict[str, Any] | str, idx: int) -> PipelineStage:
+    if isinstance(data, str):
+        return PipelineStage(data)
+    if not isinstance(data, dict) or 'tool' not in data:
+        raise ValueError(f'Stage {idx + 1} needs a tool')
+
+    params = data.get('params', data.get('parameters', []))
+    if isinstance(params, dict):
+        params = [_recipe_parameter(name, value) for name, value in params.items()]
+    elif isinstance(params, list):
+        params = [str(param) for param in params]
+    else:
+        raise ValueError(f'Parameters of stage {idx + 1} must be a mapping or a list of "parameter=value" strings')
+
+    return PipelineStage(tool=str(data['tool']),
+                         selection=str(data.get('select', data.get('selection', 'items'))),
+                         parameters=params,
+                         per_group=bool(data.get('per_group', False)),
+                         invert=bool(data.get('invert', False)),
+                         invert_full=bool(data.get('invert_full', False)),
+                         num_runs=int(data.get('num_runs', 1)),
+                         jobs=int(data.get('jobs', 1)))
+
+
+def load_recipe(path: str) -> list[PipelineStage]:
+    """
+    Loads pipeline stages from a YAML or JSON recipe file, e.g.
+
+        stages:
+          - tool: translate
+            params: {offset: [0, 0, 100]}
+          - tool: rotate
+            select: group:3
+            per_group: true
+            params: {rotation: [0, 0, 45]}
+          - seturl
+
+    Stages can also be given as a top-level list. Besides tool, every key is optional: select, params (a mapping, or
+    a list of "parameter=value" strings), per_group, invert, invert_full, num_runs and jobs
+
+    Args:
+        path: Path to the recipe file
+
+    Returns:
+        The stages, in order
+
+    Raises:
+        ValueError: If the recipe is malformed
+    """
+    with open(path, 'r') as fd:
+        # YAML is a superset of JSON, so this reads both
+        data = yaml.safe_load(fd)
+
+    if isinstance(data, dict):
+        data = data.get('stages')
+    if not isinstance(data, list) or not data:
+        raise ValueError(f'{os.path.basename(path)} does not list any stages')
+
+    return [_recipe_stage(stage, idx) for idx, stage in enumerate(data)]
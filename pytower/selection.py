@@ -1,24 +1,50 @@
 import copy
 import itertools
 import random
-from typing import Any
+from typing import Any, Iterable
+
+import numpy as np
 
 from .object import TowerObject
 
 from abc import ABC, abstractmethod
 import re
 
-from .util import XYZ, xyz
+from .index import ObjectIndex
+from .spatial import SpatialIndex, box_contains, sphere_contains
+from .util import XYZ, XYZW
 
+_TRANSFORM_ATTRS = {'position': (XYZ, 3), 'rotation': (XYZW, 4), 'scale': (XYZ, 3)}
 
-class Selection(set[TowerObject]):
-    @staticmethod
-    def _group_key(obj: TowerObject):
-        return obj.group_id
 
+def _gather(objs: list[TowerObject], attr: str) -> np.ndarray:
+    # Fast path: every object lives in the same columnar store, so just index the column
+    store = objs[0]._store if objs else None
+    if store is not None and all(obj._store is store for obj in objs):
+        return getattr(store, f'{attr}s')[store.indices(objs)]
+
+    _, width = _TRANSFORM_ATTRS[attr]
+    data = np.empty((len(objs), width), dtype=np.float64)
+    for idx, obj in enumerate(objs):
+        data[idx] = getattr(obj, attr)
+    return data
+
+
+def _scatter(objs: list[TowerObject], attr: str, values: np.ndarray):
+    store = objs[0]._store if objs else None
+    if store is not None and all(obj._store is store for obj in objs):
+        getattr(store, f'set_{attr}s')(store.indices(objs), values)
+        return
+
+    vec_type, _ = _TRANSFORM_ATTRS[attr]
+    for obj, row in zip(objs, values):
+        setattr(obj, attr, row.view(vec_type))
+
+
+class Selection(set[TowerObject]):
     @property
     def group_id(self) -> int:
-        return self.groups().pop()[0]
+        return next(iter(self.group_map()))
 
     @group_id.setter
     def group_id(self, value: int):
@@ -31,12 +57,76 @@ class Selection(set[TowerObject]):
 
     @property
     def centroid(self) -> XYZ:
-        centroid = xyz(0.0, 0.0, 0.0)
-        for obj in self:
-            centroid += obj.position
+        positions = _gather(self._items(), 'position')
+        return positions.mean(axis=0).view(XYZ)
 
-        centroid /= len(self)
-        return centroid
+    def _items(self) -> list[TowerObject]:
+        return [obj for obj in self if obj.item is not None]
+
+    def translate(self, offset: XYZ, local: bool = False):
+        """
+        Translates every item in the selection at once
+
+        Args:
+            offset: Translation offset
+            local: Whether to interpret the offset in each object's local coordinates instead of world coordinates
+        """
+        objs = self._items()
+        if not objs:
+            return
+
+        positions = _gather(objs, 'position')
+        if local:
+            from scipy.spatial.transform import Rotation as R
+            positions += R.from_quat(_gather(objs, 'rotation')).apply(np.asarray(offset, dtype=np.float64))
+        else:
+            positions += np.asarray(offset, dtype=np.float64)
+
+        _scatter(objs, 'position', positions)
+
+    def rotate(self, rotation: XYZ, pivot: XYZ | None = None, local: bool = False, degrees: bool = True):
+        """
+        Rotates every item in the selection at once
+
+        Args:
+            rotation: Rotation to perform, in xyz Euler angles
+            pivot: (Optional) Point to rotate positions around, defaults to the centroid
+            local: Whether to only rotate each object in place, leaving positions untouched
+            degrees: Whether the Euler angles are in degrees (default) or radians
+        """
+        from scipy.spatial.transform import Rotation as R
+
+        objs = self._items()
+        if not objs:
+            return
+
+        r = R.from_euler('xyz', np.asarray(rotation, dtype=np.float64), degrees=degrees)
+        rotations = (r * R.from_quat(_gather(objs, 'rotation'))).as_quat()
+        _scatter(objs, 'rotation', rotations)
+
+        if not local:
+            positions = _gather(objs, 'position')
+            origin = positions.mean(axis=0) if pivot is None else np.asarray(pivot, dtype=np.float64)
+            _scatter(objs, 'position', r.apply(positions - origin) + origin)
+
+    def scale(self, factor: float | XYZ, pivot: XYZ | None = None):
+        """
+        Scales every item in the selection at once, both in size and in distance from the pivot
+
+        Args:
+            factor: Scaling factor, either uniform or per-axis
+            pivot: (Optional) Point to scale positions around, defaults to the centroid
+        """
+        objs = self._items()
+        if not objs:
+            return
+
+        factor = np.asarray(factor, dtype=np.float64)
+        positions = _gather(objs, 'position')
+        origin = positions.mean(axis=0) if pivot is None else np.asarray(pivot, dtype=np.float64)
+
+        _scatter(objs, 'position', (positions - origin) * factor + origin)
+        _scatter(objs, 'scale', _gather(objs, 'scale') * factor)
 
     def group(self) -> int:
         """Creates a new group based on the selection
@@ -47,13 +137,31 @@ class Selection(set[TowerObject]):
         from .suitebro import get_active_save
         return get_active_save().group(self)
 
+    def group_map(self) -> dict[int, 'Selection']:
+        """
+        Groups the selection in a single pass, without sorting
+
+        Returns:
+            Groups present in the Selection, as a dict of group ID to the Selection of its objects. Ungrouped objects
+            are left out
+        """
+        members: dict[int, list[TowerObject]] = {}
+        for obj in self:
+            group_id = obj.group_id
+            if group_id >= 0:
+                group = members.get(group_id)
+                if group is None:
+                    members[group_id] = [obj]
+                else:
+                    group.append(obj)
+        return {group_id: Selection(group) for group_id, group in members.items()}
+
     def groups(self) -> set[tuple[int, 'Selection']]:
         """
         Returns:
             Groups present in the Selection, as a set of tuples in the form (group_id: int, sel: Selection)
         """
-        data = sorted(filter(lambda obj: obj.group_id >= 0, self), key=Selection._group_key)
-        return {(group_id, Selection(group)) for group_id, group in itertools.groupby(data, Selection._group_key)}
+        return set(self.group_map().items())
 
     def ungrouped(self) -> 'Selection':
         """
@@ -78,6 +186,11 @@ class Selection(set[TowerObject]):
         return next(iter(self)) if len(self) != 0 else None
 
     def to_dict(self) -> dict:
+        # Bring the dicts of objects in a columnar store up to date before serializing them
+        for obj in self:
+            if obj._store is not None:
+                obj._store.sync_object(obj)
+
         sorted = list(self)
         sorted.sort()
 
@@ -197,43 +310,94 @@ class Selector(ABC):
         return f'{self.name}[{self_vars}]'
 
 
-class NameSelector(Selector):
+class _IndexedSelector(Selector, ABC):
+    """Selector that uses the active save's name/group index when selecting from most of the save"""
+
+    # Below this fraction of the save, scanning the input directly is cheaper than looking up the index and
+    #  intersecting the result
+    _INDEX_MIN_FRACTION = 0.125
+
+    @abstractmethod
+    def _matches(self, obj: TowerObject) -> bool:
+        pass
+
+    @abstractmethod
+    def _lookup(self, index: ObjectIndex) -> Iterable[TowerObject]:
+        """Returns a superset of the indexed objects that match"""
+        pass
+
+    def select(self, everything: Selection) -> Selection:
+        from .suitebro import get_active_save
+
+        save = get_active_save()
+        if save is None or len(everything) < self._INDEX_MIN_FRACTION * len(save.objects):
+            return Selection({obj for obj in everything if self._matches(obj)})
+
+        index = save.index
+        selected = Selection({obj for obj in self._lookup(index) if obj in everything and self._matches(obj)})
+
+        # Objects that are not in the index (e.g. not part of the save) still need checking directly
+        unindexed = everything.difference(index.objects)
+        if unindexed:
+            selected |= {obj for obj in unindexed if self._matches(obj)}
+        return selected
+
+
+class NameSelector(_IndexedSelector):
     def __init__(self, select_name: str):
         super().__init__('NameSelector')
         self.select_name = select_name.casefold()
 
+    def _matches(self, obj: TowerObject) -> bool:
+        return obj.matches_name(self.select_name)
+
+    def _lookup(self, index: ObjectIndex) -> Iterable[TowerObject]:
+        return itertools.chain(index.by_name(self.select_name), index.by_custom_name(self.select_name))
+
     def select(self, everything: Selection) -> Selection:
         """
         Returns:
             Selection where each object's name or custom name matches self.select_name
         """
-        return Selection({obj for obj in everything if obj.matches_name(self.select_name)})
+        return super().select(everything)
 
 
-class CustomNameSelector(Selector):
+class CustomNameSelector(_IndexedSelector):
     def __init__(self, select_name: str):
         super().__init__('CustomNameSelector')
         self.select_name = select_name.casefold()
 
+    def _matches(self, obj: TowerObject) -> bool:
+        return obj.custom_name.casefold() == self.select_name
+
+    def _lookup(self, index: ObjectIndex) -> Iterable[TowerObject]:
+        return index.by_custom_name(self.select_name)
+
     def select(self, everything: Selection) -> Selection:
         """
         Returns:
             Selection where each object's custom name matches self.select_name
         """
-        return Selection({obj for obj in everything if obj.get_custom_name().casefold() == self.select_name})
+        return super().select(everything)
 
 
-class ObjectNameSelector(Selector):
+class ObjectNameSelector(_IndexedSelector):
     def __init__(self, select_name: str):
         super().__init__('ObjectNameSelector')
         self.select_name = select_name.casefold()
 
+    def _matches(self, obj: TowerObject) -> bool:
+        return obj.name.casefold() == self.select_name
+
+    def _lookup(self, index: ObjectIndex) -> Iterable[TowerObject]:
+        return index.by_name(self.select_name)
+
     def select(self, everything: Selection) -> Selection:
         """
         Returns:
             Selection where each object's name matches self.select_name
         """
-        return Selection({obj for obj in everything if obj.get_name().casefold() == self.select_name})
+        return super().select(everything)
 
 
 class RegexSelector(Selector):
@@ -250,17 +414,23 @@ class RegexSelector(Selector):
                           or self.pattern.match(obj.get_custom_name().casefold())})
 
 
-class GroupSelector(Selector):
+class GroupSelector(_IndexedSelector):
     def __init__(self, group_id: int):
         super().__init__('GroupSelector')
         self.group_id = group_id
 
+    def _matches(self, obj: TowerObject) -> bool:
+        return obj.group_id == self.group_id
+
+    def _lookup(self, index: ObjectIndex) -> Iterable[TowerObject]:
+        return index.by_group(self.group_id)
+
     def select(self, everything: Selection) -> Selection:
         """
         Returns:
             Selection where each object's group id matches self.group_id
         """
-        return Selection({obj for obj in everything if obj.group_id == self.group_id})
+        return super().select(everything)
 
 
 class ItemSelector(Selector):
@@ -343,42 +513,84 @@ class RandomSelector(Selector):
         return Selection({obj for obj in everything if random.uniform(0, 1) <= self.probability})
 
 
-class BoxSelector(Selector):
+class _SpatialSelector(Selector, ABC):
+    """Selector over object positions that uses the active save's spatial index when selecting from most of the save"""
+
+    # Below this fraction of the save, scanning the input directly is cheaper than querying the index and
+    #  intersecting the result
+    _INDEX_MIN_FRACTION = 0.125
+
+    @abstractmethod
+    def _contains_many(self, positions: np.ndarray) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def _query(self, index: SpatialIndex) -> list[TowerObject]:
+        pass
+
+    def _scan(self, objs: Iterable[TowerObject]) -> Selection:
+        items = [obj for obj in objs if obj.item is not None]
+        if not items:
+            return Selection()
+
+        mask = self._contains_many(_gather(items, 'position'))
+        return Selection(itertools.compress(items, mask))
+
+    def select(self, everything: Selection) -> Selection:
+        from .suitebro import get_active_save
+
+        save = get_active_save()
+        if save is None or len(everything) < self._INDEX_MIN_FRACTION * len(save.objects):
+            return self._scan(everything)
+
+        index = save.spatial_index
+        selected = Selection(obj for obj in self._query(index) if obj in everything)
+
+        # Objects that are not in the index (e.g. not part of the save) still need checking directly
+        unindexed = everything.difference(index.objects)
+        if unindexed:
+            selected |= self._scan(unindexed)
+        return selected
+
+
+class BoxSelector(_SpatialSelector):
     def __init__(self, pos1: XYZ, pos2: XYZ):
         super().__init__('BoxSelector')
         self.min_pos = XYZ.min(pos1, pos2)
         self.max_pos = XYZ.max(pos1, pos2)
 
-    def _contains(self, pos: XYZ):
-        if pos is not None:
-            return pos == pos.clamp(self.min_pos, self.max_pos)
-        return False
+    def _contains_many(self, positions: np.ndarray) -> np.ndarray:
+        return box_contains(positions, np.asarray(self.min_pos), np.asarray(self.max_pos))
+
+    def _query(self, index: SpatialIndex) -> list[TowerObject]:
+        return index.query_box(self.min_pos, self.max_pos)
 
     def select(self, everything: Selection) -> Selection:
         """
         Returns:
             Selection of objects contained in the box formed by self.min_pos and self.max_pos
         """
-        return Selection({obj for obj in everything if self._contains(obj.position)})
+        return super().select(everything)
 
 
-class SphereSelector(Selector):
+class SphereSelector(_SpatialSelector):
     def __init__(self, center: XYZ, radius: float):
         super().__init__('SphereSelector')
         self.center = center
         self.radius = radius
 
-    def _contains(self, pos: XYZ) -> bool:
-        if pos is not None:
-            return self.center.distance(pos) < self.radius
-        return False
+    def _contains_many(self, positions: np.ndarray) -> np.ndarray:
+        return sphere_contains(positions, np.asarray(self.center), self.radius)
+
+    def _query(self, index: SpatialIndex) -> list[TowerObject]:
+        return index.query_sphere(self.center, self.radius)
 
     def select(self, everything: Selection) -> Selection:
         """
         Returns:
             Selection of objects contained in the sphere defined by self.center and self.radius
         """
-        return Selection({obj for obj in everything if self._contains(obj.position)})
+        return super().select(everything)
 
 
 class UnionSelector(Selector):
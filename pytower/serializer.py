@@ -0,0 +1,145 @@
+import json
+import os
+from typing import Any, BinaryIO, Callable
+
+# Environment variable that can force a specific backend, e.g. PYTOWER_JSON_BACKEND=json
+ENV_JSON_BACKEND = 'PYTOWER_JSON_BACKEND'
+
+
+class JsonBackend:
+    """
+    JSON encoder/decoder pair used for reading and writing tower-unite-suitebro save data
+
+    Attributes:
+        name: Name of the backend, which is the name of the module providing it
+    """
+
+    def __init__(self, name: str, dumps: Callable[[Any, bool], bytes], loads: Callable[[bytes | str], Any]):
+        """
+        Args:
+            name: Name of the backend
+            dumps: Function taking an object and whether to indent the output, returning the UTF-8 encoded JSON
+            loads: Function parsing JSON bytes or str
+        """
+        self.name = name
+        self._dumps = dumps
+        self._loads = loads
+
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        """
+        Args:
+            obj: Object to encode
+            pretty: Whether to indent the output for human readability
+
+        Returns:
+            UTF-8 encoded JSON
+        """
+        return self._dumps(obj, pretty)
+
+    def loads(self, data: bytes | str) -> Any:
+        """
+        Args:
+            data: JSON to decode
+
+        Returns:
+            The decoded object
+        """
+        return self._loads(data)
+
+    def dump(self, obj: Any, fd: BinaryIO, pretty: bool = False):
+        """
+        Args:
+            obj: Object to encode
+            fd: Binary file to write to
+            pretty: Whether to indent the output for human readability
+        """
+        fd.write(self._dumps(obj, pretty))
+
+    def load(self, fd: BinaryIO) -> Any:
+        """
+        Args:
+            fd: Binary file to read from
+
+        Returns:
+            The decoded object
+        """
+        return self._loads(fd.read())
+
+    def __repr__(self) -> str:
+        return f'JsonBackend({self.name})'
+
+
+def _json_dumps(obj: Any, pretty: bool) -> bytes:
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, check_circular=False).encode('utf-8')
+
+
+def _make_backends() -> dict[str, JsonBackend]:
+    backends: dict[str, JsonBackend] = {}
+
+    try:
+        import orjson
+
+        def orjson_dumps(obj: Any, pretty: bool) -> bytes:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+        backends['orjson'] = JsonBackend('orjson', orjson_dumps, orjson.loads)
+    except ImportError:
+        pass
+
+    try:
+        import msgspec
+
+        encoder = msgspec.json.Encoder()
+        decoder = msgspec.json.Decoder()
+
+        def msgspec_dumps(obj: Any, pretty: bool) -> bytes:
+            buf = encoder.encode(obj)
+            return msgspec.json.format(buf, indent=2) if pretty else buf
+
+        backends['msgspec'] = JsonBackend('msgspec', msgspec_dumps, decoder.decode)
+    except ImportError:
+        pass
+
+    backends['json'] = JsonBackend('json', _json_dumps, json.loads)
+    return backends
+
+
+# Every JSON backend available in this environment, fastest first
+BACKENDS: dict[str, JsonBackend] = _make_backends()
+
+
+def get_backend(name: str | None = None) -> JsonBackend:
+    """
+    Args:
+        name: (Optional) Name of the backend to get, defaults to the fastest available
+
+    Returns:
+        The requested JSON backend, or the stdlib backend if it is not available
+    """
+    if name is None:
+        name = os.environ.get(ENV_JSON_BACKEND)
+    if name is None:
+        return next(iter(BACKENDS.values()))
+    return BACKENDS.get(name, BACKENDS['json'])
+
+
+# Backend used by PyTower, detected on import
+BACKEND: JsonBackend = get_backend()
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    return BACKEND.dumps(obj, pretty)
+
+
+def loads(data: bytes | str) -> Any:
+    return BACKEND.loads(data)
+
+
+def dump(obj: Any, fd: BinaryIO, pretty: bool = False):
+    BACKEND.dump(obj, fd, pretty)
+
+
+def load(fd: BinaryIO) -> Any:
+    return BACKEND.load(fd)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .octree import OctreeBVH
+from .util import XYZ
+
+if TYPE_CHECKING:
+    from .object import TowerObject
+    from .transforms import TransformStore
+
+
+class SpatialIndex:
+    """
+    KD-tree (or octree) over the position column of a TransformStore, for box, sphere and nearest-k queries in
+    sub-linear time
+
+    The tree is built on the first query, and rebuilt on the next query after any position in the store changes (or
+    objects are added to or released from the store).
+
+    Attributes:
+        store: Store whose positions are indexed
+        structure: Acceleration structure, 'kdtree' (scipy's cKDTree) or 'octree' (OctreeBVH)
+    """
+
+    def __init__(self, store: TransformStore, structure: str = 'kdtree'):
+        """
+        Args:
+            store: Store whose positions to index
+            structure: (Optional) Acceleration structure, 'kdtree' or 'octree'
+        """
+        if structure not in ('kdtree', 'octree'):
+            raise ValueError(f'Unknown spatial index structure {structure}')
+
+        self.store = store
+        self.structure = structure
+        self._version = -1
+        self._tree = None
+        self._positions = np.empty((0, 3), dtype=np.float64)
+        self._objects: list[TowerObject] = []
+        self._object_set: set[TowerObject] = set()
+
+    def _refresh(self):
+        if self._version == self.store.position_version and self._tree is not None:
+            return
+
+        store = self.store
+        rows = np.fromiter((x for x, obj in enumerate(store.objects) if obj._store is store), dtype=np.intp)
+        self._positions = store.positions[rows].copy()
+        self._objects = [store.objects[x] for x in rows]
+        self._object_set = set(self._objects)
+        if self.structure == 'octree':
+            self._tree = OctreeBVH.from_points(self._positions)
+        else:
+            from scipy.spatial import cKDTree
+
+            self._tree = cKDTree(self._positions)
+        self._version = store.position_version
+
+    @property
+    def objects(self) -> set[TowerObject]:
+        """Set of every indexed object"""
+        self._refresh()
+        return self._object_set
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._objects)
+
+    def query_box(self, min_pos: XYZ, max_pos: XYZ) -> list[TowerObject]:
+        """
+        Args:
+            min_pos: Minimum corner of the axis-aligned box
+            max_pos: Maximum corner of the axis-aligned box
+
+        Returns:
+            Objects whose position lies inside the box (boundary included, within XYZ.EPSILON)
+        """
+        self._refresh()
+        if not self._objects:
+            return []
+
+        min_pos = np.asarray(min_pos, dtype=np.float64)
+        max_pos = np.asarray(max_pos, dtype=np.float64)
+        if isinstance(self._tree, OctreeBVH):
+            candidates = self._tree.query_box(min_pos - XYZ.EPSILON, max_pos + XYZ.EPSILON)
+        else:
+            # Chebyshev ball around the box center covers the box, then filter exactly
+            center = (min_pos + max_pos) / 2
+            half_extent = float(np.max(max_pos - min_pos)) / 2 + XYZ.EPSILON
+            candidates = np.asarray(self._tree.query_ball_point(center, half_extent, p=np.inf), dtype=np.intp)
+        inside = box_contains(self._positions[candidates], min_pos, max_pos)
+        return [self._objects[x] for x in candidates[inside]]
+
+    def query_sphere(self, center: XYZ, radius: float) -> list[TowerObject]:
+        """
+        Args:
+            center: Center of the sphere
+            radius: Radius of the sphere
+
+        Returns:
+            Objects whose position lies strictly inside the sphere
+        """
+        self._refresh()
+        if not self._objects:
+            return []
+
+        center = np.asarray(center, dtype=np.float64)
+        if isinstance(self._tree, OctreeBVH):
+            candidates = self._tree.query_sphere(center, radius)
+        else:
+            candidates = np.asarray(self._tree.query_ball_point(center, radius), dtype=np.intp)
+        inside = sphere_contains(self._positions[candidates], center, radius)
+        return [self._objects[x] for x in candidates[inside]]
+
+    def nearest(self, point: XYZ, k: int = 1) -> list[TowerObject]:
+        """
+        Args:
+            point: Point to search around
+            k: Number of objects to return
+
+        Returns:
+            Up to k objects closest to point, closest first
+        """
+        self._refresh()
+        k = min(k, len(self._objects))
+        if k <= 0:
+            return []
+
+        point = np.asarray(point, dtype=np.float64)
+        if isinstance(self._tree, OctreeBVH):
+            idx, _ = self._tree.nearest(point, k)
+        else:
+            _, idx = self._tree.query(point, k=k)
+        return [self._objects[x] for x in np.atleast_1d(idx)]
+
+
+def box_contains(positions: np.ndarray, min_pos: np.ndarray, max_pos: np.ndarray) -> np.ndarray:
+    """
+    Returns:
+        Boolean mask of the Nx3 positions inside the box, with the same XYZ.EPSILON tolerance as XYZ equality
+    """
+    return np.all((positions > min_pos - XYZ.EPSILON) & (positions < max_pos + XYZ.EPSILON), axis=1)
+
+
+def sphere_contains(positions: np.ndarray, center: np.ndarray, radius: float) -> np.ndarray:
+    """
+    Returns:
+        Boolean mask of the Nx3 positions strictly inside the sphere
+    """
+    return np.linalg.norm(positions - center, axis=1) < radius
@@ -0,0 +1,87 @@
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+
+from .logging import *
+
+PROFILE_STARTUP_FLAG = '--profile-startup'
+
+# Number of imports listed in each table of the report
+_TOP_IMPORTS = 15
+
+_IMPORT_TIME_PREFIX = 'import time:'
+
+
+@dataclass
+class ImportTime:
+    """One line of python -X importtime output, times in microseconds"""
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_import_times(output: str) -> tuple[list[ImportTime], list[str]]:
+    """
+    Splits the stderr of a python -X importtime run into import timings and the program's own output
+
+    Args:
+        output: Captured stderr
+
+    Returns:
+        Timings of each import, in the order they finished, and the remaining lines
+    """
+    imports = []
+    other = []
+    for line in output.splitlines():
+        if not line.startswith(_IMPORT_TIME_PREFIX):
+            other.append(line)
+            continue
+
+        fields = line[len(_IMPORT_TIME_PREFIX):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # Header line
+
+        # Nested imports are indented by two spaces per level, after the single space separator
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        imports.append(ImportTime(stripped, int(fields[0]), int(fields[1]), depth))
+
+    return imports, other
+
+
+def profile_startup(argv: list[str]) -> int:
+    """
+    Runs pytower with the given arguments under python -X importtime, then reports the total run time and the
+    imports that took the longest
+
+    Args:
+        argv: Command line arguments to run pytower with, without the program name
+
+    Returns:
+        Exit code of the profiled run
+    """
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'pytower', *argv],
+                          stderr=subprocess.PIPE, text=True)
+    wall_time = time.perf_counter() - start
+
+    imports, other = parse_import_times(proc.stderr)
+    for line in other:
+        print(line, file=sys.stderr)
+
+    total_us = sum(entry.cumulative_us for entry in imports if entry.depth == 0)
+    info(f'pytower {" ".join(argv)}: {wall_time * 1000:.0f} ms total, {total_us / 1000:.0f} ms importing '
+         f'{len(imports)} modules')
+
+    info('Slowest imports (cumulative, including what they import):')
+    for entry in sorted(imports, key=lambda e: e.cumulative_us, reverse=True)[:_TOP_IMPORTS]:
+        info(f'{entry.cumulative_us / 1000:>9.1f} ms  {entry.name}')
+
+    info('Slowest imports (self):')
+    for entry in sorted(imports, key=lambda e: e.self_us, reverse=True)[:_TOP_IMPORTS]:
+        info(f'{entry.self_us / 1000:>9.1f} ms  {entry.name}')
+
+    return proc.returncode
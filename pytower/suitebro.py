@@ -1,13 +1,18 @@
 import itertools
-import json
 import platform
 import sys
 from subprocess import Popen, PIPE
-from typing import Any, Sequence, TypedDict
+from typing import Any, Iterable, Iterator, Sequence, TypedDict
 
+from . import serializer
+from .codec import UnsupportedFormatError, read_save, write_save
+from .index import ObjectIndex
 from .logging import *
 from .object import TowerObject
+from .object_list import ObjectList
 from .selection import Selection
+from .spatial import SpatialIndex
+from .transforms import TransformStore
 
 
 class Suitebro:
@@ -33,7 +38,79 @@ class Suitebro:
         self.directory = directory
         self.data: dict[str, Any] = data
 
-        self.objects = TowerObject.deserialize_objects(data)
+        self._objects = ObjectList(TowerObject.deserialize_objects(data), on_change=self._objects_changed)
+        self._transforms: TransformStore | None = None
+        self._spatial_index: SpatialIndex | None = None
+        self._index: ObjectIndex | None = None
+
+    @property
+    def objects(self) -> ObjectList:
+        """
+        The TowerObject instances contained in the Suitebro file, as an ordered list-like collection with O(1)
+        membership and removal. Assigning a plain list also works. However the collection is changed, the index and
+        the transforms store are kept in sync
+        """
+        return self._objects
+
+    @objects.setter
+    def objects(self, value: Iterable[TowerObject]):
+        if value is self._objects:
+            return
+
+        self._objects._replace(value)
+
+    def _objects_changed(self, added: list[TowerObject], removed: list[TowerObject], reordered: bool):
+        # Called by the object list after every change to it
+        if self._transforms is not None:
+            for obj in removed:
+                self._transforms.release(obj)
+            self._transforms.add(added)
+
+        if self._index is None:
+            return
+
+        if reordered:
+            # The index returns the first match in list order, so drop it to be rebuilt on next use
+            for obj in list(self._index.objects):
+                self._index.remove(obj)
+            self._index = None
+            return
+
+        for obj in removed:
+            self._index.remove(obj)
+        self._index.add(added)
+
+    @property
+    def transforms(self) -> TransformStore:
+        """
+        Columnar store of the position/rotation/scale of every item in the save, created on first access
+
+        Once created, the transforms of items in the save (and of items added later through add_object/add_objects)
+        live in Nx3/Nx4 arrays and are only written back into the item dictionaries by to_dict()
+        """
+        if self._transforms is None:
+            self._transforms = TransformStore(self.objects)
+        return self._transforms
+
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """
+        KD-tree over the positions of the items in the save, for box/sphere/nearest-k queries. Built on first query
+        over the transforms store (creating it if needed) and rebuilt lazily whenever a position changes
+        """
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex(self.transforms)
+        return self._spatial_index
+
+    @property
+    def index(self) -> ObjectIndex:
+        """
+        Hash indexes of the objects in the save by casefolded name, casefolded custom name and group ID. Built on first
+        access, then kept up to date by every change to the objects and the group_id/custom_name setters
+        """
+        if self._index is None:
+            self._index = ObjectIndex(self.objects)
+        return self._index
 
     def add_object(self, obj: TowerObject):
         """
@@ -42,7 +119,7 @@ class Suitebro:
         Args:
             obj: The object to add
         """
-        self.objects += [obj]
+        self._objects.append(obj)
 
     def add_objects(self, objs: Sequence[TowerObject]):
         """
@@ -51,7 +128,7 @@ class Suitebro:
         Args:
             objs: The list of objects to add
         """
-        self.objects += objs
+        self._objects.extend(objs)
 
     def remove_object(self, obj: TowerObject):
         """
@@ -60,7 +137,19 @@ class Suitebro:
         Args:
             obj: The object to remove
         """
-        self.objects.remove(obj)
+        self._objects.remove(obj)
+
+    def remove_objects(self, objs: Iterable[TowerObject]) -> int:
+        """
+        Removes objects from the Suitebro file, in time proportional to the number of objects removed
+
+        Args:
+            objs: The objects to remove. Objects that are not in the save are ignored
+
+        Returns:
+            Number of objects removed
+        """
+        return len(self._objects.remove_all(objs))
 
     def find_item(self, name: str) -> TowerObject | None:
         """
@@ -72,10 +161,7 @@ class Suitebro:
         Returns:
             The first TowerObject matching the name, if found, or else None
         """
-        for obj in self.objects:
-            if obj.matches_name(name):
-                return obj
-        return None
+        return self.index.find_first(name)
 
     def _get_groups_meta(self):
         return self.data['groups']
@@ -85,10 +171,12 @@ class Suitebro:
             group_id: int
             item_count: int
 
-        sel = Selection(self.objects)
-        group_data: list[GroupData] = []
-        for group_id, group in sel.groups():
-            group_data.append({'group_id': group_id, 'item_count': len(group)})
+        # Counts come straight from the group index rather than regrouping every object. The object list reports every
+        # change to its contents and TowerObject.set_property reports every group ID change, so the index always
+        # matches the objects in the save
+        group_sizes = self.index.group_sizes()
+        group_data: list[GroupData] = [{'group_id': group_id, 'item_count': group_sizes[group_id]}
+                                       for group_id in sorted(group_sizes)]
         self.data['groups'] = group_data
 
     def groups(self) -> set[tuple[int, Selection]]:
@@ -99,18 +187,15 @@ class Suitebro:
             The set of groups, as a set of tuples where the first slot is the group ID and the second slot is the
             corresponding Selection
         """
-        sel = Selection(self.objects)
-        return sel.groups()
+        index = self.index
+        return {(group_id, Selection(index.by_group(group_id))) for group_id in index.group_ids() if group_id >= 0}
 
     def get_max_groupid(self) -> int:
         """
         Returns:
             Maximum group ID present in the save
         """
-        max_id = -1
-        for obj in self.objects:
-            max_id = max(obj.group_id, max_id)
-        return max_id
+        return self.index.max_group_id
 
     def group(self, objs: Selection, group_id: None | int = None) -> int:
         """
@@ -179,6 +264,10 @@ class Suitebro:
         """
         new_dict: dict[str, Any] = {}
 
+        # Write back any transforms modified through the columnar store
+        if self._transforms is not None:
+            self._transforms.sync()
+
         # Update groups based on group ids and info
         self._update_groups_meta()
 
@@ -277,18 +366,211 @@ def run_suitebro_parser(input_path: str, to_save: bool, output_path: str,
     return True
 
 
-def load_suitebro(filename: str, only_json: bool = False) -> Suitebro:
-    abs_filepath = os.path.realpath(filename)
-    in_dir = os.path.dirname(abs_filepath)
-    json_output_path = os.path.join(in_dir, os.path.basename(abs_filepath) + ".json")
+# Special files used to stream JSON to/from tower-unite-suitebro without writing a .json sidecar
+PIPE_STDIN = '/dev/stdin'
+PIPE_STDOUT = '/dev/stdout'
+
+# Bytes to buffer before flushing encoded JSON into the converter's stdin
+_PIPE_CHUNK_SIZE = 1 << 20
+
+
+def supports_suitebro_pipes() -> bool:
+    """
+    Returns:
+        Whether tower-unite-suitebro can read/write JSON over stdin/stdout on this platform
+    """
+    return sys.platform != 'win32' and os.path.exists(PIPE_STDIN) and os.path.exists(PIPE_STDOUT)
+
+
+def read_suitebro_pipe(input_path: str) -> dict[str, Any] | None:
+    """
+    Converts a CondoData/.map file to JSON, reading the converter output straight from its stdout
+
+    Args:
+        input_path: Path to the CondoData/.map file
+
+    Returns:
+        The parsed save data, or None if the converter failed
+    """
+    exe_path = get_suitebro_path()
+    process = Popen([exe_path, 'to-json', '-!', '-i', input_path, '-o', PIPE_STDOUT], stdout=PIPE)
+    output, _ = process.communicate()
+
+    if process.returncode != 0:
+        critical('Suitebro parser did not complete successfully!')
+        return None
+
+    success(f'Converted {pretty_path(input_path)}')
+    return serializer.loads(output)
+
+
+def _iter_json_chunks(save_json: dict[str, Any]) -> Iterator[bytes]:
+    # Stream the top-level lists one element at a time so the whole document is never materialized as one buffer
+    yield b'{'
+    for idx, (key, value) in enumerate(save_json.items()):
+        if idx > 0:
+            yield b','
+        yield serializer.dumps(key)
+        yield b':'
+        if isinstance(value, list):
+            yield b'['
+            for elem_idx, elem in enumerate(value):
+                if elem_idx > 0:
+                    yield b','
+                yield serializer.dumps(elem)
+            yield b']'
+        else:
+            yield serializer.dumps(value)
+    yield b'}'
+
+
+def write_suitebro_pipe(save_json: dict[str, Any], output_path: str) -> bool:
+    """
+    Converts save data back into a CondoData/.map file, streaming the encoded JSON into the converter's stdin
+
+    Args:
+        save_json: Save data in the tower-unite-suitebro JSON layout
+        output_path: Path to write the CondoData/.map file to
+
+    Returns:
+        Whether the conversion succeeded
+    """
+    exe_path = get_suitebro_path()
+    process = Popen([exe_path, 'to-save', '-!', '-i', PIPE_STDIN, '-o', output_path], stdin=PIPE)
+
+    try:
+        chunks: list[bytes] = []
+        buffered = 0
+        for chunk in _iter_json_chunks(save_json):
+            chunks.append(chunk)
+            buffered += len(chunk)
+            if buffered >= _PIPE_CHUNK_SIZE:
+                process.stdin.write(b''.join(chunks))
+                chunks.clear()
+                buffered = 0
+        process.stdin.write(b''.join(chunks))
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+
+    if process.wait() != 0:
+        critical('Suitebro parser did not complete successfully!')
+        return False
+
+    success(f'Converted to {pretty_path(output_path)}')
+    return True
 
+
+def use_native_codec() -> bool:
+    """
+    Returns:
+        Whether CondoData files should be converted in-process instead of through tower-unite-suitebro
+    """
+    from .config import CONFIG, KEY_NATIVE_CODEC
+    if CONFIG and KEY_NATIVE_CODEC in CONFIG.keys():
+        return bool(CONFIG.get(KEY_NATIVE_CODEC))
+    return True
+
+
+def _read_native(abs_filepath: str) -> dict[str, Any] | None:
+    with open(abs_filepath, 'rb') as fd:
+        buf = fd.read()
+
+    try:
+        return read_save(buf)
+    except UnsupportedFormatError as e:
+        warning(f'Native codec could not read {pretty_path(abs_filepath)} ({e}), falling back to tower-unite-suitebro')
+        return None
+
+
+def read_save_data(abs_filepath: str, json_path: str, only_json: bool = False,
+                   native: bool | None = None) -> dict[str, Any]:
+    """
+    Reads raw save data from a CondoData/.map file, or from its .json conversion
+
+    Args:
+        abs_filepath: Absolute path to the CondoData/.map file
+        json_path: Path to the .json file, used in json-only mode or when falling back to a temp-file conversion
+        only_json: Whether to read from the .json file instead of the CondoData/.map file
+        native: (Optional) Whether to use the native codec, defaults to the native_codec config value
+
+    Returns:
+        The save data in the tower-unite-suitebro JSON layout
+    """
+    if native is None:
+        native = use_native_codec()
+
+    save_json = None
+    if not only_json and native:
+        info('Loading save file...')
+        save_json = _read_native(abs_filepath)
+
+    if save_json is None and not only_json and supports_suitebro_pipes():
+        save_json = read_suitebro_pipe(abs_filepath)
+
+    if save_json is None:
+        if not only_json:
+            run_suitebro_parser(abs_filepath, False, json_path, overwrite=True)
+
+        info('Loading JSON file...')
+        with open(json_path, 'rb') as fd:
+            save_json = serializer.load(fd)
+
+    return save_json
+
+
+def write_save_data(save_json: dict[str, Any], output_path: str, json_path: str, only_json: bool = False,
+                    native: bool | None = None, pretty: bool = False, json_written: bool = False):
+    """
+    Writes raw save data into a CondoData/.map file, or into a .json file
+
+    Args:
+        save_json: The save data in the tower-unite-suitebro JSON layout
+        output_path: Path to write the CondoData/.map file to
+        json_path: Path to the .json file, used in json-only mode or when falling back to a temp-file conversion
+        only_json: Whether to only write the .json file
+        native: (Optional) Whether to use the native codec, defaults to the native_codec config value
+        pretty: Whether to indent the .json file for human readability
+        json_written: Whether json_path already holds save_json, e.g. when converting a user's .json file, in which
+            case it is converted as is and never rewritten
+    """
+    if native is None:
+        native = use_native_codec()
+
+    if not only_json and native:
+        try:
+            buf = write_save(save_json)
+        except UnsupportedFormatError as e:
+            warning(f'Native codec could not write save ({e}), falling back to tower-unite-suitebro')
+        else:
+            with open(output_path, 'wb') as fd:
+                fd.write(buf)
+            success(f'Wrote {pretty_path(output_path)}')
+            return
+
+    if json_written:
+        if not only_json:
+            run_suitebro_parser(json_path, True, output_path, overwrite=True)
+        return
+
+    if not only_json and supports_suitebro_pipes():
+        if write_suitebro_pipe(save_json, output_path):
+            return
+
+    with open(json_path, 'wb') as fd:
+        serializer.dump(save_json, fd, pretty=pretty)
+
+    # Finally run!
     if not only_json:
-        run_suitebro_parser(abs_filepath, False, json_output_path, overwrite=True)
+        run_suitebro_parser(json_path, True, output_path, overwrite=True)
 
-    info('Loading JSON file...')
-    with open(json_output_path, 'r', encoding='utf-8') as fd:
-        save_json = json.load(fd)
 
+def load_suitebro(filename: str, only_json: bool = False, native: bool | None = None) -> Suitebro:
+    abs_filepath = os.path.realpath(filename)
+    in_dir = os.path.dirname(abs_filepath)
+    json_output_path = os.path.join(in_dir, os.path.basename(abs_filepath) + ".json")
+
+    save_json = read_save_data(abs_filepath, json_output_path, only_json=only_json, native=native)
     save = Suitebro(os.path.basename(abs_filepath), in_dir, save_json)
 
     global _active_save
@@ -297,15 +579,12 @@ def load_suitebro(filename: str, only_json: bool = False) -> Suitebro:
     return save
 
 
-def save_suitebro(save: Suitebro, filename: str, only_json: bool = False):
+def save_suitebro(save: Suitebro, filename: str, only_json: bool = False, native: bool | None = None,
+                  pretty: bool = False):
     abs_filepath = os.path.realpath(filename)
     out_dir = os.path.dirname(abs_filepath)
     json_final_path = os.path.join(save.directory, f'{filename}.json')
     final_output_path = os.path.join(out_dir, f'{filename}')
 
-    with open(json_final_path, 'w', encoding='utf-8') as fd:
-        json.dump(save.to_dict(), fd, indent=2)
-
-    # Finally run!
-    if not only_json:
-        run_suitebro_parser(json_final_path, True, final_output_path, overwrite=True)
+    write_save_data(save.to_dict(), final_output_path, json_final_path, only_json=only_json, native=native,
+                    pretty=pretty)
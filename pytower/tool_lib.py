@@ -1,3 +1,4 @@
+import ast
 import collections
 import json
 import pkgutil
@@ -5,12 +6,30 @@ import importlib.util
 import importlib
 import sys
 from types import ModuleType
-from typing import Any, Callable, TypeVar, overload
+from typing import Any, Callable, cast, Iterable, TypeVar, overload, TYPE_CHECKING
 
 from .logging import *
-from .selection import Selection
-from .suitebro import Suitebro
-from .util import not_none, xyz, xyz_to_string, xyzint
+
+if TYPE_CHECKING:
+    from .selection import Selection
+    from .suitebro import Suitebro
+
+
+# Parameter types that can be named in the tools index. xyz and xyzint live in util, which imports numpy, so they are
+#  only imported once a parameter of that type is actually used
+_PARAMETER_TYPES: dict[str, Callable[[Any], Any]] = {'str': str, 'bool': bool, 'int': int, 'float': float}
+_XYZ_TYPE_NAMES = ('xyz', 'xyzint')
+
+# Marks a default not yet converted from its tools index form
+_UNCONVERTED = object()
+
+
+def _parameter_type(name: str) -> Callable[[Any], Any]:
+    if name in _XYZ_TYPE_NAMES:
+        from . import util
+        return getattr(util, name)
+
+    return _PARAMETER_TYPES[name]
 
 
 class ToolParameterInfo:
@@ -19,33 +38,67 @@ class ToolParameterInfo:
         self.description = description
         self.default = default
 
+    @property
+    def dtype(self) -> Callable[[Any], Any]:
+        if self._dtype is None:
+            self._dtype = _parameter_type(self._dtype_name)
+        return self._dtype
+
+    @dtype.setter
+    def dtype(self, dtype: Callable[[Any], Any]):
+        self._dtype = dtype
+        self._dtype_name = dtype.__name__
+
+    @property
+    def dtype_name(self) -> str:
+        """Name of the parameter type, available without importing it"""
+        return self._dtype_name
+
+    @property
+    def default(self) -> Any:
+        if self._index_default is not _UNCONVERTED:
+            self._default = self.dtype(self._index_default)
+            self._index_default = _UNCONVERTED
+        return self._default
+
+    @default.setter
+    def default(self, default: Any):
+        self._default = default
+        self._index_default = _UNCONVERTED
+
     def to_dict(self) -> dict[str, Any]:
         data: dict[str, Any] = {}
-        data['dtype'] = self.dtype.__name__
+        data['dtype'] = self._dtype_name
         data['description'] = self.description
 
-        if self.default is not None and (self.dtype == xyz or self.dtype == xyzint):
-            data['default'] = xyz_to_string(self.default)
+        if self._index_default is not _UNCONVERTED:
+            data['default'] = self._index_default
+        elif self._default is not None and self._dtype_name in _XYZ_TYPE_NAMES:
+            from .util import xyz_to_string
+            data['default'] = xyz_to_string(self._default)
         else:
-            data['default'] = self.default
+            data['default'] = self._default
         return data
 
     @staticmethod
     def from_dict(data: dict[str, Any]) -> 'ToolParameterInfo':
-        # Define conversion to/from registered parameter types
-        type_table = {'str': str, 'bool': bool, 'int': int, 'float': float, 'xyz': xyz, 'xyzint': xyzint}
+        dtype_name = data['dtype']
+        if dtype_name not in _PARAMETER_TYPES and dtype_name not in _XYZ_TYPE_NAMES:
+            raise KeyError(dtype_name)
 
-        # Load values
-        dtype = type_table[data['dtype']]
-        description = data['description']
-        default = dtype(data['default']) if 'default' in data and data['default'] is not None else None
+        # Load values, leaving the type and default to be converted on first use
+        param_info = ToolParameterInfo(description=data['description'])
+        param_info._dtype = None
+        param_info._dtype_name = dtype_name
+        if data.get('default') is not None:
+            param_info._index_default = data['default']
 
-        return ToolParameterInfo(dtype, description, default)
+        return param_info
 
 
 class ToolMetadata:
     def __init__(self, tool_name: str, params: dict[str, ToolParameterInfo], version: str | None, author: str | None, url: str | None,
-                 info: str | None, hidden: bool = False, nowrite: bool = False):
+                 info: str | None, hidden: bool = False, nowrite: bool = False, parallel_safe: bool = False):
         self.tool_name = tool_name
         self.params = params
         self.version = version
@@ -54,6 +107,7 @@ class ToolMetadata:
         self.info = info
         self.hidden = hidden
         self.nowrite = nowrite
+        self.parallel_safe = parallel_safe
 
     def get_info(self) -> str:
         info_str = f'{self.tool_name} Information:'
@@ -71,9 +125,10 @@ class ToolMetadata:
         if self.params:
             param_str = '\n\nParameters:'
             for name, info in self.params.items():
-                param_str += f'\n  {name}:{info.dtype.__name__} - {info.description}'
-                if info.default is not None:
-                    param_str += f' (default: {info.default})'
+                param_str += f'\n  {name}:{info.dtype_name} - {info.description}'
+                default = info.to_dict()['default']
+                if default is not None:
+                    param_str += f' (default: {default})'
 
             info_str += param_str
 
@@ -117,20 +172,20 @@ class ToolMetadata:
         # Convert the input dict into a defaultdict so that missing entries become None
         data_or_none = collections.defaultdict(lambda: None, data)
         data_or_false = collections.defaultdict(lambda: False, data)
-        tool_name = data_or_none['tool_name']
+        tool_name = data['tool_name']
         version = data_or_none['version']
         author = data_or_none['author']
         url = data_or_none['url']
         tool_info = data_or_none['info']
         hidden = data_or_false['hidden']
         nowrite = data_or_false['nowrite']
+        parallel_safe = data_or_false['parallel_safe']
 
-        # Handle parameter list
-        params: dict[str, Any] = data_or_none['params'] or {}
-        for p_name, p_info_dict in params.items():
-            params[p_name] = ToolParameterInfo.from_dict(p_info_dict)
+        # Handle parameter list, into a fresh dictionary so the input data is left as is
+        params = {p_name: ToolParameterInfo.from_dict(p_info_dict)
+                  for p_name, p_info_dict in (data_or_none['params'] or {}).items()}
 
-        return ToolMetadata(not_none(tool_name), params, version, author, url, tool_info, hidden, nowrite)
+        return ToolMetadata(tool_name, params, version, author, url, tool_info, hidden, nowrite, parallel_safe)
 
 
 class ParameterDict(dict[str, Any]):
@@ -141,33 +196,233 @@ class ParameterDict(dict[str, Any]):
             raise AttributeError(f"'ParameterDict' object has no attribute '{key}'")
 
 
-ToolMainType = Callable[[Suitebro, Selection, ParameterDict], None]
+ToolMainType = Callable[['Suitebro', 'Selection', ParameterDict], None]
 ToolListType = list[tuple[ModuleType, ToolMetadata]]
 PartialToolListType = list[tuple[ModuleType | str, ToolMetadata]]
 
 
-def load_tool(script_path: str) -> tuple[ModuleType, ToolMetadata] | None:
+def import_tool_module(script_path: str) -> ModuleType:
+    """
+    Imports a tool script as a module, without reading its metadata or logging anything
+
+    Args:
+        script_path: Path to the tool script
+
+    Returns:
+        The imported module
+    """
+    module_name = os.path.splitext(os.path.basename(script_path))[0]
+    # TODO convert from importlib.util to pkgutil
+    spec = importlib.util.spec_from_file_location(module_name, script_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f'Cannot import {script_path}')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Module-level variables tool scripts declare their metadata with
+_DIRECTIVES = ('TOOL_NAME', 'PARAMETERS', 'VERSION', 'AUTHOR', 'URL', 'INFO', 'HIDDEN', 'NO_WRITE', 'PARALLEL_SAFE')
+
+_STR_DIRECTIVES = ('TOOL_NAME', 'VERSION', 'AUTHOR', 'URL', 'INFO')
+
+
+class _DynamicMetadata(Exception):
+    """Raised when a tool's metadata can't be read without running the script"""
+
+
+class _DirectiveNamespace:
+    # Stands in for the module, so static and executed metadata go through the same ToolMetadata helpers
+    def __init__(self, values: dict[str, Any]):
+        self.__dict__.update(values)
+
+
+def _binds_name(node: ast.AST, names: Iterable[str]) -> bool:
+    # Whether a module-level statement can bind any of the names in the module namespace
+    names = set(names)
+    pending = [node]
+    while pending:
+        child = pending.pop()
+        if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store) and child.id in names:
+            return True
+        if isinstance(child, (ast.Import, ast.ImportFrom)):
+            if any((alias.asname or alias.name.split('.')[0]) in names for alias in child.names):
+                return True
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if child.name in names:
+                return True
+            continue  # Names assigned in the body are local to it
+        if isinstance(child, ast.Lambda):
+            continue
+        pending.extend(ast.iter_child_nodes(child))
+    return False
+
+
+def _callee_name(node: ast.expr) -> str | None:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _literal(node: ast.expr | None) -> Any:
+    if node is None:
+        return None
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise _DynamicMetadata(ast.dump(node))
+
+
+def _static_default(node: ast.expr | None, dtype_name: str) -> Any:
+    # Returns the default in its tools index form, so xyz defaults don't need numpy until they are used
+    if node is None or dtype_name not in _XYZ_TYPE_NAMES:
+        return _literal(node)
+
+    if not isinstance(node, ast.Call) or _callee_name(node.func) not in _XYZ_TYPE_NAMES or node.keywords:
+        return _literal(node)
+
+    coords = [_literal(arg) for arg in node.args]
+    if len(coords) != 3 or not all(isinstance(c, (int, float)) and not isinstance(c, bool) for c in coords):
+        raise _DynamicMetadata(ast.dump(node))
+
+    # Same conversions as util.xyz/xyzint, formatted like util.xyz_to_string
+    if dtype_name == 'xyzint' or _callee_name(node.func) == 'xyzint':
+        coords = [int(float(c) + .5) for c in coords]
+    else:
+        coords = [float(c) for c in coords]
+    return ','.join(str(c) for c in coords)
+
+
+def _static_parameter(node: ast.expr) -> ToolParameterInfo:
+    if not isinstance(node, ast.Call) or _callee_name(node.func) != 'ToolParameterInfo':
+        raise _DynamicMetadata(ast.dump(node))
+
+    args: dict[str, ast.expr] = dict(zip(('dtype', 'description', 'default'), node.args))
+    for keyword in node.keywords:
+        if keyword.arg is None or keyword.arg in args:
+            raise _DynamicMetadata(ast.dump(node))
+        args[keyword.arg] = keyword.value
+    if len(node.args) > 3 or not set(args) <= {'dtype', 'description', 'default'}:
+        raise _DynamicMetadata(ast.dump(node))
+
+    dtype_name = _callee_name(args['dtype']) if 'dtype' in args else 'str'
+    if dtype_name not in _PARAMETER_TYPES and dtype_name not in _XYZ_TYPE_NAMES:
+        raise _DynamicMetadata(ast.dump(node))
+
+    return ToolParameterInfo.from_dict({'dtype': dtype_name,
+                                        'description': _literal(args.get('description')) or '',
+                                        'default': _static_default(args.get('default'), dtype_name)})
+
+
+def _static_directives(source: str, script_path: str) -> tuple[dict[str, Any], bool]:
+    """
+    Reads the metadata directives of a tool script from its source, without running it
+
+    Args:
+        source: Source code of the tool script
+        script_path: Path to the tool script, for error messages
+
+    Returns:
+        Directive values by name, and whether the script defines main
+
+    Raises:
+        _DynamicMetadata: If a directive is computed at runtime, rather than written as a literal
+    """
+    try:
+        tree = ast.parse(source, filename=script_path)
+    except SyntaxError:
+        raise _DynamicMetadata('syntax error')  # Running the script reports the error properly
+
+    values: dict[str, Any] = {}
+    has_main = False
+    for stmt in tree.body:
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)) and stmt.name == 'main':
+            has_main = True
+            continue
+
+        target: ast.expr | None = None
+        if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1:
+            target = stmt.targets[0]
+        elif isinstance(stmt, ast.AnnAssign) and stmt.value is not None:
+            target = stmt.target
+
+        if isinstance(target, ast.Name) and target.id in _DIRECTIVES:
+            if target.id in values:
+                raise _DynamicMetadata(f'{target.id} is assigned more than once')
+            values[target.id] = stmt.value
+            continue
+
+        # Names bound any other way (conditionally, by imports, in loops...) are only known once the script runs
+        if _binds_name(stmt, _DIRECTIVES):
+            raise _DynamicMetadata('directive bound dynamically')
+        has_main = has_main or _binds_name(stmt, ('main',))
+
+    directives: dict[str, Any] = {}
+    for name, node in values.items():
+        if name != 'PARAMETERS':
+            directives[name] = _literal(node)
+            continue
+
+        if not isinstance(node, ast.Dict) or any(key is None for key in node.keys):
+            raise _DynamicMetadata('PARAMETERS is not a dict literal')
+        directives[name] = {_literal(key): _static_parameter(value) for key, value in zip(node.keys, node.values)}
+
+    return directives, has_main
+
+
+def _read_metadata(script_path: str, module_name: str) -> tuple[ModuleType | str, ToolMetadata, bool]:
+    # Prefer reading the directives from the source, and only run the script when they are dynamic
+    try:
+        with open(script_path, 'r', encoding='utf-8') as fd:
+            source = fd.read()
+        directives, has_main = _static_directives(source, script_path)
+        module_or_path: ModuleType | str = script_path
+        namespace: object = _DirectiveNamespace(directives)
+    except (_DynamicMetadata, UnicodeDecodeError) as e:
+        debug(f'Running {module_name} to read its metadata ({e})')
+        module_or_path = namespace = import_tool_module(script_path)
+        has_main = hasattr(module_or_path, 'main')
+
+    # Get script directives/metadata variables
+    tool_name = ToolMetadata.strattr_or_default(namespace, 'TOOL_NAME', module_name)
+    params = ToolMetadata.attr_or_default(namespace, 'PARAMETERS', dict[str, ToolParameterInfo]())
+    version = ToolMetadata.strattr_or_default(namespace, 'VERSION', None)
+    author = ToolMetadata.strattr_or_default(namespace, 'AUTHOR', None)
+    url = ToolMetadata.strattr_or_default(namespace, 'URL', None)
+    tool_info = ToolMetadata.strattr_or_default(namespace, 'INFO', None)
+    hidden = ToolMetadata.attr_or_default(namespace, 'HIDDEN', False)
+    nowrite = ToolMetadata.attr_or_default(namespace, 'NO_WRITE', False)
+    parallel_safe = ToolMetadata.attr_or_default(namespace, 'PARALLEL_SAFE', False)
+
+    meta = ToolMetadata(tool_name, params, version, author, url, tool_info, hidden, nowrite, parallel_safe)
+    return module_or_path, meta, has_main
+
+
+def load_tool(script_path: str) -> tuple[ModuleType | str, ToolMetadata] | None:
+    """
+    Loads the metadata of a tool script
+
+    Literal directives (TOOL_NAME, PARAMETERS with ToolParameterInfo(...) entries, ...) are read from the script's
+    source, and the tool is returned by path; it is only imported once it is run. Scripts with directives computed at
+    runtime are imported right away and returned as a module
+
+    Args:
+        script_path: Path to the tool script
+
+    Returns:
+        The tool module or script path, and its metadata, or None if the script is not a valid tool
+    """
     script = os.path.basename(script_path)
     module_name = os.path.splitext(script)[0]
     info(f'Loading tool script: {module_name}')
     try:
-        # TODO convert from importlib.util to pkgutil
-        spec = not_none(importlib.util.spec_from_file_location(module_name, script_path))
-        module = importlib.util.module_from_spec(spec)
-        not_none(spec.loader).exec_module(module)
-
-        # Get script directives/metadata variables
-        tool_name = ToolMetadata.strattr_or_default(module, 'TOOL_NAME', module_name)
-        params = ToolMetadata.attr_or_default(module, 'PARAMETERS', dict[str, ToolParameterInfo]())
-        version = ToolMetadata.strattr_or_default(module, 'VERSION', None)
-        author = ToolMetadata.strattr_or_default(module, 'AUTHOR', None)
-        url = ToolMetadata.strattr_or_default(module, 'URL', None)
-        tool_info = ToolMetadata.strattr_or_default(module, 'INFO', None)
-        hidden = ToolMetadata.attr_or_default(module, 'HIDDEN', False)
-        nowrite = ToolMetadata.attr_or_default(module, 'NO_WRITE', False)
+        module_or_path, meta, has_main = _read_metadata(script_path, module_name)
+        tool_name, version, author, hidden = meta.tool_name, meta.version, meta.author, meta.hidden
 
         # Check if the module has a main function before registering it
-        if not hasattr(module, 'main') and not hidden:
+        if not has_main and not hidden:
             error(f"No 'main' function found in tool '{tool_name}'. Skipping.")
             return None
 
@@ -180,7 +435,7 @@ def load_tool(script_path: str) -> tuple[ModuleType, ToolMetadata] | None:
         if not hidden:
             success(success_message)
 
-        return module, ToolMetadata(tool_name, params, version, author, url, tool_info, hidden, nowrite)
+        return module_or_path, meta
 
     except Exception as e:
         error(f"Error loading tool '{script}': {e}")
@@ -190,126 +445,254 @@ TOOLS_PATH = os.path.join(root_directory, 'tools')
 TOOLS_INDEX_NAME = 'tools-index.json'
 TOOLS_INDEX_PATH = os.path.join(root_directory, TOOLS_INDEX_NAME)
 
+# Bumped whenever the layout of tools-index.json changes
+_INDEX_VERSION = 2
 
-def make_tools_index(tools: PartialToolListType):
-    tools_dict: dict[str, Any] = {}
-    for module_or_path, meta in tools:
-        # Convert tool metadata to dictionary
-        tool_data = meta.to_dict()
 
-        # Get path name
-        if isinstance(module_or_path, ModuleType):
-            tool_path = not_none(module_or_path.__file__)
-        else:
-            tool_path = module_or_path
+def _is_tool_script(filename: str) -> bool:
+    return filename.endswith('.py') and filename not in ('__init__.py', '__main__.py', 'setup.py')
 
-        # Extra important detail, need time last modified
-        tool_data['last_modified'] = os.path.getmtime(tool_path)
 
-        # Add to output
-        tools_dict[tool_path] = tool_data
+def _trust_script(script_path: str) -> bool:
+    info(f'NEW TOOL SCRIPT DETECTED: {os.path.basename(script_path)} (located in '
+         f'{os.path.dirname(script_path)})')
+    response = input('Are you sure you want to trust this script? (Y/n)\n').strip().casefold()
+    return response == 'y' or response == 'ye' or response == 'yes'
 
-    # Simply dump dictionary to .json file now
-    with open(TOOLS_INDEX_PATH, 'w') as fd:
-        json.dump(tools_dict, fd, indent=2)
 
+class ToolsIndex:
+    """
+    Cached metadata of every known tool script, kept in tools-index.json alongside the directories registered with
+    pytower scan. The tools folder is always searched as well, wherever PyTower currently lives, so it is not stored
+    """
 
-# Get tool scripts as absolute, case-normalized paths
-def get_tool_scripts() -> list[str]:
-    files = os.listdir(TOOLS_PATH)
+    def __init__(self, directories: list[str] | None = None, entries: dict[str, dict[str, Any]] | None = None,
+                 tools_path: str = TOOLS_PATH):
+        self.tools_path = os.path.normcase(tools_path)
+        self.directories = [directory for directory in directories or [] if directory != self.tools_path]
+        self.entries = entries if entries is not None else {}
+        self.dirty = False
 
-    python_files = [f for f in files if f.endswith('.py') and f != '__init__.py']
-    if not python_files:
-        error("No Python scripts found in 'tools' folder.")
-        return []
+    @property
+    def search_directories(self) -> list[str]:
+        """Directories to look for tool scripts in: the tools folder, then the registered directories"""
+        return [self.tools_path] + self.directories
 
-    python_files = sorted(python_files)
+    @staticmethod
+    def read(path: str = TOOLS_INDEX_PATH, tools_path: str = TOOLS_PATH) -> 'ToolsIndex | None':
+        """
+        Args:
+            path: Path of the index file
+            tools_path: (Optional) Tools folder to search besides the registered directories
+
+        Returns:
+            The index, or None if it is missing, unreadable or of an unknown version
+        """
+        try:
+            with open(path, 'r') as fd:
+                data = json.load(fd)
+        except (OSError, json.JSONDecodeError):
+            return None
 
-    # Convert to absolute paths and return
-    return [os.path.normcase(os.path.join(TOOLS_PATH, filename)) for filename in python_files]
+        if not isinstance(data, dict):
+            return None
 
+        if 'version' not in data:
+            # Older indices map tool paths straight to metadata; upgrade them on the next write
+            index = ToolsIndex(entries={os.path.normcase(path): entry for path, entry in data.items()
+                                        if isinstance(entry, dict)}, tools_path=tools_path)
+            index.dirty = True
+            return index
 
-def get_indexed_tools() -> PartialToolListType | None:
-    try:
-        with open(TOOLS_INDEX_PATH, 'r') as fd:
-            tools_index = json.load(fd)
-    except (OSError, json.JSONDecodeError):
-        warning('Failed to load tools index... Will regenerate')
-        return None
+        if data['version'] != _INDEX_VERSION:
+            return None
 
-    output_tools = PartialToolListType()
-    for tool_path, meta_dict in tools_index.items():
-        # Normalize tool_path for Windows
-        tool_path = os.path.normcase(tool_path)
+        return ToolsIndex(data['directories'], data['tools'], tools_path)
+
+    def write(self, path: str = TOOLS_INDEX_PATH):
+        """
+        Writes the index back to disk and clears the dirty flag
+
+        Args:
+            path: Path of the index file
+        """
+        with open(path, 'w') as fd:
+            json.dump({'version': _INDEX_VERSION, 'directories': self.directories, 'tools': self.entries}, fd,
+                      indent=2)
+        self.dirty = False
+
+    def add_directory(self, directory: str) -> bool:
+        """
+        Args:
+            directory: Directory to look for tool scripts in from now on
+
+        Returns:
+            Whether the directory was newly added
+        """
+        directory = os.path.normcase(os.path.abspath(os.path.expanduser(directory)))
+        if directory in self.search_directories:
+            return False
+
+        self.directories.append(directory)
+        self.dirty = True
+        return True
+
+    def sweep(self) -> dict[str, os.stat_result]:
+        """
+        Lists the tool scripts in the tools folder and every registered directory, one scandir per directory
+
+        Returns:
+            Stat results by case-normalized script path, in directory order and then by file name
+        """
+        scripts: dict[str, os.stat_result] = {}
+        for directory in self.search_directories:
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted((entry for entry in it if _is_tool_script(entry.name)), key=lambda e: e.name)
+            except OSError:
+                warning(f'Could not read tools directory {directory}')
+                continue
 
-        # First check if tool_path exists and is file...
-        if not os.path.isfile(tool_path):
-            continue
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        scripts[os.path.normcase(entry.path)] = entry.stat()
+                except OSError:
+                    continue
+        return scripts
+
+    def set_tool(self, module_or_path: ModuleType | str, meta: ToolMetadata, stat: os.stat_result | None = None):
+        """
+        Adds or replaces the index entry of a tool
+
+        Args:
+            module_or_path: Tool module or script path
+            meta: Tool metadata
+            stat: (Optional) Stat result of the script, if already known
+        """
+        if isinstance(module_or_path, ModuleType):
+            tool_path = os.path.normcase(cast(str, module_or_path.__file__))
+        else:
+            tool_path = os.path.normcase(module_or_path)
+        if stat is None:
+            stat = os.stat(tool_path)
+
+        tool_data = meta.to_dict()
+
+        # Extra important detail, need time last modified (and size, to catch edits within the mtime resolution)
+        tool_data['last_modified'] = stat.st_mtime
+        tool_data['size'] = stat.st_size
+
+        self.entries[tool_path] = tool_data
+        self.dirty = True
+
+    def refresh(self, trust_new: bool = False) -> PartialToolListType:
+        """
+        Brings the index up to date with the tool scripts on disk. Unchanged scripts are taken from the index, changed
+        ones are reloaded, and new ones are loaded once trusted
+
+        Args:
+            trust_new: Whether to load new scripts without asking for confirmation
+
+        Returns:
+            Every tool, sorted by name
+        """
+        scripts = self.sweep()
+
+        tools = PartialToolListType()
+        for tool_path, entry in list(self.entries.items()):
+            stat = scripts.pop(tool_path, None)
+            if stat is None and os.path.dirname(tool_path) not in self.search_directories:
+                # Scripts registered on their own, rather than through their directory
+                try:
+                    stat = os.stat(tool_path)
+                except OSError:
+                    pass
+
+            # Drop scripts that have been removed
+            if stat is None:
+                del self.entries[tool_path]
+                self.dirty = True
+                continue
 
-        # Check modify time
-        index_mtime = meta_dict['last_modified']
-        actual_mtime = os.path.getmtime(tool_path)
+            if entry.get('last_modified') == stat.st_mtime and entry.get('size') == stat.st_size:
+                tools.append((tool_path, ToolMetadata.from_dict(entry)))
+                continue
 
-        # If the file has been changed, reload the tool script...
-        if index_mtime != actual_mtime:
+            # If the file has been changed, reload the tool script...
             tool_tuple = load_tool(tool_path)
             if tool_tuple is None:
                 warning(f'Failed to load tool from index: {tool_path}')
+                del self.entries[tool_path]
+                self.dirty = True
                 continue
 
-            output_tools.append(tool_tuple)
-        else:
-            output_tools.append((tool_path, ToolMetadata.from_dict(meta_dict)))
-
-    # Process any added tools
-    for script_path in get_tool_scripts():
-        # If tool not found in index, load and add it
-        if script_path not in tools_index:
-            info(f'NEW TOOL SCRIPT DETECTED: {os.path.basename(script_path)} (located in '
-                  f'{os.path.dirname(script_path)})')
-            response = input('Are you sure you want to trust this script? (Y/n)\n').strip().casefold()
-            if response == 'y' or response == 'ye' or response == 'yes':
-                tool_tuple = load_tool(script_path)
-                if tool_tuple is None:
-                    error(f'Failed to load tool: {script_path}')
-                    continue
-            else:
+            self.set_tool(*tool_tuple, stat=stat)
+            tools.append(tool_tuple)
+
+        # Process any added tools
+        for script_path, stat in scripts.items():
+            if not trust_new and not _trust_script(script_path):
                 info('Aborting program.')
                 sys.exit(0)
 
-            output_tools.append(tool_tuple)
+            tool_tuple = load_tool(script_path)
+            if tool_tuple is None:
+                error(f'Failed to load tool: {script_path}')
+                continue
 
-    # Sort tools alphabetically by tool name
-    output_tools.sort(key=lambda tool_tuple: tool_tuple[-1].tool_name)
-    return output_tools
+            self.set_tool(*tool_tuple, stat=stat)
+            tools.append(tool_tuple)
 
+        # Sort tools alphabetically by tool name
+        tools.sort(key=lambda tool_tuple: tool_tuple[-1].tool_name)
+        return tools
 
-def load_tools() -> PartialToolListType:
-    # First load the index
-    info('Loading index file...')
-    tools_index = get_indexed_tools()
 
-    # If we were successful in loading the tools index, perfect we're done!
-    if tools_index:
-        make_tools_index(tools_index)
-        return tools_index
+def make_tools_index(tools: PartialToolListType):
+    # Keep the registered tool directories of the current index
+    index = ToolsIndex.read() or ToolsIndex()
+    index.entries = {}
+    for module_or_path, meta in tools:
+        index.set_tool(module_or_path, meta)
+    index.write()
 
-    # First time execution!
-    # Get all tooling scripts
-    if not os.path.exists(TOOLS_PATH):
-        os.mkdir(TOOLS_PATH)
 
-    tool_paths = get_tool_scripts()
+# Get tool scripts as absolute, case-normalized paths
+def get_tool_scripts() -> list[str]:
+    index = ToolsIndex.read() or ToolsIndex()
+    scripts = list(index.sweep())
+    if not scripts:
+        error("No Python scripts found in 'tools' folder.")
+    return scripts
 
-    # Append each successfully loaded tool to the output
-    tools: PartialToolListType = []
-    for path in tool_paths:
-        load_result = load_tool(path)
-        if load_result is None:
-            continue
-        tools.append(load_result)
 
-    # Create index for future execution
-    make_tools_index(tools)
+def get_indexed_tools() -> PartialToolListType | None:
+    index = ToolsIndex.read()
+    if index is None:
+        warning('Failed to load tools index... Will regenerate')
+        return None
+
+    return index.refresh()
+
+
+def load_tools() -> PartialToolListType:
+    # First load the index
+    info('Loading index file...')
+    index = ToolsIndex.read()
+    if index is None:
+        # First time execution!
+        warning('Failed to load tools index... Will regenerate')
+        if not os.path.exists(TOOLS_PATH):
+            os.mkdir(TOOLS_PATH)
+        index = ToolsIndex()
+        index.dirty = True
+
+    # Scripts found on the first run are bundled with PyTower, so they are trusted
+    tools = index.refresh(trust_new=not index.entries)
+
+    # Only rewrite the index when something changed
+    if index.dirty:
+        index.write()
 
     return tools
@@ -1,26 +1,34 @@
+from __future__ import annotations
 import argparse
+import os
 from pathlib import Path
-import pyparsing
+import re
 import sys
+import time
 from types import ModuleType
-from typing import Any, cast
+from typing import Any, cast, TYPE_CHECKING
 
 import colorama
+import yaml
 
-from pytower.blueprint import make_blueprint, place_blueprint
 from .__config__ import __version__
-from .backup import make_backup, restore_backup, fix_canvases
 from .config import TowerConfig
-from .image_backends.backend import ResourceBackend
-from .image_backends.custom import CustomBackend
-from .image_backends.catbox import CatboxBackend
-from .image_backends.imgur import ImgurBackend
 from .logging import *
-from .selection import *
-from .suitebro import load_suitebro, save_suitebro, run_suitebro_parser
-from .tool_lib import ToolMetadata, ParameterDict, ToolMainType, load_tool, PartialToolListType, load_tools, \
-    make_tools_index
-from .util import not_none, xyz, xyzint
+from .pipeline import load_recipe, PipelineStage, split_stage_args, STAGE_SEPARATOR
+from . import serializer
+from .startup import PROFILE_STARTUP_FLAG, profile_startup
+from .tool_lib import ToolMetadata, ParameterDict, ToolMainType, import_tool_module, load_tool, PartialToolListType, \
+    load_tools, ToolsIndex
+
+# Saves, selections and resource backends pull in numpy, scipy, pyparsing and requests, so they are imported by the
+# subcommands that use them. That keeps list, info, version and the other metadata-only commands fast to start
+if TYPE_CHECKING:
+    from .image_backends.backend import ResourceBackend
+    from .selection import Selector
+    from .suitebro import Suitebro
+
+# Subcommands that look at the tools index. Every other subcommand skips loading it
+_TOOL_SUBCOMMANDS = ('help', 'list', 'info', 'run', 'batch')
 
 
 class PyTowerParser(argparse.ArgumentParser):
@@ -36,6 +44,50 @@ class PyTowerParser(argparse.ArgumentParser):
         return super().add_subparsers(**kwargs)
 
 
+def add_stage_arguments(parser: argparse.ArgumentParser, tool_optional: bool = False):
+    """
+    Adds the arguments describing one tool run (pipeline stage) to a parser
+
+    Args:
+        parser: Parser to add the arguments to
+        tool_optional: Whether the tool can be left out
+    """
+    if tool_optional:
+        parser.add_argument('tool', type=str, nargs='?', default=None,
+                            help=f'Tool to use. Chain more tools with "{STAGE_SEPARATOR} <tool> [options]"')
+    else:
+        parser.add_argument('tool', type=str, help='Tool to use')
+
+    parser.add_argument('-s', '--select', dest='selection', type=str, default='items',
+                        help='Selection type')
+
+    # Flags
+    parser.add_argument('-v', '--invert', dest='invert', action='store_true',
+                        help='Whether to invert selection')
+    parser.add_argument('-vf', '--invert-full', dest='invert-full', action='store_true',
+                        help='Whether to do a full inversion (included property-only objects)')
+    parser.add_argument('-g', '--groups', '--per-group', dest='per_group', action='store_true',
+                        help='Whether to apply the tool per group')
+    parser.add_argument('--jobs', dest='jobs', type=int, default=1,
+                        help='Number of worker processes for per-group runs of tools declaring PARALLEL_SAFE '
+                             '(0 for one per CPU)')
+    parser.add_argument('-r', '--num-runs', '--num-times', dest='num_runs', type=int, default=1,
+                        help='Number of times to run tool')
+    parser.add_argument('-@', '--params', '--parameters', dest='parameters', nargs='*', default=[],
+                        help='Parameters to pass onto tooling script (must come at end of the stage)')
+
+
+def get_stage_parser() -> PyTowerParser:
+    """
+    Returns:
+        Parser for the arguments of each pipeline stage after the first
+    """
+    parser = PyTowerParser(prog=f'pytower run ... {STAGE_SEPARATOR}',
+                           description='Additional pipeline stage, run on the same save', allow_abbrev=False)
+    add_stage_arguments(parser)
+    return parser
+
+
 def get_parser(tool_names: str) -> PyTowerParser:
     """
     Args:
@@ -49,6 +101,8 @@ def get_parser(tool_names: str) -> PyTowerParser:
                            epilog=f'Detected tools: {tool_names}')
 
     parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    parser.add_argument(PROFILE_STARTUP_FLAG, action='store_true',
+                        help='Run the rest of the command and report which imports its startup spent time on')
 
     subparsers = parser.add_subparsers(dest='subcmd')
 
@@ -61,6 +115,8 @@ def get_parser(tool_names: str) -> PyTowerParser:
     # Convert subcommand
     convert_parser = subparsers.add_parser('convert', help='Convert given file to .json or CondoData')
     convert_parser.add_argument('filename', type=str, help='File to use as input')
+    convert_parser.add_argument('-p', '--pretty', dest='pretty', action='store_true',
+                                help='Whether to indent the output .json for human readability')
 
     # Backup subcommand
     backup_parser = subparsers.add_parser('backup', help='Backup or restore canvases for save files')
@@ -79,36 +135,57 @@ def get_parser(tool_names: str) -> PyTowerParser:
     info_parser.add_argument('tool', type=str, help='Tool to get information about')
 
     # Scan subcommand
-    scan_parser = subparsers.add_parser('scan', help='Scan given directory for tools')
+    scan_parser = subparsers.add_parser('scan', help='Register a directory of tools')
     scan_parser.add_argument('path', type=str, help='Path to use (use "." for current directory)')
 
     # Run subcommand
     run_parser = subparsers.add_parser('run', help='Run given tool')
 
-    # Required tool parameter
-    run_parser.add_argument('tool', type=str, help='Tool to use')
+    # Tool to run, plus its selection/parameters; further stages can follow after "then"
+    add_stage_arguments(run_parser, tool_optional=True)
 
-    # Run parameters
+    # Save parameters
     run_parser.add_argument('-i', '--input', dest='input', type=str, default='CondoData',
                             help='Input file')
     run_parser.add_argument('-o', '--output', dest='output', type=str, default='CondoData_output',
                             help='Output file')
-    run_parser.add_argument('-s', '--select', dest='selection', type=str, default='items',
-                            help='Selection type')
-
-    # Flags
-    run_parser.add_argument('-v', '--invert', dest='invert', action='store_true',
-                            help='Whether to invert selection')
-    run_parser.add_argument('-vf', '--invert-full', dest='invert-full', action='store_true',
-                            help='Whether to do a full inversion (included property-only objects)')
+    run_parser.add_argument('--recipe', dest='recipe', type=str, default=None,
+                            help='YAML/JSON file listing pipeline stages to run after any given on the command line')
     run_parser.add_argument('-j', '--json', dest='json', type=bool, action=argparse.BooleanOptionalAction,
                             help='Whether to load/save as .json, instead of converting to CondoData')
-    run_parser.add_argument('-g', '--groups', '--per-group', dest='per_group', action='store_true',
-                            help='Whether to apply the tool per group')
-    run_parser.add_argument('-r', '--num-runs', '--num-times', dest='num_runs', type=int, default=1,
-                            help='Number of times to run tool')
-    run_parser.add_argument('-@', '--params', '--parameters', dest='parameters', nargs='*', default=[],
-                            help='Parameters to pass onto tooling script (must come at end)')
+    run_parser.add_argument('--native', dest='native', type=bool, action=argparse.BooleanOptionalAction,
+                            help='Whether to convert CondoData in-process instead of with tower-unite-suitebro '
+                                 '(defaults to the native_codec config value)')
+
+    # Batch subcommand
+    batch_parser = subparsers.add_parser('batch', help='Run a chain of tools over many saves')
+    batch_parser.add_argument('tools', type=str, nargs='+', help='Tools to run on each save, in order')
+    batch_parser.add_argument('-i', '--input', dest='inputs', type=str, nargs='+', required=True,
+                              help='Saves to process, as paths or glob patterns (quote them to use ** globs)')
+    batch_parser.add_argument('-d', '--output-dir', dest='output_dir', type=str, default=None,
+                              help='Directory to write the processed saves to (defaults to next to each input)')
+    batch_parser.add_argument('--suffix', dest='suffix', type=str, default='_output',
+                              help='Suffix appended to each output file name')
+    batch_parser.add_argument('-s', '--select', dest='selection', type=str, default='items',
+                              help='Selection type')
+    batch_parser.add_argument('-v', '--invert', dest='invert', action='store_true',
+                              help='Whether to invert selection')
+    batch_parser.add_argument('-vf', '--invert-full', dest='invert-full', action='store_true',
+                              help='Whether to do a full inversion (included property-only objects)')
+    batch_parser.add_argument('-g', '--groups', '--per-group', dest='per_group', action='store_true',
+                              help='Whether to apply the tools per group')
+    batch_parser.add_argument('--jobs', dest='jobs', type=int, default=1,
+                              help='Number of worker processes for per-group runs of tools declaring PARALLEL_SAFE, '
+                                   'per save (0 for one per CPU)')
+    batch_parser.add_argument('-j', '--json', dest='json', type=bool, action=argparse.BooleanOptionalAction,
+                              help='Whether to load/save as .json, instead of converting to CondoData')
+    batch_parser.add_argument('--native', dest='native', type=bool, action=argparse.BooleanOptionalAction,
+                              help='Whether to convert CondoData in-process instead of with tower-unite-suitebro '
+                                   '(defaults to the native_codec config value)')
+    batch_parser.add_argument('-w', '--workers', dest='workers', type=int, default=0,
+                              help='Number of saves to process at once (0 for one per CPU)')
+    batch_parser.add_argument('-@', '--params', '--parameters', dest='parameters', nargs='*', default=[],
+                              help='Parameters to pass onto every tool (must come at end)')
 
     # Blueprint subcommand
     blueprint_parser = subparsers.add_parser('blueprint', help='Run given tool')
@@ -164,11 +241,140 @@ def get_parser(tool_names: str) -> PyTowerParser:
     return parser
 
 
-def parse_args(parser: PyTowerParser | None = None):
+def parse_args(parser: PyTowerParser | None = None, argv: list[str] | None = None):
     if parser is None:
         parser = get_parser('')
 
-    return vars(parser.parse_args())
+    return vars(parser.parse_args(argv))
+
+
+def parse_pipeline_args(parser: PyTowerParser, argv: list[str]) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """
+    Parses the command line, including the extra stages of a multi-stage `pytower run`. Options that are not stage
+    options (-i, -o, --recipe...) may also follow any of the extra stages
+
+    Args:
+        parser: Main parser
+        argv: Command line arguments, without the program name
+
+    Returns:
+        Parsed arguments, and the parsed arguments of each extra stage
+    """
+    head, stage_argvs = split_stage_args(argv)
+    stage_parser = get_stage_parser()
+    stage_args: list[dict[str, Any]] = []
+    for stage_argv in stage_argvs:
+        parsed, extra = stage_parser.parse_known_args(stage_argv)
+        stage_args.append(vars(parsed))
+        head += extra
+
+    return parse_args(parser, head), stage_args
+
+
+def get_run_stages(args: dict[str, Any], stage_args: list[dict[str, Any]]) -> list[PipelineStage]:
+    """
+    Args:
+        args: Parsed `pytower run` arguments
+        stage_args: Parsed arguments of each stage after the first, see parse_pipeline_args
+
+    Returns:
+        Stages to run: the command line ones first, then those of the recipe
+    """
+    stages: list[PipelineStage] = []
+    if args['tool'] is not None:
+        stages.append(PipelineStage.from_args(args))
+    elif stage_args:
+        error(f'A tool must come before "{STAGE_SEPARATOR}"!')
+        sys.exit(1)
+
+    stages += [PipelineStage.from_args(stage) for stage in stage_args]
+
+    if args['recipe'] is not None:
+        try:
+            stages += load_recipe(args['recipe'])
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            error(f'Could not load recipe {args["recipe"]}: {e}')
+            sys.exit(1)
+
+    if not stages:
+        error('No tool given! Pass a tool name or a --recipe')
+        sys.exit(1)
+
+    return stages
+
+
+def stage_jobs(stage: PipelineStage, meta: ToolMetadata, quiet: bool = False) -> int:
+    """
+    Args:
+        stage: Stage to run
+        meta: Tool metadata
+        quiet: Whether to skip warning about --jobs being ignored
+
+    Returns:
+        Number of worker processes to run the stage's groups in, or 1 to run them in this process
+    """
+    jobs = stage.jobs
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    if jobs > 1 and not stage.per_group:
+        if not quiet:
+            warning('--jobs only applies to per-group runs (-g), running normally')
+        return 1
+    if jobs > 1 and not meta.parallel_safe:
+        if not quiet:
+            warning(f'{meta.tool_name} does not declare PARALLEL_SAFE, running groups one at a time')
+        return 1
+    return jobs
+
+
+def run_stage(save: Suitebro, stage: PipelineStage, module: ModuleType, meta: ToolMetadata, params: ParameterDict,
+              quiet: bool = False):
+    """
+    Runs one pipeline stage on a save
+
+    Args:
+        save: Save to run the tool on
+        stage: Stage to run
+        module: Tool module
+        meta: Tool metadata
+        params: Parsed tool parameters
+        quiet: Whether to skip logging the run, e.g. when the same stage runs on many saves
+    """
+    from .parallel import run_per_group
+    from .selection import ItemSelector, Selection
+    from .util import not_none
+
+    selector = parse_selectors(stage.selection)
+    selection = selector.select(Selection(save.objects))
+
+    if stage.invert_full and stage.invert:
+        critical('--invert-all and --invert cannot be used at the same time!')
+        sys.exit(1)
+
+    if stage.invert_full:
+        selection = Selection(save.objects) - selection
+    if stage.invert:
+        selection = ItemSelector().select(Selection(save.objects)) - selection
+
+    if not quiet and stage.num_runs == 1:
+        info(f'Running tool {meta.tool_name}...')
+    elif not quiet and stage.num_runs > 1:
+        info(f'Running tool {meta.tool_name} {stage.num_runs} times...')
+
+    jobs = stage_jobs(stage, meta, quiet)
+    for _ in range(stage.num_runs):
+        if not stage.per_group:
+            # Normal execution
+            module.main(save, selection, params)
+            continue
+
+        # Per group execution. Ungrouped items are treated as being in a group by themselves
+        groups = list(selection.group_map().values()) + [Selection({obj}) for obj in selection.ungrouped()]
+        if jobs > 1:
+            run_per_group(save, not_none(module.__file__), groups, params, jobs)
+        else:
+            for group in groups:
+                module.main(save, group, params)
 
 
 def parse_parameters(param_input: list[Any], meta: ToolMetadata) -> ParameterDict:
@@ -214,7 +420,7 @@ def parse_parameters(param_input: list[Any], meta: ToolMetadata) -> ParameterDic
             continue
 
         # Load in non-optional parameter: prompt user for input
-        value = input(f'Enter value for {param.lower()}{" (x,y,z)" if info.dtype in [xyz, xyzint] else ""}: ')
+        value = input(f'Enter value for {param.lower()}{" (x,y,z)" if info.dtype_name in ("xyz", "xyzint") else ""}: ')
         try:
             value = info.dtype(value)
         except Exception as e:
@@ -237,6 +443,10 @@ def run(input_filename: str, tool: ToolMainType, selector: Selector | None = Non
         selector: Selector to use on input
         params: Parameter list
     """
+    from .selection import ItemSelector, Selection
+    from .suitebro import load_suitebro, save_suitebro
+    from .util import not_none
+
     if params is None:
         params = []
     tool_path: str = tool.__globals__['__file__']
@@ -313,6 +523,11 @@ def parse_selector(selection_input: str) -> Selector | None:
     Returns:
         Parsed Selector object
     """
+    from .selection import BoxSelector, CustomNameSelector, EverythingSelector, GroupSelector, ItemSelector, \
+        NameSelector, NothingSelector, ObjectNameSelector, PercentSelector, RandomSelector, SphereSelector, \
+        TakeSelector
+    from .util import xyz
+
     sel_input = selection_input.casefold().strip()
     sel_split = sel_input.split(':')
     sel_split_case_sensitive = selection_input.strip().split(':')
@@ -377,6 +592,9 @@ def parse_selectors(selection_input: str) -> Selector:
     Returns:
         Selector object
     """
+    import pyparsing
+
+    from .selection import CompositionSelector, DifferenceSelector, IntersectionSelector, UnionSelector
 
     # Define basic components of the expression
     word = pyparsing.Word(pyparsing.alphanums + ':-,/').setParseAction(lambda t: parse_selector(t[0]))
@@ -436,7 +654,7 @@ def parse_selectors(selection_input: str) -> Selector:
         info('\nExample usages:\n  --select group:4\n  --select name:FrontDoor\n  --select regex:Canvas.*')
         sys.exit(1)
 
-    return cast(Selector, parsed)  # We know it's not None!
+    return cast('Selector', parsed)  # We know it's not None!
 
 
 def get_resource_backends() -> list[ResourceBackend]:
@@ -445,6 +663,10 @@ def get_resource_backends() -> list[ResourceBackend]:
         List of ResourceBackends registered with PyTower
     """
     from pytower.config import CONFIG, KEY_IMGUR_CLIENT_ID, KEY_CATBOX_USERHASH
+    from .image_backends.catbox import CatboxBackend
+    from .image_backends.custom import CustomBackend
+    from .image_backends.imgur import ImgurBackend
+
     imgur_client_id = CONFIG.get(KEY_IMGUR_CLIENT_ID, str)
     user_hash = CONFIG.get(KEY_CATBOX_USERHASH, str)
     return [ImgurBackend(imgur_client_id), CatboxBackend(user_hash), CustomBackend()]
@@ -471,23 +693,30 @@ def version() -> str:
     return f'PyTower {__version__}'
 
 
-def convert(filename: str):
+def convert(filename: str, pretty: bool = False):
     """
     Converts input into .json or vice versa, from the uesave tower-unite-suitebro .json format
 
     Args:
         filename: Path or file name of the CondoData/.map file to convert
+        pretty: Whether to indent the output .json for human readability
     """
+    from .suitebro import pretty_path, read_save_data, write_save_data
+
     filename = filename.strip()
     abs_filepath = os.path.realpath(filename)
-    in_dir = os.path.dirname(abs_filepath)
 
     if filename.endswith('.json'):
-        output = os.path.join(in_dir, filename[:-5])
-        run_suitebro_parser(abs_filepath, True, output, overwrite=True)
+        output = abs_filepath[:-5]
+        with open(abs_filepath, 'rb') as fd:
+            save_json = serializer.load(fd)
+        write_save_data(save_json, output, abs_filepath, json_written=True)
     else:
-        output = os.path.join(in_dir, os.path.basename(abs_filepath) + '.json')
-        run_suitebro_parser(abs_filepath, False, output, overwrite=True)
+        output = abs_filepath + '.json'
+        save_json = read_save_data(abs_filepath, output)
+        with open(output, 'wb') as fd:
+            serializer.dump(save_json, fd, pretty=pretty)
+        success(f'Converted {pretty_path(abs_filepath)} to {pretty_path(output)}')
 
 
 def backup(mode: str, filename: str, backends: list[ResourceBackend] | None = None, backend: str = 'Catbox',
@@ -502,6 +731,9 @@ def backup(mode: str, filename: str, backends: list[ResourceBackend] | None = No
         backend: Backend to use when restoring
         force: Whether to force reupload of resources
     """
+    from .backup import make_backup, restore_backup
+    from .suitebro import load_suitebro
+
     if backends is None:
         backends = get_resource_backends()
 
@@ -579,46 +811,122 @@ def info_tool(tool_input: str, tools: PartialToolListType | None = None, tool_na
     sys.exit(1)
 
 
-def scan(path: str, tools: PartialToolListType | None = None) -> PartialToolListType:
+def scan(path: str) -> PartialToolListType:
     """
-    Scans a directory for tool scripts and registers detected tool scripts
+    Registers a directory of tool scripts, so that its tools, including ones added to it later, are detected on
+    every run
 
     Args:
         path: Path of directory to scan
-        tools: List of tools, if included avoids reloading the tool index
+
+    Returns:
+        Every tool, including the ones found in the directory
     """
-    if tools is None:
-        tools = load_tools()
+    if not os.path.isdir(path):
+        error(f'Could not find directory {path}!')
+        sys.exit(1)
 
-    for file in os.listdir(path):
-        if file.endswith('.py') and file != '__init__.py' and file != '__main__.py' and file != 'setup.py':
-            abs_path = os.path.normcase(os.path.abspath(file))
+    index = ToolsIndex.read() or ToolsIndex()
+    if not index.add_directory(path):
+        info(f'{path} is already registered, rescanning')
 
-            # Check if files already exist before registering them
-            exists = False
-            for tool_tuple in tools:
-                module_or_path, _ = tool_tuple
-                if isinstance(module_or_path, ModuleType):
-                    path = os.path.normcase(module_or_path.__file__)
-                else:
-                    path = module_or_path
+    # Scanning a directory is what trusts the scripts in it
+    known = set(index.entries)
+    tools = index.refresh(trust_new=True)
+    for tool_path in index.entries.keys() - known:
+        info(f'Registered tool script {os.path.basename(tool_path)}')
 
-                if abs_path == path:
-                    exists = True
-                    break
+    # Finally update tools index
+    if index.dirty:
+        index.write()
+    return tools
 
-            if exists:
-                info(f'Found already registered script {file}')
-                continue
 
-            # At this point, the tool script must be novel so load it
-            tool_tuple = load_tool(file)
-            if tool_tuple is not None:
-                tools.append(tool_tuple)
+def batch(tool_inputs: list[str], inputs: list[str], tools: PartialToolListType, selection: str = 'items',
+          parameters: list[str] | None = None, per_group: bool = False, invert: bool = False,
+          invert_full: bool = False, jobs: int = 1, only_json: bool = False, native: bool | None = None,
+          output_dir: str | None = None, suffix: str = '_output', workers: int = 0):
+    """
+    Runs a chain of tools over many saves, several saves at a time, then prints an aggregate summary
 
-    # Finally update tools index
-    make_tools_index(tools)
-    return tools
+    Args:
+        tool_inputs: Names of the tools to run on each save, in order
+        inputs: Saves to process, as paths or glob patterns
+        tools: List of tools
+        selection: Selection to run the tools on, reapplied before each tool
+        parameters: Parameters in the format "parameter=value", passed onto every tool
+        per_group: Whether to apply the tools per group
+        invert: Whether to invert the selection
+        invert_full: Whether to do a full inversion of the selection (including property-only objects)
+        jobs: Number of worker processes for per-group runs of tools declaring PARALLEL_SAFE, per save (0 for one
+            per CPU)
+        only_json: Whether to load/save as .json, instead of converting to CondoData
+        native: (Optional) Whether to use the native codec, defaults to the native_codec config value
+        output_dir: (Optional) Directory to write the processed saves to, defaults to next to each input
+        suffix: Suffix appended to each output file name
+        workers: Number of saves to process at once (0 for one per CPU)
+    """
+    from .batch import BatchJob, expand_inputs, output_path_for, run_batch, summarize
+    from .suitebro import pretty_path
+    from .util import not_none
+
+    if parameters is None:
+        parameters = []
+
+    if invert and invert_full:
+        critical('--invert-all and --invert cannot be used at the same time!')
+        sys.exit(1)
+
+    # Resolve the tool chain once up front, instead of once per save. Each tool runs as a pipeline stage
+    chain: list[tuple[PipelineStage, str, ToolMetadata, ParameterDict]] = []
+    write = False
+    for tool_input in tool_inputs:
+        tool = find_tool(tools, tool_input.strip().casefold())
+        if not tool:
+            error(f'Could not find {tool_input}! \n\nAvailable tools: {get_tool_names(tools)}')
+            sys.exit(1)
+
+        module_or_path, meta = tool
+        tool_path = module_or_path.__file__ if isinstance(module_or_path, ModuleType) else module_or_path
+        stage = PipelineStage(tool_input, selection, parameters, per_group, invert, invert_full, jobs=jobs)
+        stage_jobs(stage, meta)  # Warn about an ignored --jobs once, rather than for every save
+        chain.append((stage, not_none(tool_path), meta, parse_parameters(parameters, meta)))
+        write = write or not meta.nowrite
+
+    paths = expand_inputs(inputs, only_json=only_json, skip_suffix=suffix if output_dir is None else None)
+    if not paths:
+        error('No saves to process!')
+        sys.exit(1)
+
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # Catch a bad selection before starting any job
+    parse_selectors(selection)
+    batch_jobs = [BatchJob(path, output_path_for(path, suffix, output_dir), chain, only_json=only_json,
+                           native=native, write=write) for path in paths]
+
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    info(f'Running {len(chain)} tool(s) on {len(batch_jobs)} save(s) with {min(workers, len(batch_jobs))} '
+         f'worker(s)...')
+
+    start = time.perf_counter()
+    results = run_batch(batch_jobs, workers)
+    summary = summarize(results, time.perf_counter() - start)
+
+    info(f'Processed {summary["files"] - summary["failed"]}/{summary["files"]} saves '
+         f'({summary["objects"]:,} objects) in {summary["wall_time"]:.2f}s')
+    info(f'  load {summary["load_time"]:.2f}s, tools {summary["tool_time"]:.2f}s, save {summary["save_time"]:.2f}s '
+         f'({summary["busy_time"]:.2f}s of work, overlapped {summary["speedup"]:.1f}x)')
+    if summary['failed']:
+        error(f'{summary["failed"]} save(s) failed:')
+        for result in results:
+            if result.error is not None:
+                error(f'  {pretty_path(result.input_path)}: {result.error}')
+        sys.exit(1)
+
+    success('Batch complete!')
 
 
 def fix(filename: str, backends: list[ResourceBackend] | None = None, backend: str = 'Catbox', force: bool = False):
@@ -631,6 +939,8 @@ def fix(filename: str, backends: list[ResourceBackend] | None = None, backend: s
         backend: Backend to use when fixing
         force: Whether to force reupload of resources
     """
+    from .backup import fix_canvases
+
     if backends is None:
         backends = get_resource_backends()
 
@@ -640,8 +950,20 @@ def fix(filename: str, backends: list[ResourceBackend] | None = None, backend: s
     fix_canvases(path, force_reupload=force, backend=backend)
 
 
+def _needs_tools(argv: list[str]) -> bool:
+    if '--version' in argv:
+        return False
+
+    # Without a subcommand, the help lists the tools
+    subcmd = next((arg for arg in argv if not arg.startswith('-')), None)
+    return subcmd is None or subcmd in _TOOL_SUBCOMMANDS
+
+
 def main():
     """Entrypoint for PyTower"""
+    if PROFILE_STARTUP_FLAG in sys.argv[1:]:
+        sys.exit(profile_startup([arg for arg in sys.argv[1:] if arg != PROFILE_STARTUP_FLAG]))
+
     debug(f"Ran command {' '.join(sys.argv)}")
 
     # Initialize colorama for pretty printing
@@ -649,12 +971,11 @@ def main():
 
     config = TowerConfig('config.json')
 
-    tools = load_tools()
+    argv = sys.argv[1:]
+    tools = load_tools() if _needs_tools(argv) else []
     tool_names = get_tool_names(tools)
     parser = get_parser(tool_names)
-    args = parse_args(parser)
-
-    backends = get_resource_backends()
+    args, stage_args = parse_pipeline_args(parser, argv)
 
     if not args['subcmd']:
         parser.print_help(sys.stdout)
@@ -666,30 +987,36 @@ def main():
         case 'version':
             info(version())
         case 'convert':
-            convert(args['filename'])
+            convert(args['filename'], args['pretty'])
         case 'backup':
-            backup(args['mode'], args['filename'], backends, args['backend'], args['force'])
+            backup(args['mode'], args['filename'], backend=args['backend'], force=args['force'])
         case 'list':
             list_tools(tools)
         case 'info':
             info_tool(args['tool'], tools, tool_names)
         case 'scan':
-            scan(args['path'], tools)
+            scan(args['path'])
         case 'run':
-            # Parse tool name
-            tool_name = args['tool'].strip().casefold()
-            tool = find_tool(tools, tool_name)
-
-            # Error if could not find specified tool
-            if not tool:
-                error(f'Could not find {args["tool"]}! \n\nAvailable tools: {tool_names}')
-                sys.exit(1)
+            stages = get_run_stages(args, stage_args)
+
+            # Resolve every tool and its parameters up front, so a typo doesn't cost a save conversion
+            stage_tools: list[tuple[ModuleType, ToolMetadata, ParameterDict]] = []
+            for stage in stages:
+                tool = find_tool(tools, stage.tool.strip().casefold())
+
+                # Error if could not find specified tool
+                if not tool:
+                    error(f'Could not find {stage.tool}! \n\nAvailable tools: {tool_names}')
+                    sys.exit(1)
+
+                module_or_path, meta = tool
+                if not isinstance(module_or_path, ModuleType):
+                    # Tools are indexed without being imported, so this is the first time the script runs
+                    module = import_tool_module(module_or_path)
+                else:
+                    module = module_or_path
 
-            module_or_path, meta = tool
-            if not isinstance(module_or_path, ModuleType):
-                module, _ = load_tool(module_or_path)
-            else:
-                module = module_or_path
+                stage_tools.append((module, meta, parse_parameters(stage.parameters, meta)))
 
             # Input file name
             input_filename = args['input']
@@ -701,50 +1028,38 @@ def main():
                 if input_filename.endswith('.json'):
                     input_filename = input_filename[:-5]
 
-            # Load save
-            save = load_suitebro(input_filename, only_json=only_json)
-
-            inv_items_count = save.inventory_count()
-
-            selector = parse_selectors(args['selection'])
-            selection = selector.select(Selection(save.objects))
-
-            if args['invert-full'] and args['invert']:
-                critical('--invert-all and --invert cannot be used at the same time!')
-                sys.exit(1)
+            # Load save once for the whole pipeline
+            from .suitebro import load_suitebro, save_suitebro
 
-            if args['invert-full']:
-                selection = Selection(save.objects) - selection
-            if args['invert']:
-                selection = ItemSelector().select(Selection(save.objects)) - selection
-
-            # Run tool
-            params = parse_parameters(args['parameters'], meta)
-            num_runs: int = args['num_runs']
-            if num_runs == 1:
-                info(f'Running tool {meta.tool_name}...')
-            elif num_runs > 1:
-                info(f'Running tool {meta.tool_name} {num_runs} times...')
-
-            for _ in range(num_runs):
-                if not args['per_group']:
-                    # Normal execution
-                    module.main(save, selection, params)
-                else:
-                    # Per group execution
-                    for (group_id, group) in selection.groups():
-                        module.main(save, group, params)
+            start = time.perf_counter()
+            save = load_suitebro(input_filename, only_json=only_json, native=args['native'])
+            load_time = time.perf_counter() - start
 
-                    # Ungrouped items are treated as being in a group by themselves
-                    for obj in selection.ungrouped():
-                        module.main(save, Selection({obj}), params)
+            inv_items_count = save.inventory_count()
 
-            # Skip writeback if tool has NO_WRITE = True
-            if meta.nowrite:
+            # Run tools
+            stage_times: list[float] = []
+            for stage, (module, meta, params) in zip(stages, stage_tools):
+                start = time.perf_counter()
+                run_stage(save, stage, module, meta, params)
+                stage_times.append(time.perf_counter() - start)
+
+            # Skip writeback if every tool has NO_WRITE = True
+            write = not all(meta.nowrite for _, meta, _ in stage_tools)
+            save_time = 0.0
+            if write:
+                start = time.perf_counter()
+                save_suitebro(save, args['output'], only_json=only_json, native=args['native'])
+                save_time = time.perf_counter() - start
+
+            if len(stages) > 1:
+                info(f'Pipeline timings: load {load_time:.2f}s, save {save_time:.2f}s')
+                for idx, (stage_time, (_, meta, _)) in enumerate(zip(stage_times, stage_tools)):
+                    info(f'  {idx + 1}. {meta.tool_name}: {stage_time:.2f}s')
+
+            if not write:
                 return
 
-            # Writeback save
-            save_suitebro(save, args['output'], only_json=only_json)
             success(f'Exported to {args["output"]}!')
 
             # Display items in save
@@ -759,7 +1074,16 @@ def main():
                 info('Make sure you have the following items in your inventory before loading the map:')
                 for name, count in final_inv_items_count.items():
                     info(f'{count:>9,}x {name}')
+        case 'batch':
+            batch(args['tools'], args['inputs'], tools, selection=args['selection'], parameters=args['parameters'],
+                  per_group=args['per_group'], invert=args['invert'], invert_full=args['invert-full'],
+                  jobs=args['jobs'], only_json=args['json'], native=args['native'],
+                  output_dir=args['output_dir'], suffix=args['suffix'], workers=args['workers'])
         case 'blueprint':
+            from .blueprint import make_blueprint, place_blueprint
+            from .selection import Selection
+            from .suitebro import load_suitebro, save_suitebro
+
             match args['blueprint_mode']:
                 case 'make':
                     name = args['name']
@@ -801,13 +1125,15 @@ def main():
                     else:
                         error(f'Could not place blueprint (Make sure map contains a PyMarker)')
         case 'fix':
-            fix(args['filename'], backends, args['backend'], args['force'])
+            fix(args['filename'], backend=args['backend'], force=args['force'])
         case 'compress':
             filename = args['filename']
             if not os.path.isfile(filename):
                 error(f'Could not find {filename}!')
                 sys.exit(1)
 
+            from .suitebro import load_suitebro, save_suitebro
+
             save = load_suitebro(filename)
             for obj in save.objects:
                 obj.compress()
@@ -822,7 +1148,7 @@ def main():
                     k, v = args['key'], ' '.join(args['value'])
                     try:
                         if v.strip().casefold() in ['true', 'false']:
-                            config.set(k, bool(v))
+                            config.set(k, v.strip().casefold() == 'true')
                         else:
                             config.set(k, v)
                         success(f'{k} is now set to {v}')
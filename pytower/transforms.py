@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+from typing import Iterable, TYPE_CHECKING
+
+import numpy as np
+
+from .util import XYZ, XYZW
+
+if TYPE_CHECKING:
+    from .object import TowerObject
+
+_INITIAL_CAPACITY = 64
+
+
+def _read_only(view: np.ndarray) -> np.ndarray:
+    # Column views must not be written in place, as that would bypass the dirty flags and position_version
+    view.setflags(write=False)
+    return view
+
+
+class TransformStore:
+    """
+    Structure-of-arrays store for the position, rotation and scale of a set of TowerObjects
+
+    While an object is bound to a store, its position/rotation/scale properties read from and write to rows of the
+    store's columns instead of the nested item dictionaries, and the dictionaries are only brought up to date by
+    sync(). This lets vectorized tools operate on whole columns at once.
+
+    Attributes:
+        objects: Bound objects, where objects[i] owns row i of each column
+        position_version: Incremented whenever a position is written or objects are bound/released, so that
+            derived data (like SpatialIndex) knows when to rebuild
+    """
+
+    def __init__(self, objects: Iterable[TowerObject] = ()):
+        """
+        Args:
+            objects: (Optional) Objects to bind to the store. Property-only objects are skipped
+        """
+        self.objects: list[TowerObject] = []
+        self.position_version = 0
+        self._size = 0
+        self._positions = np.empty((_INITIAL_CAPACITY, 3), dtype=np.float64)
+        self._rotations = np.empty((_INITIAL_CAPACITY, 4), dtype=np.float64)
+        self._scales = np.empty((_INITIAL_CAPACITY, 3), dtype=np.float64)
+        self._pos_dirty = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+        self._rot_dirty = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+        self._scale_dirty = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+
+        self.add(objects)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reserve(self, capacity: int):
+        if capacity <= len(self._positions):
+            return
+
+        new_capacity = max(capacity, 2 * len(self._positions))
+        for attr in ('_positions', '_rotations', '_scales', '_pos_dirty', '_rot_dirty', '_scale_dirty'):
+            old = getattr(self, attr)
+            new = np.zeros((new_capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, attr, new)
+
+    def add(self, objects: Iterable[TowerObject]):
+        """
+        Binds objects to the store, gathering their current transforms from their item dictionaries
+
+        Args:
+            objects: Objects to bind. Property-only objects and objects already bound to this store are skipped
+        """
+        new_objs = [obj for obj in objects if obj.item is not None and obj._store is not self]
+        if not new_objs:
+            return
+
+        for obj in new_objs:
+            if obj._store is not None:
+                obj._store.release(obj)
+
+        start = self._size
+        end = start + len(new_objs)
+        self._reserve(end)
+
+        items = [obj.item for obj in new_objs]
+        self._positions[start:end] = [(p['x'], p['y'], p['z']) for p in (item['position'] for item in items)]
+        self._rotations[start:end] = [(r['x'], r['y'], r['z'], r['w']) for r in (item['rotation'] for item in items)]
+        self._scales[start:end] = [(s['x'], s['y'], s['z']) for s in (item['scale'] for item in items)]
+
+        for idx, obj in enumerate(new_objs, start):
+            obj._store = self
+            obj._store_index = idx
+        self.objects += new_objs
+        self._size = end
+        self.position_version += 1
+
+    def release(self, obj: TowerObject):
+        """
+        Writes an object's transform back into its dictionaries and unbinds it. Its row is left unused
+
+        Args:
+            obj: Object to unbind
+        """
+        if obj._store is not self:
+            return
+
+        self.sync_object(obj)
+        obj._store = None
+        obj._store_index = -1
+        self.position_version += 1
+
+    def reload(self, objects: Iterable[TowerObject]):
+        """
+        Re-reads the transforms of bound objects from their item dictionaries, e.g. after the dictionaries were
+        replaced. Any of their transforms not yet synced back are discarded
+
+        Args:
+            objects: Objects to reload. Objects not bound to this store are skipped
+        """
+        objs = [obj for obj in objects if obj._store is self]
+        if not objs:
+            return
+
+        idx = np.fromiter((obj._store_index for obj in objs), dtype=np.intp, count=len(objs))
+        items = [obj.item for obj in objs]
+        self._positions[idx] = [(p['x'], p['y'], p['z']) for p in (item['position'] for item in items)]
+        self._rotations[idx] = [(r['x'], r['y'], r['z'], r['w']) for r in (item['rotation'] for item in items)]
+        self._scales[idx] = [(s['x'], s['y'], s['z']) for s in (item['scale'] for item in items)]
+        self._pos_dirty[idx] = False
+        self._rot_dirty[idx] = False
+        self._scale_dirty[idx] = False
+        self.position_version += 1
+
+    def indices(self, objects: Iterable[TowerObject]) -> np.ndarray:
+        """
+        Args:
+            objects: Objects to look up
+
+        Returns:
+            Row indices of the objects that are bound to this store, in iteration order
+        """
+        return np.fromiter((obj._store_index for obj in objects if obj._store is self), dtype=np.intp)
+
+    # region columns
+    @property
+    def positions(self) -> np.ndarray:
+        """Read-only Nx3 view of the position column. Write through set_positions() so the rows get synced"""
+        return _read_only(self._positions[:self._size])
+
+    @property
+    def rotations(self) -> np.ndarray:
+        """Read-only Nx4 view of the rotation quaternion column (x, y, z, w). Write through set_rotations()"""
+        return _read_only(self._rotations[:self._size])
+
+    @property
+    def scales(self) -> np.ndarray:
+        """Read-only Nx3 view of the scale column. Write through set_scales()"""
+        return _read_only(self._scales[:self._size])
+
+    def set_positions(self, idx: np.ndarray | slice, values: np.ndarray):
+        """
+        Args:
+            idx: Row indices (or slice) to write to
+            values: New positions, broadcastable to the selected rows
+        """
+        self._positions[:self._size][idx] = values
+        self._pos_dirty[:self._size][idx] = True
+        self.position_version += 1
+
+    def set_rotations(self, idx: np.ndarray | slice, values: np.ndarray):
+        """
+        Args:
+            idx: Row indices (or slice) to write to
+            values: New rotation quaternions (x, y, z, w), broadcastable to the selected rows
+        """
+        self._rotations[:self._size][idx] = values
+        self._rot_dirty[:self._size][idx] = True
+
+    def set_scales(self, idx: np.ndarray | slice, values: np.ndarray):
+        """
+        Args:
+            idx: Row indices (or slice) to write to
+            values: New scales, broadcastable to the selected rows
+        """
+        self._scales[:self._size][idx] = values
+        self._scale_dirty[:self._size][idx] = True
+
+    # endregion
+
+    # region rows
+    def get_position(self, idx: int) -> XYZ:
+        return self._positions[idx].copy().view(XYZ)
+
+    def get_rotation(self, idx: int) -> XYZW:
+        return self._rotations[idx].copy().view(XYZW)
+
+    def get_scale(self, idx: int) -> XYZ:
+        return self._scales[idx].copy().view(XYZ)
+
+    def set_position(self, idx: int, value: np.ndarray):
+        self._positions[idx] = value
+        self._pos_dirty[idx] = True
+        self.position_version += 1
+
+    def set_rotation(self, idx: int, value: np.ndarray):
+        self._rotations[idx] = value
+        self._rot_dirty[idx] = True
+
+    def set_scale(self, idx: int, value: np.ndarray):
+        self._scales[idx] = value
+        self._scale_dirty[idx] = True
+
+    # endregion
+
+    def sync_object(self, obj: TowerObject):
+        """
+        Writes a single bound object's transform back into its item (and properties) dictionaries
+
+        Args:
+            obj: Object to sync
+        """
+        idx = obj._store_index
+        if self._pos_dirty[idx]:
+            obj._write_position(self.get_position(idx))
+            self._pos_dirty[idx] = False
+        if self._rot_dirty[idx]:
+            obj._write_rotation(self.get_rotation(idx))
+            self._rot_dirty[idx] = False
+        if self._scale_dirty[idx]:
+            obj._write_scale(self.get_scale(idx))
+            self._scale_dirty[idx] = False
+
+    def sync(self):
+        """Writes every modified transform back into the dictionaries of the bound objects"""
+        size = self._size
+        dirty = self._pos_dirty[:size] | self._rot_dirty[:size] | self._scale_dirty[:size]
+        for idx in np.flatnonzero(dirty):
+            obj = self.objects[idx]
+            if obj._store is self:
+                self.sync_object(obj)
@@ -0,0 +1,111 @@
+import copy
+from collections import Counter
+
+from pytower.suitebro import Suitebro
+
+_ITEM = {
+    'name': 'CanvasWedge',
+    'steam_item_id': 0,
+    'format_version': 1,
+    'unreal_version': 517,
+    'actors': [],
+    'rotation': {'x': 0.0, 'y': 0.0, 'z': 0.0, 'w': 1.0},
+    'position': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+    'scale': {'x': 1.0, 'y': 1.0, 'z': 1.0},
+}
+
+
+def _make_save(num_items: int = 300, num_groups: int = 10) -> Suitebro:
+    items = []
+    properties = []
+    for i in range(num_items):
+        props = {'GroupID': {'Int': {'value': i % num_groups + 1}}}
+        item = copy.deepcopy(_ITEM)
+        item['guid'] = f'00000000-0000-0000-0000-{i:012x}'
+        item['properties'] = props
+        item['position'] = {'x': float(i), 'y': 0.0, 'z': 0.0}
+        items.append(item)
+        properties.append({'name': f'CanvasWedge_C_{i}', 'properties': copy.deepcopy(props)})
+
+    counts = Counter(i % num_groups + 1 for i in range(num_items))
+    data = {'header': {'format_version': 1, 'unreal_version': 517}, 'items': items, 'properties': properties,
+            'groups': [{'group_id': gid, 'item_count': count} for gid, count in sorted(counts.items())]}
+    return Suitebro('test', '.', data)
+
+
+def _written_groups(save: Suitebro) -> dict[int, int]:
+    return {group['group_id']: group['item_count'] for group in save.to_dict()['groups']}
+
+
+def _actual_groups(save: Suitebro) -> dict[int, int]:
+    return dict(Counter(obj.group_id for obj in save.objects))
+
+
+def test_remove_updates_group_counts():
+    save = _make_save()
+    assert save.get_max_groupid() == 10  # Builds the index
+
+    obj = next(obj for obj in save.objects if obj.group_id == 3)
+    save.objects.remove(obj)
+
+    assert _written_groups(save)[3] == 29
+    assert _written_groups(save) == _actual_groups(save)
+    # Group selections only hold objects still in the save
+    assert {group_id: len(sel) for group_id, sel in save.groups()} == _actual_groups(save)
+    assert obj not in dict(save.groups())[3]
+
+
+def test_list_mutations_keep_index_and_transforms_in_sync():
+    save = _make_save()
+    save.get_max_groupid()
+    store = save.transforms
+
+    first, second, third = save.objects[0], save.objects[1], save.objects[2]
+    del save.objects[0]
+    save.objects.pop()
+    save.objects += [first]
+    save.objects.insert(0, third)
+    save.objects.sort(key=lambda obj: obj.position[0])
+    assert _written_groups(save) == _actual_groups(save)
+
+    # Removed objects are unbound from the transforms store, added ones bound to it
+    save.objects.remove(second)
+    assert second._store is None
+    assert first._store is store
+    save.objects.append(second)
+    assert second._store is store
+
+    # Objects bound through list methods still have their transforms written back
+    store.set_positions(store.indices([second]), [[1.0, 2.0, 3.0]])
+    item = next(item for item in save.to_dict()['items'] if item['guid'] == second.item['guid'])
+    assert item['position'] == {'x': 1.0, 'y': 2.0, 'z': 3.0}
+
+    save.objects.clear()
+    assert save.to_dict()['groups'] == []
+    assert save.find_item('CanvasWedge') is None
+
+
+def test_assigning_objects_keeps_index_in_sync():
+    save = _make_save()
+    save.get_max_groupid()
+
+    save.objects = [obj for obj in save.objects if obj.group_id != 5]
+    assert 5 not in _written_groups(save)
+    assert _written_groups(save) == _actual_groups(save)
+
+
+def test_property_writes_keep_index_in_sync():
+    save = _make_save()
+    save.get_max_groupid()
+
+    objs = [obj for obj in save.objects if obj.group_id == 2]
+    objs[0].set_property('properties.GroupID.Int.value', 42)
+    objs[1].group_id = 7
+    objs[2].ungroup()
+    assert save.get_max_groupid() == 42
+    assert _written_groups(save) == {group_id: count for group_id, count in _actual_groups(save).items()
+                                     if group_id >= 0}
+    assert _written_groups(save)[2] == 27
+
+    objs[3].set_property('properties.ItemCustomName.Name.value', 'Renamed')
+    assert save.find_item('Renamed') is objs[3]
@@ -2,7 +2,7 @@ from pytower import tower
 from pytower.selection import Selection
 from pytower.suitebro import Suitebro
 from pytower.tool_lib import ToolParameterInfo, ParameterDict
-from pytower.util import not_none, xyz
+from pytower.util import xyz
 
 TOOL_NAME = 'Center'
 VERSION = '1.0'
@@ -10,18 +10,12 @@ AUTHOR = 'Physics System'
 URL = 'https://github.com/rainbowphysics/PyTower/blob/main/tools/center.py'
 INFO = '''Centers selection at the world origin'''
 PARAMETERS = {'offset': ToolParameterInfo(dtype=xyz, description='Optional offset', default=xyz(0.0, 0.0, 0.0))}
+PARALLEL_SAFE = True
 
 
 def main(save: Suitebro, selection: Selection, params: ParameterDict):
-    offset = params.offset
-    centroid = sum([not_none(obj.position) for obj in selection]) / len(selection)
-
-    for obj in selection:
-        # Move so that the centroid becomes the origin
-        obj.position -= centroid
-
-        # Add optional offset
-        obj.position += offset
+    # Move so that the centroid becomes the origin, plus the optional offset
+    selection.translate(params.offset - selection.centroid)
 
 
 if __name__ == '__main__':
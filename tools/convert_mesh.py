@@ -1,3 +1,5 @@
+import sys
+
 from scipy.spatial.transform import Rotation as R
 
 from pytower import tower
@@ -6,7 +8,7 @@ from pytower.selection import Selection
 from pytower.suitebro import Suitebro
 from pytower.tool_lib import ToolParameterInfo, ParameterDict
 from pytower.util import xyz
-from pytower.mesh import convert_mesh, load_mesh
+from pytower.mesh import MAX_ATLAS_SIZE, AtlasConfig, convert_mesh, load_mesh
 
 TOOL_NAME = 'ConvertMesh'
 VERSION = '1.0'
@@ -15,18 +17,36 @@ URL = 'https://github.com/rainbowphysics/PyTower/blob/main/tools/convert_mesh.py
 INFO = '''Converts given mesh into wedges'''
 PARAMETERS = {'filename': ToolParameterInfo(dtype=str, description='Filename of 3D model'),
               'offset': ToolParameterInfo(dtype=xyz, description='Translation offset', default=xyz(0.0, 0.0, 0.0)),
-              'scale': ToolParameterInfo(dtype=float, description='Model scale', default=1.0)}
+              'scale': ToolParameterInfo(dtype=float, description='Model scale', default=1.0),
+              'backend': ToolParameterInfo(dtype=str, description='Backend to upload texture atlases to',
+                                           default='Catbox'),
+              'atlas_size': ToolParameterInfo(dtype=int, description='Largest texture atlas width and height, in pixels',
+                                              default=4096),
+              'wedges_per_cell': ToolParameterInfo(dtype=int, description='Wedges packed per texture atlas cell, 1 or 2',
+                                                   default=1),
+              'texel_density': ToolParameterInfo(dtype=float, description='Texels per unit, or 0 to pick from the '
+                                                 'triangle areas', default=0.0)}
 
 
 def main(save: Suitebro, selection: Selection, params: ParameterDict):
+    # Check the atlas parameters before doing any work
+    try:
+        atlas = AtlasConfig(atlas_size=min(params.atlas_size, MAX_ATLAS_SIZE), wedges_per_cell=params.wedges_per_cell,
+                            texel_density=params.texel_density if params.texel_density > 0 else None)
+    except ValueError as e:
+        error(f'Invalid texture atlas parameters: {e}')
+        sys.exit(1)
+
     # Load mesh
     mesh = load_mesh(params.filename)
 
     # Scale mesh BEFORE converting to canvas wedges
     mesh.triangles *= params.scale
 
-    # Convert mesh and group together
-    mesh_group_id = convert_mesh(save, mesh, offset=params.offset).group()
+    # Convert mesh and group together, recording atlas uploads next to the model so an interrupted upload resumes
+    backend = tower.parse_resource_backend(tower.get_resource_backends(), params.backend)
+    mesh_group_id = convert_mesh(save, mesh, offset=params.offset, backend=backend,
+                                 manifest_path=f'{params.filename}.atlases.json', atlas=atlas).group()
     success(f'Imported mesh {params.filename} with group:{mesh_group_id}')
 
 
@@ -1,9 +1,8 @@
-import math
+import numpy as np
 
-from pytower.copy import copy_selection
+from pytower.copy import instance_selection
 from pytower.selection import Selection
 from pytower.suitebro import Suitebro
-from pytower.tools import rotate
 from pytower.tool_lib import ToolParameterInfo, ParameterDict
 from pytower.util import xyz
 
@@ -23,23 +22,14 @@ PARAMETERS = {'radius': ToolParameterInfo(dtype=float, description='radius of cy
 def main(save: Suitebro, selection: Selection, params: ParameterDict):
     # Get tile/offset parameters, and handle edge-case for 0-entries
     r = params.radius
-    for nt in range(params.r_segments):
-        for nh in range(params.h_segments):
-            theta = nt * 2 * math.pi / params.r_segments
-            z_offset = nh * params.height / params.h_segments
+    nt, nh = np.meshgrid(np.arange(params.r_segments), np.arange(params.h_segments), indexing='ij')
+    theta = nt.ravel() * 2 * np.pi / params.r_segments
+    z_offset = nh.ravel() * params.height / params.h_segments
 
-            # Copy selection
-            copies = copy_selection(selection)
+    # Each copy is turned to face outwards, then moved onto the cylinder
+    rotations = np.tile(np.asarray(params.rotation, dtype=np.float64), (len(theta), 1))
+    rotations[:, 2] += np.degrees(theta)
+    offsets = np.column_stack([r * np.cos(theta), r * np.sin(theta), z_offset])
 
-            # Rotate then set position of copy
-            deg = math.degrees(theta)
-            params.rotation.z += deg
-            rotate.main(save, copies, params)
-            params.rotation.z -= deg
-
-            offset = xyz(r * math.cos(theta), r * math.sin(theta), z_offset)
-            for obj in copies:
-                obj.position += offset
-
-            # Add copies to save
-            save.add_objects(copies)
+    for copies in instance_selection(selection, offsets, rotations, local=params.local):
+        save.add_objects(copies)
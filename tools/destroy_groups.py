@@ -7,6 +7,7 @@ VERSION = '1.0'
 AUTHOR = 'Physics System'
 URL = 'https://github.com/rainbowphysics/PyTower/blob/main/tools/destroy_groups.py'
 INFO = '''Destroys all groups in selection (useful for when large groups cause lag)'''
+PARALLEL_SAFE = True
 
 
 def main(save: Suitebro, selection: Selection, params: ParameterDict):
@@ -12,7 +12,7 @@ INFO = '''Filters the save so that only the items in selection remain'''
 
 def main(save: Suitebro, selection: Selection, params: ParameterDict):
     # Filter out everything except for metadata objects
-    save.objects = [obj for obj in save.objects if obj.item is None or obj in selection]
+    save.remove_objects([obj for obj in save.objects if obj.item is not None and obj not in selection])
 
 
 if __name__ == '__main__':
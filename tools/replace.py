@@ -11,6 +11,7 @@ URL = 'https://github.com/rainbowphysics/PyTower/blob/main/tools/replace.py'
 INFO = '''Replace materials on canvas objects in the given selection.'''
 PARAMETERS = {'replace': ToolParameterInfo(dtype=str, description='Material to replace'),
               'material': ToolParameterInfo(dtype=str, description='Replacement material to use instead')}
+PARALLEL_SAFE = True
 
 
 def should_replace(obj: TowerObject, material: str) -> bool:
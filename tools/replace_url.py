@@ -10,6 +10,7 @@ URL = 'https://github.com/rainbowphysics/PyTower/blob/main/tools/replace_url.py'
 INFO = '''Replaces URL on canvas objects in the given selection.'''
 PARAMETERS = {'url': ToolParameterInfo(dtype=str, description='URL to set'),
               'replace': ToolParameterInfo(dtype=str, description='URL to replace')}
+PARALLEL_SAFE = True
 
 
 def should_replace(obj: TowerObject, url: str) -> bool:
@@ -1,5 +1,3 @@
-from scipy.spatial.transform import Rotation as R
-
 from pytower import tower
 from pytower.selection import Selection
 from pytower.suitebro import Suitebro
@@ -13,26 +11,12 @@ URL = 'https://github.com/rainbowphysics/PyTower/blob/main/tools/rotate.py'
 INFO = '''Rotates selection a specified amount (in world coordinates)'''
 PARAMETERS = {'rotation': ToolParameterInfo(dtype=xyz, description='Rotation to perform (in Euler angles and degrees)'),
               'local': ToolParameterInfo(dtype=bool, description='Whether to only rotate locally', default=False)}
+PARALLEL_SAFE = True
 
 
 def main(save: Suitebro, selection: Selection, params: ParameterDict):
-    rot = params.rotation
-    r = R.from_euler('xyz', rot, degrees=True)
-    centroid = sum([obj.position for obj in selection]) / len(selection)
-
-    for obj in selection:
-        # Since obj.rotation is quaternion, need to convert to/from
-        q = R.from_quat(obj.rotation)
-        p = r * q
-        obj.rotation = xyz(p.as_quat())
-
-        #TODO special treatment of groups--groups are still considered local
-
-        if not params.local:
-            # Rotate positions around centroid with help from scipy
-            obj.position -= centroid
-            obj.position = xyz(r.apply(obj.position))
-            obj.position += centroid
+    #TODO special treatment of groups--groups are still considered local
+    selection.rotate(params.rotation, local=params.local)
 
 
 if __name__ == '__main__':
@@ -2,6 +2,7 @@ from pytower import tower
 from pytower.selection import Selection
 from pytower.suitebro import Suitebro
 from pytower.tool_lib import ToolParameterInfo, ParameterDict
+from pytower.util import xyz
 
 TOOL_NAME = 'Scale'
 VERSION = '1.0'
@@ -10,30 +11,15 @@ URL = 'https://github.com/rainbowphysics/PyTower/blob/main/tools/scale.py'
 INFO = '''Scales selection up, either around the centroid (default) or world origin (origin=True)'''
 PARAMETERS = {'scale': ToolParameterInfo(dtype=float, description='Scaling factor'),
               'origin': ToolParameterInfo(dtype=bool, description='Whether to scale around the origin', default=False)}
+PARALLEL_SAFE = True
 
 
 def main(save: Suitebro, selection: Selection, params: ParameterDict):
-    scale = params.scale
-
     # Optional parameter
     use_origin = 'origin' in params and params.origin
 
-    centroid = sum([obj.position for obj in selection]) / len(selection)
-
-    # When not using the origin to scale, we need to shift the coordinates so that the centroid *becomes* the origin
-    if not use_origin:
-        for obj in selection:
-            obj.position -= centroid
-
-    # Scale about the origin
-    for obj in selection:
-        obj.position *= scale
-        obj.scale *= scale
-
-    # Shift coordinates back to world coordinates
-    if not use_origin:
-        for obj in selection:
-            obj.position += centroid
+    # Scale about the centroid, unless asked to scale about the world origin
+    selection.scale(params.scale, pivot=xyz(0.0, 0.0, 0.0) if use_origin else None)
 
 
 if __name__ == '__main__':
@@ -9,6 +9,7 @@ AUTHOR = 'Physics System'
 URL = 'https://github.com/rainbowphysics/PyTower/blob/main/tools/set.py'
 INFO = '''Sets materials on canvas objects in the given selection.'''
 PARAMETERS = {'material': ToolParameterInfo(dtype=str, description='Material to apply')}
+PARALLEL_SAFE = True
 
 
 def main(save: Suitebro, selection: Selection, params: ParameterDict):
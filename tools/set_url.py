@@ -8,6 +8,7 @@ AUTHOR = 'Physics System'
 URL = 'https://github.com/rainbowphysics/PyTower/blob/main/tools/set_url.py'
 INFO = '''Sets URL on canvas objects in the given selection.'''
 PARAMETERS = {'url': ToolParameterInfo(dtype=str, description='URL to set')}
+PARALLEL_SAFE = True
 
 
 def main(save: Suitebro, selection: Selection, params: ParameterDict):
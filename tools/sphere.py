@@ -1,13 +1,12 @@
 import math
-from scipy.spatial.transform import Rotation as R
 
-from pytower import tower
-from pytower.copy import copy_selection
+import numpy as np
+
+from pytower.copy import instance_selection
 from pytower.selection import Selection
 from pytower.suitebro import Suitebro
-from pytower.tools import rotate
 from pytower.tool_lib import ToolParameterInfo, ParameterDict
-from pytower.util import xyz, xyzint, XYZInt
+from pytower.util import xyz
 
 TOOL_NAME = 'Sphere'
 VERSION = '1.0'
@@ -25,31 +24,18 @@ def main(save: Suitebro, selection: Selection, params: ParameterDict):
     r = params.radius
     varphi = math.pi * (3 - math.sqrt(5))
     N = params.n_points
-    for i in range(N):
-        z = 1 - (2 * i) / float(N - 1)  # z goes from 1 to -1
-        radius = math.sqrt(1 - z * z)  # Radius at z
-
-        theta = varphi * i  # Golden angle increment
-        phi = math.acos(z)
-        offset = xyz(radius * math.cos(theta), radius * math.sin(theta), z) * r
-
-        # Copy selection
-        copies = copy_selection(selection)
-
-        # Rotate then set position of copy
-        deg_theta = math.degrees(theta)
-        deg_phi = math.degrees(phi) - 90
+    i = np.arange(N)
+    z = 1 - (2 * i) / float(N - 1)  # z goes from 1 to -1
+    radius = np.sqrt(1 - z * z)  # Radius at z
 
-        params.rotation.z += deg_theta
-        params.rotation.y += deg_phi
-        params.rotation.x += deg_theta
-        rotate.main(save, copies, params)
-        params.rotation.x -= deg_theta
-        params.rotation.y -= deg_phi
-        params.rotation.z -= deg_theta
+    theta = varphi * i  # Golden angle increment
+    phi = np.arccos(z)
+    offsets = np.column_stack([radius * np.cos(theta), radius * np.sin(theta), z]) * r
 
-        for obj in copies:
-            obj.position += offset
+    # Rotate each copy to match its point on the sphere, then move it there
+    deg_theta = np.degrees(theta)
+    deg_phi = np.degrees(phi) - 90
+    rotations = np.asarray(params.rotation, dtype=np.float64) + np.column_stack([deg_theta, deg_phi, deg_theta])
 
-        # Add copies to save
+    for copies in instance_selection(selection, offsets, rotations, local=params.local):
         save.add_objects(copies)
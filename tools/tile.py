@@ -1,5 +1,7 @@
+import numpy as np
+
 from pytower import tower
-from pytower.copy import copy_selection
+from pytower.copy import instance_selection
 from pytower.selection import Selection
 from pytower.suitebro import Suitebro
 from pytower.tool_lib import ToolParameterInfo, ParameterDict
@@ -17,24 +19,14 @@ PARAMETERS = {'tile': ToolParameterInfo(dtype=xyzint, description='x,y,z tiling
 def main(save: Suitebro, selection: Selection, params: ParameterDict):
     # Get tile/offset parameters, and handle edge-case for 0-entries
     nx, ny, nz = XYZInt.max(params.tile, xyzint(1, 1, 1))
-    dx, dy, dz = params.offset
-    for x in range(nx):
-        for y in range(ny):
-            for z in range(nz):
-                # Skip tiling origin
-                if x == 0 and y == 0 and z == 0:
-                    continue
-
-                # Copy selection
-                copies = copy_selection(selection)
-
-                # Set position of copy
-                offset = xyz(x * dx, y * dy, z * dz)
-                for obj in copies:
-                    obj.position += offset
-
-                # Add copies to save
-                save.add_objects(copies)
+
+    # Grid of (x, y, z) cell indices in x-major order, skipping the tiling origin
+    cells = np.indices((nx, ny, nz)).reshape(3, -1).T[1:]
+    offsets = cells * np.asarray(params.offset, dtype=np.float64)
+
+    # Build every copy in one pass, then add them to the save
+    for copies in instance_selection(selection, offsets):
+        save.add_objects(copies)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,3 @@
-from scipy.spatial.transform import Rotation as R
-
 from pytower import tower
 from pytower.selection import Selection
 from pytower.suitebro import Suitebro
@@ -14,32 +12,12 @@ INFO = '''Translates selection a specified amount (in world coordinates)'''
 PARAMETERS = {'offset': ToolParameterInfo(dtype=xyz, description='Translation offset'),
               'local': ToolParameterInfo(dtype=bool, description='Whether to translate in local coordinates',
                                          default=False)}
+PARALLEL_SAFE = True
 
 
 def main(save: Suitebro, selection: Selection, params: ParameterDict):
-    offset = params.offset
-
-    # Translate in world coordinates, easy
-    if not params.local:
-        for obj in selection:
-            obj.position += offset
-        return
-
-    # Otherwise, we translate in local coordinates
-
-    # Start by taking the standard basis in world coordinates
-    xhat = xyz(1, 0, 0)
-    yhat = xyz(0, 1, 0)
-    zhat = xyz(0, 0, 1)
-    std_basis = [xhat, yhat, zhat]
-
-    for obj in selection:
-        # Convert obj.rotation to a scipy rotation
-        r = R.from_quat(obj.rotation)
-        # Rotate each of the standard basis vectors by obj.rotation to get local coordinates
-        xlocal, ylocal, zlocal = [r.apply(basis_vec) for basis_vec in std_basis]
-        # Now use this to peform a local translation
-        obj.position += xyz(offset[0] * xlocal + offset[1] * ylocal + offset[2] * zlocal)
+    # In local mode, the offset is rotated by each object's rotation before being applied
+    selection.translate(params.offset, local=params.local)
 
 
 if __name__ == '__main__':